@@ -12,6 +12,11 @@
 #include "numpy/arrayobject.h"
 #include "Python.h"
 
+#ifndef CHLONE_ON_WINDOWS
+#include <fcntl.h>
+#endif
+#include <time.h>
+
 #ifndef CHLONE_ON_WINDOWS
 #define S2P_PLATFORM_CURRENT S2P_PLATFORM_UNIX
 #else
@@ -91,13 +96,25 @@ extern int __node_count;
 
 #define __MAXOBJTABLE      256
 
+/* smaller data arrays are read during the parse even with threads */
+#define S2P_DEFERREDREADMIN 65536
+
 #define  __THREADING__     1
 
+#define S2P_CLEARINDEX( idx ) \
+idx.key=NULL;\
+idx.val=NULL;\
+idx.max=0;\
+idx.cur=0;
+
 #define S2P_NEWCONTEXTPTR( ctxt ) \
 ctxt=(s2p_ctx_t*)malloc(sizeof(s2p_ctx_t));\
 ctxt->flg=S2P_FNONE;\
 ctxt->pth=NULL;\
+ctxt->pth_end=NULL;\
 ctxt->lnk=NULL;\
+ctxt->lnk_end=NULL;\
+S2P_CLEARINDEX(ctxt->lnk_idx);\
 ctxt->hdf_dbs=NULL;\
 ctxt->lnk_obj=NULL;\
 ctxt->upd_pth=NULL;\
@@ -105,6 +122,7 @@ ctxt->upd_pth_lk=NULL;\
 ctxt->flt_dct=NULL;\
 ctxt->skp_pth=NULL;\
 ctxt->skp_pth_lk=NULL;\
+S2P_CLEARINDEX(ctxt->skp_idx);\
 ctxt->lsp=NULL;\
 ctxt->hdf_idx=-1;\
 ctxt->flg=0;\
@@ -113,6 +131,25 @@ ctxt->mxs=-1;\
 ctxt->pol_max=0;\
 ctxt->pol_cur=0;\
 ctxt->pol_oid=NULL;\
+ctxt->thr=0;\
+ctxt->rdq=NULL;\
+ctxt->rdq_max=0;\
+ctxt->rdq_cur=0;\
+ctxt->rdq_fnm=NULL;\
+ctxt->rdq_fnc=0;\
+ctxt->rdq_pth=NULL;\
+ctxt->rdq_npt=0;\
+ctxt->map_dct=NULL;\
+L3M_CLEARSTORAGE(ctxt->sto_dft);\
+ctxt->sto_typ=NULL;\
+ctxt->sto_pth=NULL;\
+ctxt->sub_lst=NULL;\
+ctxt->sub_cnt=0;\
+ctxt->img_obj=NULL;\
+ctxt->rdt_obj=NULL;\
+ctxt->rdt_err=NULL;\
+ctxt->prf=NULL;\
+ctxt->dgs_obj=NULL;\
 ctxt->sha256=(sha256_t *)malloc(sizeof(sha256_t));\
 ctxt->platform=S2P_PLATFORM_CURRENT;\
 ctxt->err=NULL;
@@ -120,7 +157,10 @@ ctxt->err=NULL;
 #define S2P_CLEARCONTEXTPTR( ctxt ) \
 ctxt->flg=S2P_FNONE;\
 ctxt->pth=NULL;\
+ctxt->pth_end=NULL;\
 ctxt->lnk=NULL;\
+ctxt->lnk_end=NULL;\
+S2P_CLEARINDEX(ctxt->lnk_idx);\
 ctxt->hdf_dbs=NULL;\
 ctxt->lnk_obj=NULL;\
 ctxt->upd_pth=NULL;\
@@ -128,6 +168,7 @@ ctxt->upd_pth_lk=NULL;\
 ctxt->flt_dct_pth=NULL;\
 ctxt->skp_pth=NULL;\
 ctxt->skp_pth_lk=NULL;\
+S2P_CLEARINDEX(ctxt->skp_idx);\
 ctxt->lsp=NULL;\
 ctxt->hdf_idx=-1;\
 ctxt->flg=0;\
@@ -136,16 +177,40 @@ ctxt->mxs=-1;\
 ctxt->pol_max=0;\
 ctxt->pol_cur=0;\
 ctxt->pol_oid=NULL;\
+ctxt->thr=0;\
+ctxt->rdq=NULL;\
+ctxt->rdq_max=0;\
+ctxt->rdq_cur=0;\
+ctxt->rdq_fnm=NULL;\
+ctxt->rdq_fnc=0;\
+ctxt->rdq_pth=NULL;\
+ctxt->rdq_npt=0;\
+ctxt->map_dct=NULL;\
+L3M_CLEARSTORAGE(ctxt->sto_dft);\
+ctxt->sto_typ=NULL;\
+ctxt->sto_pth=NULL;\
+ctxt->sub_lst=NULL;\
+ctxt->sub_cnt=0;\
+ctxt->img_obj=NULL;\
+ctxt->rdt_obj=NULL;\
+ctxt->rdt_err=NULL;\
+ctxt->prf=NULL;\
+ctxt->dgs_obj=NULL;\
  ctxt->platform=S2P_PLATFORM_CURRENT;\
 ctxt->err=NULL;
 
 #define S2P_HASFLAG( flag ) ((context->flg & flag) == flag)
+#define S2P_READTYPE( l3db, dt ) \
+(((dt) >= 0) && ((dt) <= L3E_VOID) && ((l3db)->readtype[(dt)] != (dt)))
 #define S2P_SETFLAG( flag ) ( context->flg |=  flag)
 #define S2P_CLRFLAG( flag ) ( context->flg &= ~flag)
 
 #define S2P_TRACE( txt ) \
 if (S2P_HASFLAG(S2P_FTRACE)){printf txt ;fflush(stdout);}
 
+#define S2P_PHASE( phase ) \
+((context->prf != NULL) ? s2p_setPhase(context, phase) : S2P_PNONE)
+
 static char *DT_MT = "MT";
 static char *DT_I4 = "I4";
 static char *DT_I8 = "I8";
@@ -158,7 +223,7 @@ static char *DT_C1 = "C1";
   && (PyUnicode_Check(PyList_GetItem(node, 0))) \
   && (PyList_Check(PyList_GetItem(node,2))) \
   && (PyUnicode_Check(PyList_GetItem(node, 3))) \
-  && (s2p_nodeNotAlreadyParsed(node,ctxt)))
+  && (s2p_nodeNotAlreadyParsed(node,ctxt) == 1))
 
 #define S2P_CHECKNODENOCACHE( node, ctxt )                        \
 ((PyList_Check(node)) && (PyList_Size(node) == 4) \
@@ -331,6 +396,446 @@ static int s2p_popHDF(s2p_ctx_t *context)
 	return context->hdf_idx;
 }
 /* ------------------------------------------------------------------------- */
+/* The root of a linked-to file gets one more reference for each pop,
+   the parse is over and these references have to be released before the
+   file is closed or kept open for the next parse. */
+static void s2p_releaseRoot(L3_Cursor_t *l3db)
+{
+	if ((l3db == NULL) || !H5Iis_valid(l3db->root_id))
+	{
+		return;
+	}
+	while (H5Iget_ref(l3db->root_id) > 1)
+	{
+		H5Idec_ref(l3db->root_id);
+	}
+}
+/* ------------------------------------------------------------------------- */
+/* Process-level cache of the read-only handles, shared by load, probe,
+   iterate and the lazy data reads. The key is the real path of the file,
+   a handle is closed and the file opened again if its inode, size or
+   modification time has changed. Most recently used handle first, the last
+   unused one is closed when a new file has to be opened and the cache is
+   full. A handle is used by one parse at a time, a file already in use is
+   opened again out of the cache. */
+static s2p_hdl_t s2p_hdlcache[S2P_MAX_HANDLE_CACHE];
+static int s2p_hdlcount = 0;
+static int s2p_hdlsize = S2P_DFT_HANDLE_CACHE;
+static long s2p_hdlhits = 0;
+static long s2p_hdlmisses = 0;
+
+static int s2p_realPath(char *filename, char *rpath)
+{
+	char *r;
+
+#ifndef CHLONE_ON_WINDOWS
+	r = realpath(filename, NULL);
+#else
+	r = _fullpath(NULL, filename, 0);
+#endif
+	if ((r == NULL) || (strlen(r) >= L3C_MAX_FILE))
+	{
+		free(r);
+		return 0;
+	}
+	strcpy(rpath, r);
+	free(r);
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
+static int s2p_statHandle(s2p_hdl_t *hdl)
+{
+	struct stat sbuff;
+
+	if (stat(hdl->filename, &sbuff) == -1)
+	{
+		return 0;
+	}
+	hdl->ino = (long)sbuff.st_ino;
+	hdl->size = (long)sbuff.st_size;
+	hdl->mtime = (long)sbuff.st_mtime;
+#if defined(__linux__)
+	hdl->mtime_ns = (long)sbuff.st_mtim.tv_nsec;
+#else
+	hdl->mtime_ns = 0;
+#endif
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
+static void s2p_dropHandle(int n)
+{
+	L3_close(&(s2p_hdlcache[n].l3db));
+	memmove(&(s2p_hdlcache[n]), &(s2p_hdlcache[n + 1]),
+		(s2p_hdlcount - n - 1) * sizeof(s2p_hdl_t));
+	s2p_hdlcount--;
+}
+/* ------------------------------------------------------------------------- */
+/* Returns an open read-only handle on filename, cached is set to 1 if the
+   handle belongs to the cache and has to be returned with s2p_putHandle,
+   else it has to be closed by the caller. */
+static L3_Cursor_t *s2p_getHandle(char *filename, int *cached,
+	s2p_ctx_t *context)
+{
+	s2p_hdl_t hdl, *chdl;
+	long l3flag = L3F_DEFAULT;
+	int n;
+
+	*cached = 0;
+	if (S2P_HASFLAG(S2P_FDEBUG)) { l3flag |= L3F_DEBUG; }
+	if (!s2p_realPath(filename, hdl.filename) || !s2p_statHandle(&hdl))
+	{
+		return NULL;
+	}
+	for (n = 0; n < s2p_hdlcount; n++)
+	{
+		chdl = &(s2p_hdlcache[n]);
+		if (!strcmp(chdl->filename, hdl.filename) && !chdl->users)
+		{
+			if ((chdl->ino == hdl.ino) && (chdl->size == hdl.size)
+				&& (chdl->mtime == hdl.mtime) && (chdl->mtime_ns == hdl.mtime_ns)
+				&& L3_resetCursor(chdl->l3db, l3flag))
+			{
+				S2P_TRACE(("# CHL:cached handle [%s]\n", hdl.filename));
+				s2p_hdlhits++;
+				hdl = *chdl;
+				hdl.users = 1;
+				memmove(&(s2p_hdlcache[1]), &(s2p_hdlcache[0]), n * sizeof(s2p_hdl_t));
+				s2p_hdlcache[0] = hdl;
+				*cached = 1;
+				return hdl.l3db;
+			}
+			S2P_TRACE(("# CHL:changed file, close handle [%s]\n", hdl.filename));
+			s2p_dropHandle(n);
+			break;
+		}
+	}
+	S2P_TRACE(("# CHL:open handle [%s]\n", hdl.filename));
+	s2p_hdlmisses++;
+	ENTER_NOGIL_BLOCK(1);
+	hdl.l3db = L3_openFile(hdl.filename, L3E_OPEN_RDO, l3flag);
+	LEAVE_NOGIL_BLOCK();
+	if (!L3M_ECHECK(hdl.l3db))
+	{
+		L3_close(&(hdl.l3db));
+		return NULL;
+	}
+	if (s2p_hdlcount == s2p_hdlsize)
+	{
+		for (n = s2p_hdlcount - 1; n >= 0; n--)
+		{
+			if (!s2p_hdlcache[n].users)
+			{
+				S2P_TRACE(("# CHL:close handle [%s]\n", s2p_hdlcache[n].filename));
+				s2p_dropHandle(n);
+				break;
+			}
+		}
+	}
+	if (s2p_hdlcount < s2p_hdlsize)
+	{
+		hdl.users = 1;
+		memmove(&(s2p_hdlcache[1]), &(s2p_hdlcache[0]),
+			s2p_hdlcount * sizeof(s2p_hdl_t));
+		s2p_hdlcache[0] = hdl;
+		s2p_hdlcount++;
+		*cached = 1;
+	}
+	return hdl.l3db;
+}
+/* ------------------------------------------------------------------------- */
+static void s2p_putHandle(L3_Cursor_t *l3db)
+{
+	int n;
+
+	for (n = 0; n < s2p_hdlcount; n++)
+	{
+		if (s2p_hdlcache[n].l3db == l3db)
+		{
+			s2p_hdlcache[n].users = 0;
+			if (n >= s2p_hdlsize)
+			{
+				s2p_dropHandle(n);
+			}
+			return;
+		}
+	}
+	L3_close(&l3db);
+}
+/* ------------------------------------------------------------------------- */
+/* A file has to be closed before HDF5 opens it for write. */
+static int s2p_releaseHandle(char *filename)
+{
+	char rpath[L3C_MAX_FILE];
+	int n = 0, r = 0;
+
+	if ((filename[0] != '\0') && !s2p_realPath(filename, rpath))
+	{
+		strncpy(rpath, filename, L3C_MAX_FILE - 1);
+		rpath[L3C_MAX_FILE - 1] = '\0';
+	}
+	while (n < s2p_hdlcount)
+	{
+		if (!s2p_hdlcache[n].users
+			&& ((filename[0] == '\0') || !strcmp(s2p_hdlcache[n].filename, rpath)))
+		{
+			s2p_dropHandle(n);
+			r++;
+		}
+		else
+		{
+			n++;
+		}
+	}
+	return r;
+}
+/* ------------------------------------------------------------------------- */
+/* open the top file of a loads/dumps as a memory file, each memory file has
+   its own name as HDF5 would share two open files with the same name */
+static L3_Cursor_t *s2p_openImage(s2p_ctx_t *context)
+{
+	static long s2p_imagecount = 0;
+	char name[64];
+	long l3flag = L3F_DEFAULT;
+	L3_Cursor_t *l3db = NULL;
+	Py_buffer view;
+
+	if (S2P_HASFLAG(S2P_FDEBUG)) { l3flag |= L3F_DEBUG; }
+	sprintf(name, "CHLone-image-%ld", ++s2p_imagecount);
+	if (!PyObject_CheckBuffer(context->img_obj))
+	{
+		return L3_openImage(name, NULL, 0, l3flag);
+	}
+	if (PyObject_GetBuffer(context->img_obj, &view, PyBUF_SIMPLE) == -1)
+	{
+		PyErr_Clear();
+		return NULL;
+	}
+	/* the image is copied by HDF5, the buffer can be released */
+	l3db = L3_openImage(name, view.buf, (size_t)view.len, l3flag);
+	PyBuffer_Release(&view);
+
+	return l3db;
+}
+/* ------------------------------------------------------------------------- */
+static PyObject *s2p_getImage(L3_Cursor_t *l3db, s2p_ctx_t *context)
+{
+	void *image = NULL;
+	size_t size;
+	PyObject *bytes;
+
+	size = L3_getImage(l3db, &image);
+	if (!size)
+	{
+		setError(S2P_EFAILNEWOPEN, "Cannot get memory file image [%s]",
+			"dumps", context);
+		return NULL;
+	}
+	bytes = PyBytes_FromStringAndSize((char*)image, (Py_ssize_t)size);
+	free(image);
+
+	return bytes;
+}
+/* ------------------------------------------------------------------------- */
+/* read type conversions are set for each file, the linked-to files as well */
+static void s2p_setReadTypes(L3_Cursor_t *l3db, s2p_ctx_t *context)
+{
+	Py_ssize_t n;
+	PyObject *pair;
+
+	if (context->rdt_obj == NULL)
+	{
+		return;
+	}
+	for (n = 0; n < PyTuple_Size(context->rdt_obj); n++)
+	{
+		pair = PyTuple_GetItem(context->rdt_obj, n);
+		L3_setReadType(l3db,
+			L3_typeAsEnum(PyBytes_AsString(PyTuple_GetItem(pair, 0))),
+			L3_typeAsEnum(PyBytes_AsString(PyTuple_GetItem(pair, 1))));
+	}
+}
+/* ------------------------------------------------------------------------- */
+/* keeps the first node with a failed conversion, the error is raised at the
+   end of the parse. The cursor error is cleared, the next L3 calls would
+   fail on it and return NULL nodes. */
+static void s2p_checkReadType(L3_Cursor_t *l3db, char *path,
+	s2p_ctx_t *context)
+{
+	if (l3db->last_error != 3029)
+	{
+		return;
+	}
+	if (context->rdt_err == NULL)
+	{
+		context->rdt_err = (char*)malloc(strlen(path) + 1);
+		if (context->rdt_err != NULL)
+		{
+			strcpy(context->rdt_err, path);
+		}
+	}
+	L3M_ECLEAR(l3db);
+}
+/* ------------------------------------------------------------------------- */
+/* Profile: the current phase is switched at each step of the parse, the
+   elapsed time is added to the previous phase. The node time is the time
+   of its own steps, without the time of its children. */
+static double s2p_clock(void)
+{
+#ifndef CHLONE_ON_WINDOWS
+	struct timespec ts;
+
+	clock_gettime(CLOCK_MONOTONIC, &ts);
+	return (double)ts.tv_sec + (double)ts.tv_nsec*1e-9;
+#else
+	return (double)clock() / CLOCKS_PER_SEC;
+#endif
+}
+/* ------------------------------------------------------------------------- */
+static int s2p_setPhase(s2p_ctx_t *context, int phase)
+{
+	s2p_prf_t *prf = context->prf;
+	double now;
+	int previous;
+
+	now = s2p_clock();
+	previous = prf->phase;
+	if (previous != S2P_PNONE)
+	{
+		prf->time[previous] += now - prf->start;
+	}
+	prf->phase = phase;
+	prf->start = now;
+
+	return previous;
+}
+/* ------------------------------------------------------------------------- */
+static void s2p_newProfile(int top, s2p_ctx_t *context)
+{
+	s2p_prf_t *prf;
+	int n;
+
+	if (top <= 0)
+	{
+		return;
+	}
+	prf = (s2p_prf_t*)malloc(sizeof(s2p_prf_t));
+	prf->phase = S2P_PNONE;
+	for (n = 0; n < S2P_PMAX; n++)
+	{
+		prf->time[n] = 0.0;
+	}
+	prf->bytes = 0;
+	prf->nodes = 0;
+	prf->files = 0;
+	prf->cached = 0;
+	L3M_CLEARSTATS(prf->stats);
+	prf->top = (s2p_prn_t*)malloc(sizeof(s2p_prn_t)*top);
+	prf->top_max = top;
+	prf->top_cur = 0;
+	prf->begin = prf->start = s2p_clock();
+	context->prf = prf;
+}
+/* ------------------------------------------------------------------------- */
+static void s2p_freeProfile(s2p_ctx_t *context)
+{
+	if (context->prf != NULL)
+	{
+		free(context->prf->top);
+		free(context->prf);
+		context->prf = NULL;
+	}
+}
+/* ------------------------------------------------------------------------- */
+/* the node path is the parent path and the node name, it is only built if
+   the node is one of the slowest */
+static void s2p_profileNode(s2p_ctx_t *context, char *parent, char *name,
+	double time, long bytes)
+{
+	s2p_prf_t *prf = context->prf;
+	int n;
+
+	prf->nodes++;
+	prf->bytes += bytes;
+	if ((prf->top_cur == prf->top_max)
+		&& (time <= prf->top[prf->top_cur - 1].time))
+	{
+		return;
+	}
+	if (prf->top_cur < prf->top_max)
+	{
+		prf->top_cur++;
+	}
+	n = prf->top_cur - 1;
+	while ((n > 0) && (prf->top[n - 1].time < time))
+	{
+		prf->top[n] = prf->top[n - 1];
+		n--;
+	}
+	snprintf(prf->top[n].path, L3C_MAX_PATH, "%s/%s", parent, name);
+	prf->top[n].time = time;
+	prf->top[n].bytes = bytes;
+}
+/* ------------------------------------------------------------------------- */
+static void s2p_profileFile(s2p_ent_t *dbs, s2p_ctx_t *context)
+{
+	s2p_prf_t *prf = context->prf;
+
+	prf->files++;
+	if (dbs->cached)
+	{
+		prf->cached++;
+	}
+	prf->stats.groups += dbs->l3db->stats.groups;
+	prf->stats.datasets += dbs->l3db->stats.datasets;
+	prf->stats.attributes += dbs->l3db->stats.attributes;
+}
+/* ------------------------------------------------------------------------- */
+static void s2p_setReportItem(PyObject *dict, char *key, PyObject *value)
+{
+	PyDict_SetItemString(dict, key, value);
+	Py_DECREF(value);
+}
+/* ------------------------------------------------------------------------- */
+/* fills the report dict, should be called once the files are closed */
+static void s2p_getProfile(PyObject *report, s2p_ctx_t *context)
+{
+	static char *phases[S2P_PMAX] =
+	{ "open", "meta", "links", "data", "python", "close" };
+	s2p_prf_t *prf = context->prf;
+	PyObject *times, *objects, *slowest;
+	int n;
+
+	if ((prf == NULL) || !PyDict_Check(report))
+	{
+		return;
+	}
+	S2P_PHASE(S2P_PNONE);
+	times = PyDict_New();
+	for (n = 0; n < S2P_PMAX; n++)
+	{
+		s2p_setReportItem(times, phases[n], PyFloat_FromDouble(prf->time[n]));
+	}
+	s2p_setReportItem(times, "total", PyFloat_FromDouble(s2p_clock() - prf->begin));
+	objects = PyDict_New();
+	s2p_setReportItem(objects, "groups", PyLong_FromLong(prf->stats.groups));
+	s2p_setReportItem(objects, "datasets", PyLong_FromLong(prf->stats.datasets));
+	s2p_setReportItem(objects, "attributes",
+		PyLong_FromLong(prf->stats.attributes));
+	slowest = PyList_New(prf->top_cur);
+	for (n = 0; n < prf->top_cur; n++)
+	{
+		PyList_SetItem(slowest, n, Py_BuildValue("(sdl)", prf->top[n].path,
+			prf->top[n].time, prf->top[n].bytes));
+	}
+	s2p_setReportItem(report, "time", times);
+	s2p_setReportItem(report, "objects", objects);
+	s2p_setReportItem(report, "slowest", slowest);
+	s2p_setReportItem(report, "bytes", PyLong_FromLong(prf->bytes));
+	s2p_setReportItem(report, "nodes", PyLong_FromLong(prf->nodes));
+	s2p_setReportItem(report, "files", PyLong_FromLong(prf->files));
+	s2p_setReportItem(report, "cached", PyLong_FromLong(prf->cached));
+}
+/* ------------------------------------------------------------------------- */
 static L3_Cursor_t *s2p_addoneHDF(char* dirname, char *filename,
 	s2p_ctx_t *context, int excpt)
 {
@@ -373,6 +878,7 @@ static L3_Cursor_t *s2p_addoneHDF(char* dirname, char *filename,
 		nextdbs->filename = NULL;
 		nextdbs->dirname = NULL;
 		nextdbs->l3db = NULL;
+		nextdbs->cached = 0;
 		nextdbs->next = NULL;
 		context->hdf_dbs = nextdbs;
 	}
@@ -403,12 +909,13 @@ static L3_Cursor_t *s2p_addoneHDF(char* dirname, char *filename,
 			nextdbs->filename = NULL;
 			nextdbs->dirname = NULL;
 			nextdbs->l3db = NULL;
+			nextdbs->cached = 0;
 			nextdbs->next = NULL;
 		}
 	}
 	if (newentry)
 	{
-		if (S2P_HASFLAG(S2P_FUPDATE))
+		if (S2P_HASFLAG(S2P_FUPDATE) && (context->img_obj == NULL))
 		{
 			sbuff = (struct stat*)malloc(sizeof(struct stat));
 			if (stat(fullpath, sbuff) == -1)
@@ -445,14 +952,47 @@ static L3_Cursor_t *s2p_addoneHDF(char* dirname, char *filename,
 				return NULL;
 			}
 		}
-		if (!S2P_HASFLAG(S2P_FUPDATE) && !S2P_HASFLAG(S2P_FNEW))
+		if ((context->img_obj != NULL) && (context->hdf_idx == -1))
 		{
+			l3dbptr = s2p_openImage(context);
+			S2P_TRACE(("# CHL:open '%s' MEMORY\n", fullpath));
+			if (!L3M_ECHECK(l3dbptr))
+			{
+				if (excpt)
+				{
+					setError(S2P_EFAILNEWOPEN, "Cannot open memory file [%s]",
+						fullpath, context);
+				}
+				free(fullpath);
+				return NULL;
+			}
+		}
+		else if (!S2P_HASFLAG(S2P_FUPDATE) && !S2P_HASFLAG(S2P_FNEW)
+			&& S2P_HASFLAG(S2P_FSWMR))
+		{
+			/* a cached handle keeps the file open without SWMR access */
+			s2p_releaseHandle(fullpath);
 			ENTER_NOGIL_BLOCK(1);
 			if (S2P_HASFLAG(S2P_FDEBUG)) { l3flag |= L3F_DEBUG; }
-			l3dbptr = L3_openFile(fullpath, L3E_OPEN_RDO, l3flag);
-			S2P_TRACE(("# CHL:open '%s' READ ONLY\n", fullpath));
+			l3dbptr = L3_openFile(fullpath, L3E_OPEN_SWMR, l3flag);
+			S2P_TRACE(("# CHL:open '%s' READ ONLY SWMR\n", fullpath));
 			LEAVE_NOGIL_BLOCK();
 			if (!L3M_ECHECK(l3dbptr))
+			{
+				if (excpt)
+				{
+					setError(S2P_EFAILOLDOPEN, "Cannot read file as SWMR reader [%s]",
+						fullpath, context);
+				}
+				free(fullpath);
+				return NULL;
+			}
+		}
+		else if (!S2P_HASFLAG(S2P_FUPDATE) && !S2P_HASFLAG(S2P_FNEW))
+		{
+			l3dbptr = s2p_getHandle(fullpath, &(nextdbs->cached), context);
+			S2P_TRACE(("# CHL:open '%s' READ ONLY\n", fullpath));
+			if (!L3M_ECHECK(l3dbptr))
 			{
 				if (excpt)
 				{
@@ -465,6 +1005,7 @@ static L3_Cursor_t *s2p_addoneHDF(char* dirname, char *filename,
 		}
 		else if (!S2P_HASFLAG(S2P_FNEW))
 		{
+			s2p_releaseHandle(fullpath);
 			ENTER_NOGIL_BLOCK(1);
 			if (S2P_HASFLAG(S2P_FDEBUG)) { l3flag |= L3F_DEBUG; }
 			l3dbptr = L3_openFile(fullpath, L3E_OPEN_OLD, l3flag);
@@ -483,6 +1024,7 @@ static L3_Cursor_t *s2p_addoneHDF(char* dirname, char *filename,
 		}
 		else
 		{
+			s2p_releaseHandle(fullpath);
 			ENTER_NOGIL_BLOCK(1);
 			if (S2P_HASFLAG(S2P_FDEBUG)) { l3flag |= L3F_DEBUG; }
 			l3dbptr = L3_openFile(fullpath, L3E_OPEN_NEW, l3flag);
@@ -499,6 +1041,8 @@ static L3_Cursor_t *s2p_addoneHDF(char* dirname, char *filename,
 				return NULL;
 			}
 		}
+		s2p_setReadTypes(l3dbptr, context);
+		L3M_CLEARSTATS(l3dbptr->stats);
 		nextdbs->filename = (char*)malloc(sizeof(char)*(szf + 1));
 		strcpy(nextdbs->filename, filename);
 		nextdbs->dirname = (char*)malloc(sizeof(char)*(szd + 1));
@@ -532,7 +1076,17 @@ static void s2p_closeallHDF(s2p_ctx_t *context)
 	dbs = context->hdf_dbs;
 	while (dbs != NULL)
 	{
-		if (dbs->l3db != NULL)
+		if ((context->prf != NULL) && (dbs->l3db != NULL))
+		{
+			s2p_profileFile(dbs, context);
+		}
+		s2p_releaseRoot(dbs->l3db);
+		if ((dbs->l3db != NULL) && dbs->cached)
+		{
+			S2P_TRACE(("# CHL:release one\n"));
+			s2p_putHandle(dbs->l3db);
+		}
+		else if (dbs->l3db != NULL)
 		{
 			S2P_TRACE(("# CHL:close one\n"));
 			L3_close(&(dbs->l3db));
@@ -551,36 +1105,137 @@ static void s2p_closeallHDF(s2p_ctx_t *context)
 	context->hdf_dbs = NULL;
 }
 /* ------------------------------------------------------------------------- */
-static s2p_ctx_t *s2p_filllinktable(PyObject *linktable, s2p_ctx_t *context)
+/* Node path index: open addressing hash table of node path strings, linear
+   probing, the table size is a power of 2 and the table is grown when it is
+   half full. Keys are copied, values are borrowed and must not be NULL.    */
+static size_t s2p_indexhash(char *key)
 {
-	//int linktablesize = 0, n = 0;
-	Py_ssize_t linktablesize = 0, n = 0, sz = 0;
-	char *st = NULL;
-	s2p_lnk_t *nextlink = NULL, *previouslink = NULL;
-	PyObject  *lke = NULL;
-	PyObject * ascii_string = NULL;
+	size_t h = (size_t)0xCBF29CE484222325ULL;
 
-	S2P_TRACE(("# CHL:fill link table\n"));
+	while (*key != '\0')
+	{
+		h ^= (size_t)(unsigned char)(*key++);
+		h *= (size_t)0x100000001B3ULL;
+	}
+	return h;
+}
+/* ------------------------------------------------------------------------- */
+static int s2p_indexslot(char **keys, int max, char *key)
+{
+	size_t mask, n;
 
-	if ((linktable == NULL) || (!PyList_Check(linktable))) { return NULL; }
-	linktablesize = PyList_Size(linktable);
-	if (!linktablesize) { return NULL; }
-	nextlink = context->lnk;
-	previouslink = NULL;
-	if (nextlink != NULL)
+	mask = (size_t)(max - 1);
+	n = s2p_indexhash(key) & mask;
+	while ((keys[n] != NULL) && strcmp(keys[n], key))
+	{
+		n = (n + 1) & mask;
+	}
+	return (int)n;
+}
+/* ------------------------------------------------------------------------- */
+static int s2p_growIndex(s2p_idx_t *idx)
+{
+	char **oldkeys;
+	void **oldvals;
+	int n, m, oldmax;
+
+	oldkeys = idx->key;
+	oldvals = idx->val;
+	oldmax = idx->max;
+	if (oldmax == 0) { idx->max = __MAXOBJTABLE; }
+	else { idx->max = 2 * oldmax; }
+	idx->key = (char**)calloc(idx->max, sizeof(char*));
+	idx->val = (void**)calloc(idx->max, sizeof(void*));
+	if ((idx->key == NULL) || (idx->val == NULL))
+	{
+		if (idx->key != NULL) { free(idx->key); }
+		if (idx->val != NULL) { free(idx->val); }
+		idx->key = oldkeys;
+		idx->val = oldvals;
+		idx->max = oldmax;
+		return 0;
+	}
+	for (n = 0; n < oldmax; n++)
 	{
-		while (nextlink->next != NULL)
+		if (oldkeys[n] != NULL)
 		{
-			previouslink = nextlink;
-			nextlink = nextlink->next;
+			m = s2p_indexslot(idx->key, idx->max, oldkeys[n]);
+			idx->key[m] = oldkeys[n];
+			idx->val[m] = oldvals[n];
 		}
 	}
-	for (n = 0; n < linktablesize; n++)
-	{
-		lke = PyList_GetItem(linktable, n);
+	if (oldkeys != NULL) { free(oldkeys); }
+	if (oldvals != NULL) { free(oldvals); }
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
+/* first value wins, a path already in the index keeps its value */
+static int s2p_indexAdd(s2p_idx_t *idx, char *key, void *val)
+{
+	int n;
 
-		if (PyList_Check(lke)
-			&& (PyList_Size(lke) >= 4)
+	if ((2 * (idx->cur + 1) > idx->max) && !s2p_growIndex(idx))
+	{
+		return 0;
+	}
+	n = s2p_indexslot(idx->key, idx->max, key);
+	if (idx->key[n] != NULL)
+	{
+		return 0;
+	}
+	idx->key[n] = (char*)malloc(sizeof(char)*(strlen(key) + 1));
+	strcpy(idx->key[n], key);
+	idx->val[n] = val;
+	idx->cur++;
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
+static void *s2p_indexGet(s2p_idx_t *idx, char *key)
+{
+	int n;
+
+	if (idx->cur == 0)
+	{
+		return NULL;
+	}
+	n = s2p_indexslot(idx->key, idx->max, key);
+	return (idx->key[n] != NULL) ? idx->val[n] : NULL;
+}
+/* ------------------------------------------------------------------------- */
+static void s2p_freeIndex(s2p_idx_t *idx)
+{
+	int n;
+
+	for (n = 0; n < idx->max; n++)
+	{
+		if (idx->key[n] != NULL) { free(idx->key[n]); }
+	}
+	if (idx->key != NULL) { free(idx->key); }
+	if (idx->val != NULL) { free(idx->val); }
+	S2P_CLEARINDEX((*idx));
+}
+/* ------------------------------------------------------------------------- */
+static s2p_ctx_t *s2p_filllinktable(PyObject *linktable, s2p_ctx_t *context)
+{
+	//int linktablesize = 0, n = 0;
+	Py_ssize_t linktablesize = 0, n = 0, sz = 0;
+	char *st = NULL;
+	s2p_lnk_t *nextlink = NULL, *previouslink = NULL;
+	PyObject  *lke = NULL;
+	PyObject * ascii_string = NULL;
+
+	S2P_TRACE(("# CHL:fill link table\n"));
+
+	if ((linktable == NULL) || (!PyList_Check(linktable))) { return NULL; }
+	linktablesize = PyList_Size(linktable);
+	if (!linktablesize) { return NULL; }
+	previouslink = context->lnk_end;
+	for (n = 0; n < linktablesize; n++)
+	{
+		lke = PyList_GetItem(linktable, n);
+
+		if (PyList_Check(lke)
+			&& (PyList_Size(lke) >= 4)
 			&& ((PyBytes_Check(PySequence_GetItem(lke, 0)))
 				|| (PyUnicode_Check(PySequence_GetItem(lke, 0)))
 				|| (PySequence_GetItem(lke, 0) == Py_None))
@@ -603,6 +1258,7 @@ static s2p_ctx_t *s2p_filllinktable(PyObject *linktable, s2p_ctx_t *context)
 			}
 			nextlink->next = NULL;
 			previouslink = nextlink;
+			context->lnk_end = nextlink;
 
 			if (PySequence_GetItem(lke, 0) != Py_None)
 			{
@@ -640,6 +1296,7 @@ static s2p_ctx_t *s2p_filllinktable(PyObject *linktable, s2p_ctx_t *context)
 			strcpy(nextlink->src_nodename, st);
 			if (ascii_string != NULL) { Py_DECREF(ascii_string); }
 			nextlink->status = S2P_LKFAIL;
+			s2p_indexAdd(&(context->lnk_idx), nextlink->src_nodename, nextlink);
 
 			S2P_TRACE(("# CHL:link data [%s]->[%s][%s][%s]\n", \
 				nextlink->src_nodename, \
@@ -654,6 +1311,7 @@ static s2p_ctx_t *s2p_filllinktable(PyObject *linktable, s2p_ctx_t *context)
 static void s2p_freelinktable(s2p_ctx_t *context)
 {
 	s2p_lnk_t *nextlink = NULL, *links = NULL;
+	s2p_freeIndex(&(context->lnk_idx));
 	return;
 	links = context->lnk;
 	if (links != NULL)
@@ -672,6 +1330,7 @@ static void s2p_freelinktable(s2p_ctx_t *context)
 		}
 	}
 	context->lnk = NULL;
+	context->lnk_end = NULL;
 }
 /* ------------------------------------------------------------------------- */
 static int s2p_atleastonelink(s2p_ctx_t *context)
@@ -689,16 +1348,7 @@ static int s2p_atleastonelink(s2p_ctx_t *context)
 /* ------------------------------------------------------------------------- */
 static s2p_lnk_t *s2p_checklinktable(s2p_ctx_t *context, char *nodename)
 {
-	s2p_lnk_t *link = NULL;
-	int n = 0;
-
-	link = context->lnk;
-	while (link != NULL)
-	{
-		if (!strcmp(link->src_nodename, nodename)) { return link; }
-		link = link->next;
-	}
-	return (s2p_lnk_t *)NULL;
+	return (s2p_lnk_t *)s2p_indexGet(&(context->lnk_idx), nodename);
 }
 /* ------------------------------------------------------------------------- */
 static PyObject *s2p_getlinktable(s2p_ctx_t *context)
@@ -743,13 +1393,9 @@ static void s2p_linkstack(char       *curdir,
 	s2p_lnk_t *nextlink = NULL, *curlink = NULL;
 	int sz = 0;
 
-	nextlink = context->lnk;
+	nextlink = context->lnk_end;
 	if (nextlink != NULL)
 	{
-		while (nextlink->next != NULL)
-		{
-			nextlink = nextlink->next;
-		}
 		nextlink->next = (s2p_lnk_t*)malloc(sizeof(s2p_lnk_t));
 		curlink = nextlink->next;
 		curlink->next = NULL;
@@ -769,6 +1415,8 @@ static void s2p_linkstack(char       *curdir,
 
 	curlink->dst_object = (PyObject*)NULL;
 	curlink->status = status;
+	context->lnk_end = curlink;
+	s2p_indexAdd(&(context->lnk_idx), curlink->src_nodename, curlink);
 	S2P_TRACE(("# CHL:link stack [%s][%s][%s]->[%s][%s][%s]\n",
 		curdir, curfile, curnode, destdir, destfile, destnode));
 
@@ -783,7 +1431,6 @@ static void s2p_createlinkoffparse(L3_Cursor_t *l3db,
 	hid_t lkid = -1, parentid = -1;
 	char leafnodename[33], *parentnodename, *p;
 	int i, islocal, skiponerror;
-	s2p_lnk_t *plink = NULL;
 
 	parentnodename = (char*)malloc(strlen(link->src_nodename) + 1);
 	strcpy(parentnodename, link->src_nodename);
@@ -805,20 +1452,7 @@ static void s2p_createlinkoffparse(L3_Cursor_t *l3db,
 	   Such a check is useless if the node is in the CGNS/Python tree,
 	   as this node would be actually created.
 	*/
-	islocal = 1;
-	plink = context->lnk;
-	i = strlen(parentnodename);
-	while (plink != NULL)
-	{
-		if (strcmp(plink->src_nodename, link->src_nodename)
-			&& !strncmp(plink->src_nodename, parentnodename, i)
-			&& (i == strlen(plink->src_nodename)))
-		{
-			islocal = 0;
-			break;
-		}
-		plink = plink->next;
-	}
+	islocal = (s2p_checklinktable(context, parentnodename) == NULL);
 	if (islocal && H5Iis_valid(parentid))
 	{
 		if (L3M_HASFLAG(l3db, L3F_SKIPONERROR)) { skiponerror = 1; }
@@ -1005,6 +1639,7 @@ static void s2p_freepathtable(s2p_ctx_t *context)
 		}
 	}
 	context->pth = NULL;
+	context->pth_end = NULL;
 }
 /* ------------------------------------------------------------------------- */
 static void s2p_pathstack(char *path, int state, int dtype, int *dims,
@@ -1014,13 +1649,9 @@ static void s2p_pathstack(char *path, int state, int dtype, int *dims,
 	int n;
 	size_t sz = 0;
 
-	nextpath = context->pth;
+	nextpath = context->pth_end;
 	if (nextpath != NULL)
 	{
-		while (nextpath->next != NULL)
-		{
-			nextpath = nextpath->next;
-		}
 		nextpath->next = (s2p_pth_t*)malloc(sizeof(s2p_pth_t));
 		curpath = nextpath->next;
 	}
@@ -1036,6 +1667,7 @@ static void s2p_pathstack(char *path, int state, int dtype, int *dims,
 	for (n = 0; n < L3C_MAX_DIMS; n++) { curpath->dims[n] = dims[n]; }
 	curpath->next = NULL;
 	strcpy(curpath->path, path);
+	context->pth_end = curpath;
 }
 /* ------------------------------------------------------------------------- */
 static PyObject *s2p_getpathtable(s2p_ctx_t *context)
@@ -1092,13 +1724,13 @@ static PyObject* s2p_getUpdateObjectByPath(PyObject* updict, char *path)
 	return NULL;
 }
 /* ------------------------------------------------------------------------- */
-static int s2p_pathToSkip(s2p_ctx_t *context, char *path)
+/* the skip list is indexed once, the per node check is a single lookup */
+static void s2p_fillskiptable(s2p_ctx_t *context)
 {
 	Py_ssize_t sz, n;
-	PyObject *opth;
+	PyObject *opth, *ascii;
 
-	if (context->skp_pth == NULL) { return S2P_HASFLAG(S2P_FKEEPLIST) ? 1 : 0; }
-	if (!PyList_Check(context->skp_pth)) { return S2P_HASFLAG(S2P_FKEEPLIST) ? 1 : 0; }
+	if ((context->skp_pth == NULL) || !PyList_Check(context->skp_pth)) { return; }
 
 	sz = PyList_Size(context->skp_pth);
 
@@ -1107,15 +1739,29 @@ static int s2p_pathToSkip(s2p_ctx_t *context, char *path)
 		opth = PyList_GetItem(context->skp_pth, n);
 		if (PyUnicode_Check(opth))
 		{
-			PyObject *ascii = PyUnicode_AsASCIIString(opth);
-			if (s2p_issubpath(PyBytes_AsString(ascii), path, 1))
+			ascii = PyUnicode_AsASCIIString(opth);
+			if (ascii == NULL)
 			{
-				Py_DECREF(ascii);
-				return S2P_HASFLAG(S2P_FKEEPLIST) ? 0 : 1;
+				PyErr_Clear();
+				continue;
 			}
+			s2p_indexAdd(&(context->skp_idx), PyBytes_AsString(ascii), opth);
 			Py_DECREF(ascii);
 		}
 	}
+}
+/* ------------------------------------------------------------------------- */
+static void s2p_freeskiptable(s2p_ctx_t *context)
+{
+	s2p_freeIndex(&(context->skp_idx));
+}
+/* ------------------------------------------------------------------------- */
+static int s2p_pathToSkip(s2p_ctx_t *context, char *path)
+{
+	if (s2p_indexGet(&(context->skp_idx), path) != NULL)
+	{
+		return S2P_HASFLAG(S2P_FKEEPLIST) ? 0 : 1;
+	}
 	return S2P_HASFLAG(S2P_FKEEPLIST) ? 1 : 0;
 }
 
@@ -1152,6 +1798,16 @@ static int s2p_filterDataContiguous(s2p_ctx_t *context, char *path,
 	return 0;
 }
 
+/* ------------------------------------------------------------------------- */
+static int s2p_filterIsPartial(s2p_ctx_t *context, char *path)
+{
+	PyObject *obj;
+
+	if (context->flt_dct == NULL) { return 0; }
+	obj = PyDict_GetItemString(context->flt_dct, path);
+	return ((obj != NULL)
+		&& (PyLong_AsLong(PyTuple_GetItem(obj, 0)) == S2P_SPARTIAL));
+}
 /* ------------------------------------------------------------------------- */
 static int s2p_filterDataPartial(s2p_ctx_t *context, char *path,
 	hsize_t *src_offset,
@@ -1352,151 +2008,796 @@ static void s2p_trackRefs(s2p_ctx_t *context, PyObject *tree)
 	}
 }
 /* ------------------------------------------------------------------------- */
+/* Parsed object table for loop detection: open addressing hash set of
+   PyObject addresses, linear probing, the table size is a power of 2 and
+   the table is grown when it is half full. NULL marks an empty slot.       */
+#define S2P_POL_HASH( ptr, mask ) \
+((size_t)((((size_t)(ptr)) >> 4) * (size_t)0x9E3779B97F4A7C15ULL) & (mask))
+
 static void s2p_freenodetable(s2p_ctx_t *context)
 {
-	size_t s = sizeof(PyObject*);
-
 	if (context->pol_oid != NULL)
 	{
 		free(context->pol_oid);
 		context->pol_oid = NULL;
 	}
+	context->pol_max = 0;
+	context->pol_cur = 0;
 }
 /* ------------------------------------------------------------------------- */
-static int s2p_nodeAlreadyParsedCheck(PyObject *node, s2p_ctx_t *context)
+static int s2p_nodetableslot(PyObject **table, int max, PyObject *node)
 {
-	int n;
+	size_t mask, n;
 
-	if (context->pol_cur == 0)
+	mask = (size_t)(max - 1);
+	n = S2P_POL_HASH(node, mask);
+	while ((table[n] != NULL) && (table[n] != node))
+	{
+		n = (n + 1) & mask;
+	}
+	return (int)n;
+}
+/* ------------------------------------------------------------------------- */
+static int s2p_growNodeTable(s2p_ctx_t *context)
+{
+	PyObject **oldtable;
+	int n, oldmax;
+
+	oldtable = context->pol_oid;
+	oldmax = context->pol_max;
+	if (oldmax == 0) { context->pol_max = __MAXOBJTABLE; }
+	else { context->pol_max = 2 * oldmax; }
+	context->pol_oid = (PyObject**)calloc(context->pol_max, sizeof(PyObject*));
+	if (context->pol_oid == NULL)
 	{
+		context->pol_oid = oldtable;
+		context->pol_max = oldmax;
 		return 0;
 	}
-	for (n = 0; n < context->pol_cur; n++)
+	for (n = 0; n < oldmax; n++)
 	{
-		if (context->pol_oid[n] == node)
+		if (oldtable[n] != NULL)
 		{
-			return 1;
+			context->pol_oid[s2p_nodetableslot(context->pol_oid,
+				context->pol_max, oldtable[n])] = oldtable[n];
 		}
 	}
-	return 0;
+	if (oldtable != NULL) { free(oldtable); }
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
+static int s2p_nodeAlreadyParsedCheck(PyObject *node, s2p_ctx_t *context)
+{
+	int n;
+
+	if (context->pol_cur == 0)
+	{
+		return 0;
+	}
+	n = s2p_nodetableslot(context->pol_oid, context->pol_max, node);
+	return (context->pol_oid[n] == node);
 
 }/* ------------------------------------------------------------------------- */
+/* returns 1 if the node is added, 0 if it was already parsed, -1 with the
+   CHLoneException set if the table cannot grow */
 static int s2p_nodeNotAlreadyParsed(PyObject *node, s2p_ctx_t *context)
 {
 	int n;
-	size_t s = sizeof(PyObject*);
 
-	if (context->pol_cur == 0)
+	if ((2 * (context->pol_cur + 1) > context->pol_max)
+		&& !s2p_growNodeTable(context))
 	{
-		context->pol_max = __MAXOBJTABLE;
-		context->pol_oid = (PyObject**)malloc(s*context->pol_max);
+		setError(S2P_EFAILALLOC,
+			"Cannot allocate the parsed node table (%s)",
+			"out of memory", context);
+		return -1;
 	}
-	else
+	n = s2p_nodetableslot(context->pol_oid, context->pol_max, node);
+	if (context->pol_oid[n] == node)
+	{
+		return 0;
+	}
+	context->pol_oid[n] = node;
+	context->pol_cur++;
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
+/* Deferred data read: the parse allocates the data memory and pushes the raw
+   file block to read in the queue, once the parse is done the queue is read
+   by a pool of threads without HDF5 calls and without the GIL. */
+static void s2p_freereadqueue(s2p_ctx_t *context)
+{
+	int n;
+
+	for (n = 0; n < context->rdq_npt; n++)
+	{
+		free(context->rdq_pth[n]);
+	}
+	for (n = 0; n < context->rdq_fnc; n++)
+	{
+		free(context->rdq_fnm[n]);
+	}
+	if (context->rdq != NULL) { free(context->rdq); }
+	if (context->rdq_fnm != NULL) { free(context->rdq_fnm); }
+	if (context->rdq_pth != NULL) { free(context->rdq_pth); }
+	context->rdq = NULL;
+	context->rdq_fnm = NULL;
+	context->rdq_pth = NULL;
+	context->rdq_max = 0;
+	context->rdq_cur = 0;
+	context->rdq_fnc = 0;
+	context->rdq_npt = 0;
+}
+/* ------------------------------------------------------------------------- */
+static void *s2p_deferData(s2p_ctx_t *context, char *filename, char *path,
+	L3_Block_t *blocks, int count)
+{
+	s2p_rdq_t *entry, *rdq;
+	char *fname = NULL, *pname, **table;
+	void *base;
+	hsize_t size = 0;
+	int n, rdq_max;
+
+	/* any allocation failure returns NULL, the caller then reads the data
+	   in place, the queue is left unchanged or only grown */
+	for (n = context->rdq_fnc - 1; n >= 0; n--)
 	{
-		for (n = 0; n < context->pol_cur; n++)
+		if (!strcmp(context->rdq_fnm[n], filename))
 		{
-			if (context->pol_oid[n] == node)
-			{
-				return 0;
-			}
+			fname = context->rdq_fnm[n];
+			break;
+		}
+	}
+	if (fname == NULL)
+	{
+		table = (char**)realloc(context->rdq_fnm,
+			sizeof(char*)*(context->rdq_fnc + 1));
+		if (table == NULL)
+		{
+			return NULL;
 		}
-		if (context->pol_cur == context->pol_max)
+		context->rdq_fnm = table;
+		fname = (char*)malloc(sizeof(char)*(strlen(filename) + 1));
+		if (fname == NULL)
 		{
-			context->pol_max += __MAXOBJTABLE;
-			context->pol_oid = (PyObject**)realloc(context->pol_oid, s*context->pol_max);
+			return NULL;
 		}
+		strcpy(fname, filename);
+		context->rdq_fnm[context->rdq_fnc++] = fname;
 	}
-	context->pol_oid[context->pol_cur++] = node;
-	return 1;
+	if ((context->rdq_npt % __MAXOBJTABLE) == 0)
+	{
+		table = (char**)realloc(context->rdq_pth,
+			sizeof(char*)*(context->rdq_npt + __MAXOBJTABLE));
+		if (table == NULL)
+		{
+			return NULL;
+		}
+		context->rdq_pth = table;
+	}
+	rdq_max = context->rdq_max;
+	while (context->rdq_cur + count > rdq_max)
+	{
+		rdq_max = (rdq_max == 0) ? __MAXOBJTABLE : 2 * rdq_max;
+	}
+	if (rdq_max != context->rdq_max)
+	{
+		rdq = (s2p_rdq_t*)realloc(context->rdq, sizeof(s2p_rdq_t)*rdq_max);
+		if (rdq == NULL)
+		{
+			return NULL;
+		}
+		context->rdq = rdq;
+		context->rdq_max = rdq_max;
+	}
+	pname = (char*)malloc(sizeof(char)*(strlen(path) + 1));
+	if (pname == NULL)
+	{
+		return NULL;
+	}
+	for (n = 0; n < count; n++)
+	{
+		if (blocks[n].start + blocks[n].count > size)
+		{
+			size = blocks[n].start + blocks[n].count;
+		}
+	}
+	base = malloc(size);
+	if (base == NULL)
+	{
+		free(pname);
+		return NULL;
+	}
+	strcpy(pname, path);
+	context->rdq_pth[context->rdq_npt] = pname;
+	for (n = 0; n < count; n++)
+	{
+		entry = &(context->rdq[context->rdq_cur++]);
+		entry->filename = fname;
+		entry->node = context->rdq_npt;
+		entry->base = base;
+		entry->block = blocks[n];
+		entry->status = 0;
+	}
+	context->rdq_npt++;
+
+	return base;
 }
 /* ------------------------------------------------------------------------- */
-static int s2p_freeContext(s2p_ctx_t **context_ptr)
+static int s2p_isMappable(L3_Cursor_t *l3db, hid_t id, char *filename,
+	haddr_t *offset)
 {
-	s2p_ctx_t *context;
-
-	context = *context_ptr;
-	s2p_closeallHDF(context);
-	s2p_freelinktable(context);
-	s2p_freepathtable(context);
-	s2p_freenodetable(context);
-	free(context->sha256);
-	free(context);
-	context_ptr = NULL;
+	L3_Block_t *blocks = NULL;
+	int count = 0, status = 0;
 
-	return 1;
+	if (L3_nodeDataBlocks(l3db, id, filename, &blocks, &count))
+	{
+		if ((count == 1) && (blocks[0].filter == L3E_FILTER_NONE)
+			&& (blocks[0].count == blocks[0].extent))
+		{
+			*offset = blocks[0].offset;
+			status = 1;
+		}
+		free(blocks);
+	}
+	return status;
 }
 /* ------------------------------------------------------------------------- */
-static void s2p_removeMissingChildren(hid_t        id,
-	PyObject    *tree,
-	s2p_ctx_t   *context,
-	L3_Cursor_t *l3db)
+/* FMEMMAP: the whole file is mapped once as a read-only numpy.memmap, the
+   node value is a numpy.memmap view at the node data offset. */
+static PyObject *s2p_mapData(s2p_ctx_t *context, char *filename,
+	haddr_t offset, int ndim, npy_intp *dims, int arraytype, int fortran)
 {
-	Py_ssize_t sz, n, child, toremove = 0;
-	L3_Node_t *node = NULL, *cnode = NULL;
-	PyObject *ctree;
-	char *tnodename;
+	PyObject *base, *numpy, *o_value;
 
-	L3M_NEWNODE(node);
-	/* SHOULD delete after parsing subnodes...
-	   Do **not** release argument id
-	*/
-	if (S2P_HASFLAG(S2P_FDELETEMISSING))
+	if (context->map_dct == NULL)
 	{
-		child = 0;
-		ctree = PyList_GetItem(tree, 2);
-		sz = PyList_Size(ctree);
-		L3M_NEWNODE(cnode);
-		__node_count++;
-		L3M_UNSETFLAG(l3db, L3F_WITHDATA);
-		L3M_SETFLAG(l3db, L3F_WITHCHILDREN);
-		node = L3_nodeRetrieve(l3db, id, node);
-		while ((node != NULL) &&
-			(node->children != NULL) &&
-			(node->children[child] != -1))
+		context->map_dct = PyDict_New();
+	}
+	base = PyDict_GetItemString(context->map_dct, filename);
+	if (base == NULL)
+	{
+		numpy = PyImport_ImportModule("numpy");
+		if (numpy == NULL)
 		{
-			L3M_UNSETFLAG(l3db, L3F_WITHDATA);
-			L3M_UNSETFLAG(l3db, L3F_WITHCHILDREN);
-			cnode = L3_nodeRetrieve(l3db, node->children[child], cnode);
-			toremove = 1;
-			for (n = 0; n < sz; n++)
-			{
-				PyObject * ascii_string = NULL;
-				ascii_string = PyUnicode_AsASCIIString(PyList_GetItem(PyList_GetItem(ctree, n), 0));
-				tnodename = PyBytes_AsString(ascii_string);
+			return NULL;
+		}
+		base = PyObject_CallMethod(numpy, "memmap", "sss", filename, "u1", "r");
+		Py_DECREF(numpy);
+		if (base == NULL)
+		{
+			return NULL;
+		}
+		PyDict_SetItemString(context->map_dct, filename, base);
+		Py_DECREF(base);
+	}
+	o_value = PyArray_NewFromDescr(Py_TYPE(base), PyArray_DescrFromType(arraytype),
+		ndim, dims, NULL,
+		(char*)PyArray_DATA((PyArrayObject*)base) + offset,
+		fortran ? NPY_ARRAY_F_CONTIGUOUS : NPY_ARRAY_C_CONTIGUOUS, NULL);
+	if (o_value == NULL)
+	{
+		return NULL;
+	}
+	Py_INCREF(base);
+	PyArray_SetBaseObject((PyArrayObject*)o_value, base);
+	PyArray_UpdateFlags((PyArrayObject*)o_value, NPY_ARRAY_UPDATE_ALL);
+	PyObject_SetAttrString(o_value, "filename",
+		PyObject_GetAttrString(base, "filename"));
+	PyObject_SetAttrString(o_value, "offset", PyLong_FromLongLong((long long)offset));
+	PyObject_SetAttrString(o_value, "mode", PyObject_GetAttrString(base, "mode"));
+
+	return o_value;
+}
+/* ------------------------------------------------------------------------- */
+static int s2p_arrayType(int dtype)
+{
+	switch (dtype)
+	{
+	case L3E_I4: case L3E_I4ptr: return NPY_INT32;
+	case L3E_C1: case L3E_C1ptr: return NPY_CHAR;
+	case L3E_R8: case L3E_R8ptr: return NPY_FLOAT64;
+	case L3E_I8: case L3E_I8ptr: return NPY_INT64;
+	case L3E_R4: case L3E_R4ptr: return NPY_FLOAT32;
+	default: return -1;
+	}
+}
+/* ------------------------------------------------------------------------- */
+/* FLAZYDATA: the node value is a proxy object returned by the lazy factory,
+   the data is read on first access using s2p_loadData. The proxy only knows
+   the actual file and HDF5 path of the node, links are already resolved. */
+static PyObject *s2p_lazyfactory = NULL;
 
+static PyObject *s2p_lazyData(s2p_ctx_t *context, hid_t id,
+	int ndim, npy_intp *dims, int arraytype)
+{
+	PyObject *shape, *descr, *o_value;
+	char filename[L3C_MAX_FILE];
+	char path[L3C_MAX_PATH];
+	int n;
 
-				if (!strcmp(tnodename, cnode->name))
-				{
-					S2P_TRACE(("# CHL:found in tree and file [%s]\n", tnodename));
-					toremove = 0;
-					if (ascii_string != NULL) { Py_DECREF(ascii_string); }
-					break;
-				}
-				if (ascii_string != NULL) { Py_DECREF(ascii_string); }
-			}
-			if (toremove)
-			{
-				S2P_TRACE(("# CHL:node child remove [%s]\n", cnode->name));
-				L3_nodeDelete(l3db, node->id, cnode->name);
-			}
-			child++;
-		}
-		L3_nodeFree(&cnode);
+	if ((s2p_lazyfactory == NULL) || (arraytype == -1)
+		|| (H5Fget_name(id, filename, L3C_MAX_FILE) <= 0)
+		|| (H5Iget_name(id, path, L3C_MAX_PATH) <= 0))
+	{
+		return NULL;
 	}
-	L3_nodeRelease(&node, L3F_R_MEM_CHILDREN | L3F_R_HID_CHILDREN | L3F_R_MEM_DATA);
+	shape = PyTuple_New(ndim);
+	for (n = 0; n < ndim; n++)
+	{
+		PyTuple_SetItem(shape, n, PyLong_FromLong((long)dims[n]));
+	}
+	descr = (PyObject*)PyArray_DescrFromType(arraytype);
+	o_value = PyObject_CallFunction(s2p_lazyfactory, "ssOOl",
+		filename, path, descr, shape, context->flg);
+	Py_DECREF(descr);
+	Py_DECREF(shape);
+
+	return o_value;
 }
 /* ------------------------------------------------------------------------- */
-/* Main read function, parses a node and recurse on its children, creates
-   the Python node structure.
-*/
-static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
-	char        *curpath,
-	char        *subpath,
-	s2p_ctx_t   *context,
-	L3_Cursor_t *l3db)
+/* numpy dims of the node data, returns the rank */
+static int s2p_nodeDims(L3_Node_t *rnode, npy_intp *npy_dim_vals,
+	s2p_ctx_t *context)
 {
-	int ndim = 0, tsize = 0, n = 0, child = 0, arraytype = -1, skip = 0, c = 0, p1 = 0, p2 = 0, soft = 0;
-	int index = -1, rank = -1, count = -1, isinterlaced = 0;
+	int n, ndim = 0;
+
+	while ((ndim < L3C_MAX_DIMS) && (rnode->dims[ndim] != -1))
+	{
+		ndim++;
+	}
+	for (n = 0; n < ndim; n++)
+	{
+		if (s2p_hasToReverseDims(rnode->name, rnode->label, context))
+		{
+			npy_dim_vals[ndim - n - 1] = rnode->dims[n];
+		}
+		else
+		{
+			npy_dim_vals[n] = rnode->dims[n];
+		}
+	}
+	return ndim;
+}
+/* ------------------------------------------------------------------------- */
+/* numpy array owning the node data, the node data ptr is reset */
+static PyObject *s2p_newArray(L3_Node_t *rnode, int arraytype,
+	s2p_ctx_t *context)
+{
+	PyObject *o_value;
+	npy_intp npy_dim_vals[NPY_MAXDIMS];
+	npy_uint32 npyflags;
+	int ndim;
+
+	ndim = s2p_nodeDims(rnode, npy_dim_vals, context);
+	npyflags = NPY_ARRAY_BEHAVED | NPY_ARRAY_OWNDATA;
+	if (S2P_HASFLAG(S2P_FFORTRANFLAG)) { npyflags |= NPY_ARRAY_F_CONTIGUOUS; }
+	else { npyflags |= NPY_ARRAY_C_CONTIGUOUS; }
+	o_value = PyArray_New(&PyArray_Type, ndim, npy_dim_vals, arraytype,
+		NULL, rnode->data, 0, npyflags, NULL);
+	rnode->data = NULL;
+	PyArray_CLEARFLAGS((PyArrayObject*)o_value, 0xFFFF);
+	PyArray_ENABLEFLAGS((PyArrayObject*)o_value, npyflags);
+
+	return o_value;
+}
+/* ------------------------------------------------------------------------- */
+static hsize_t s2p_dataSize(L3_Node_t *node)
+{
+	hsize_t size;
+	int n;
+
+	switch (node->dtype)
+	{
+	case L3E_C1: case L3E_C1ptr: size = 1; break;
+	case L3E_I4: case L3E_I4ptr: case L3E_R4: case L3E_R4ptr: size = 4; break;
+	case L3E_I8: case L3E_I8ptr: case L3E_R8: case L3E_R8ptr: size = 8; break;
+	default: return 0;
+	}
+	for (n = 0; (n < L3C_MAX_DIMS) && (node->dims[n] != -1); n++)
+	{
+		size *= node->dims[n];
+	}
+	return size;
+}
+/* ------------------------------------------------------------------------- */
+static int s2p_compareReads(const void *e1, const void *e2)
+{
+	const s2p_rdq_t *r1 = (const s2p_rdq_t*)e1;
+	const s2p_rdq_t *r2 = (const s2p_rdq_t*)e2;
+
+	if (r1->filename != r2->filename)
+	{
+		return (r1->filename < r2->filename) ? -1 : 1;
+	}
+	if (r1->block.offset != r2->block.offset)
+	{
+		return (r1->block.offset < r2->block.offset) ? -1 : 1;
+	}
+	return 0;
+}
+/* ------------------------------------------------------------------------- */
+#ifdef CHLONE_HAS_PTHREAD
+typedef struct s2p_rdw_t
+{
+	s2p_ctx_t      *context;
+	int             next;
+	pthread_mutex_t lock;
+} s2p_rdw_t;
+
+static void *s2p_readWorker(void *arg)
+{
+	s2p_rdw_t *work = (s2p_rdw_t*)arg;
+	s2p_rdq_t *entry;
+	char *fname = NULL;
+	int fd = -1, n;
+
+	while (1)
+	{
+		pthread_mutex_lock(&(work->lock));
+		n = work->next++;
+		pthread_mutex_unlock(&(work->lock));
+		if (n >= work->context->rdq_cur)
+		{
+			break;
+		}
+		entry = &(work->context->rdq[n]);
+		if (entry->filename != fname)
+		{
+			if (fd != -1) { close(fd); }
+			fname = entry->filename;
+			fd = open(fname, O_RDONLY);
+		}
+		if (fd == -1)
+		{
+			continue;
+		}
+		entry->status = L3_blockRead(fd, &(entry->block), entry->base);
+	}
+	if (fd != -1) { close(fd); }
+	return NULL;
+}
+#endif
+/* ------------------------------------------------------------------------- */
+static int s2p_readDeferred(s2p_ctx_t *context)
+{
+	int n, status = 1;
+#ifdef CHLONE_HAS_PTHREAD
+	s2p_rdw_t work;
+	pthread_t *threads;
+	int nthreads;
+
+	S2P_TRACE(("# CHL:deferred data read [%d] with [%d] threads\n",
+		context->rdq_cur, context->thr));
+	work.context = context;
+	work.next = 0;
+	ENTER_NOGIL_BLOCK(1);
+	qsort(context->rdq, context->rdq_cur, sizeof(s2p_rdq_t), s2p_compareReads);
+	nthreads = (context->thr < context->rdq_cur) ? context->thr : context->rdq_cur;
+	pthread_mutex_init(&(work.lock), NULL);
+	threads = (pthread_t*)malloc(sizeof(pthread_t)*nthreads);
+	if (threads == NULL)
+	{
+		/* no pool, the calling thread reads the whole queue */
+		nthreads = 1;
+	}
+	/* the calling thread is the first worker */
+	for (n = 1; n < nthreads; n++)
+	{
+		if (pthread_create(&(threads[n]), NULL, s2p_readWorker, &work))
+		{
+			nthreads = n;
+			break;
+		}
+	}
+	s2p_readWorker(&work);
+	for (n = 1; n < nthreads; n++)
+	{
+		pthread_join(threads[n], NULL);
+	}
+	if (threads != NULL)
+	{
+		free(threads);
+	}
+	pthread_mutex_destroy(&(work.lock));
+	LEAVE_NOGIL_BLOCK();
+#endif
+	for (n = 0; n < context->rdq_cur; n++)
+	{
+		if (!context->rdq[n].status)
+		{
+			setError(S2P_EFAILDATARD, "Cannot read data of node [%s]",
+				context->rdq_pth[context->rdq[n].node], context);
+			status = 0;
+			break;
+		}
+	}
+	return status;
+}
+/* ------------------------------------------------------------------------- */
+/* Multiple paths load: the paths are sorted, a node is parsed if one of the
+   paths is the node path or one of its ancestors, or if the node is an
+   ancestor of one of the paths. The common prefixes are parsed once. */
+static int s2p_cmppath(const void *a, const void *b)
+{
+	return strcmp(*(char**)a, *(char**)b);
+}
+/* ------------------------------------------------------------------------- */
+static int s2p_setloadpaths(PyObject *paths, s2p_ctx_t *context)
+{
+	Py_ssize_t sz, n;
+	PyObject *ascii;
+	char *p;
+	size_t l;
+
+	if ((paths == NULL) || !PyList_Check(paths) || !PyList_Size(paths))
+	{
+		return 0;
+	}
+	sz = PyList_Size(paths);
+	context->sub_lst = (char**)malloc(sz * sizeof(char*));
+	for (n = 0; n < sz; n++)
+	{
+		ascii = PyUnicode_AsASCIIString(PyList_GetItem(paths, n));
+		if (ascii == NULL)
+		{
+			PyErr_Clear();
+			continue;
+		}
+		l = strlen(PyBytes_AsString(ascii));
+		p = (char*)malloc(l + 1);
+		strcpy(p, PyBytes_AsString(ascii));
+		/* trailing / would never match a node path */
+		while ((l > 1) && (p[l - 1] == '/'))
+		{
+			p[--l] = '\0';
+		}
+		context->sub_lst[context->sub_cnt++] = p;
+		Py_DECREF(ascii);
+	}
+	qsort(context->sub_lst, context->sub_cnt, sizeof(char*), s2p_cmppath);
+	return context->sub_cnt;
+}
+/* ------------------------------------------------------------------------- */
+static void s2p_freeloadpaths(s2p_ctx_t *context)
+{
+	int n;
+
+	for (n = 0; n < context->sub_cnt; n++)
+	{
+		free(context->sub_lst[n]);
+	}
+	free(context->sub_lst);
+	context->sub_lst = NULL;
+	context->sub_cnt = 0;
+}
+/* ------------------------------------------------------------------------- */
+static int s2p_pathToLoad(s2p_ctx_t *context, char *path)
+{
+	char prefix[MAXPATHSIZE], *key = prefix;
+	size_t l, i;
+	int lo, hi, mid;
+
+	l = strlen(path);
+	if ((l == 0) || (l >= MAXPATHSIZE))
+	{
+		return 1;
+	}
+	/* a path of the list is the node path or an ancestor of the node */
+	strcpy(prefix, path);
+	for (i = 1; i <= l; i++)
+	{
+		if ((i == l) || (path[i] == '/'))
+		{
+			prefix[i] = '\0';
+			if (bsearch(&key, context->sub_lst, context->sub_cnt,
+				sizeof(char*), s2p_cmppath) != NULL)
+			{
+				return 1;
+			}
+			prefix[i] = path[i];
+		}
+	}
+	/* the node is an ancestor of a path of the list, these paths are
+	   all after the lower bound of the node path */
+	lo = 0;
+	hi = context->sub_cnt;
+	while (lo < hi)
+	{
+		mid = (lo + hi) / 2;
+		if (strcmp(context->sub_lst[mid], path) < 0) { lo = mid + 1; }
+		else { hi = mid; }
+	}
+	while ((lo < context->sub_cnt) && !strncmp(context->sub_lst[lo], path, l))
+	{
+		if (context->sub_lst[lo][l] == '/')
+		{
+			return 1;
+		}
+		lo++;
+	}
+	return 0;
+}
+/* ------------------------------------------------------------------------- */
+static int s2p_freeContext(s2p_ctx_t **context_ptr)
+{
+	s2p_ctx_t *context;
+
+	context = *context_ptr;
+	s2p_closeallHDF(context);
+	s2p_freelinktable(context);
+	s2p_freepathtable(context);
+	s2p_freeskiptable(context);
+	s2p_freenodetable(context);
+	s2p_freereadqueue(context);
+	s2p_freeloadpaths(context);
+	if (context->rdt_err != NULL)
+	{
+		free(context->rdt_err);
+	}
+	Py_XDECREF(context->map_dct);
+	s2p_freeProfile(context);
+	free(context->sha256);
+	free(context);
+	context_ptr = NULL;
+
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
+static void s2p_removeMissingChildren(hid_t        id,
+	PyObject    *tree,
+	s2p_ctx_t   *context,
+	L3_Cursor_t *l3db)
+{
+	Py_ssize_t sz, n, child, toremove = 0;
+	L3_Node_t *node = NULL, *cnode = NULL;
+	PyObject *ctree;
+	char *tnodename;
+
+	L3M_NEWNODE(node);
+	/* SHOULD delete after parsing subnodes...
+	   Do **not** release argument id
+	   A new file cannot have missing children, skip the children parse.
+	*/
+	if (S2P_HASFLAG(S2P_FDELETEMISSING) && !S2P_HASFLAG(S2P_FNEW))
+	{
+		child = 0;
+		ctree = PyList_GetItem(tree, 2);
+		sz = PyList_Size(ctree);
+		L3M_NEWNODE(cnode);
+		__node_count++;
+		L3M_UNSETFLAG(l3db, L3F_WITHDATA);
+		L3M_SETFLAG(l3db, L3F_WITHCHILDREN);
+		node = L3_nodeRetrieve(l3db, id, node);
+		while ((node != NULL) &&
+			(node->children != NULL) &&
+			(node->children[child] != -1))
+		{
+			L3M_UNSETFLAG(l3db, L3F_WITHDATA);
+			L3M_UNSETFLAG(l3db, L3F_WITHCHILDREN);
+			cnode = L3_nodeRetrieve(l3db, node->children[child], cnode);
+			toremove = 1;
+			for (n = 0; n < sz; n++)
+			{
+				PyObject * ascii_string = NULL;
+				ascii_string = PyUnicode_AsASCIIString(PyList_GetItem(PyList_GetItem(ctree, n), 0));
+				tnodename = PyBytes_AsString(ascii_string);
+
+
+				if (!strcmp(tnodename, cnode->name))
+				{
+					S2P_TRACE(("# CHL:found in tree and file [%s]\n", tnodename));
+					toremove = 0;
+					if (ascii_string != NULL) { Py_DECREF(ascii_string); }
+					break;
+				}
+				if (ascii_string != NULL) { Py_DECREF(ascii_string); }
+			}
+			if (toremove)
+			{
+				S2P_TRACE(("# CHL:node child remove [%s]\n", cnode->name));
+				L3_nodeDelete(l3db, node->id, cnode->name);
+			}
+			child++;
+		}
+		L3_nodeFree(&cnode);
+	}
+	L3_nodeRelease(&node, L3F_R_MEM_CHILDREN | L3F_R_HID_CHILDREN | L3F_R_MEM_DATA);
+}
+/* ------------------------------------------------------------------------- */
+static int s2p_cmpname(const void *a, const void *b)
+{
+	return strcmp(*(const char**)a, *(const char**)b);
+}
+/* ------------------------------------------------------------------------- */
+/* Merkle digest of a node, SHA-256 of its name, label, value (kind, item
+   size, shape and bytes in memory order, as saved) and of the name and
+   digest of each child in name order. The children digests are already in
+   the dict, the node digest is added as an hex string with the node path
+   as key. CGNS.MAP.digests computes the same digest for a CGNS/Python tree. */
+static void s2p_digestNode(s2p_ctx_t *context, char *path, char *name,
+	char *label, PyObject *o_value, PyObject *o_clist)
+{
+	sha256_t sha;
+	unsigned char digest[32];
+	char buff[32 + NPY_MAXDIMS * 24], hex[65], cpath[MAXPATHSIZE];
+	const char **names;
+	PyObject *o_array, *o_digest;
+	Py_ssize_t nchildren, n;
+	int i;
+
+	sha256_starts(&sha);
+	sha256_update(&sha, (uint8_t*)name, strlen(name) + 1);
+	sha256_update(&sha, (uint8_t*)label, strlen(label) + 1);
+	if (PyArray_Check(o_value))
+	{
+		if (PyArray_IS_C_CONTIGUOUS((PyArrayObject*)o_value)
+			|| PyArray_IS_F_CONTIGUOUS((PyArrayObject*)o_value))
+		{
+			Py_INCREF(o_value);
+			o_array = o_value;
+		}
+		else
+		{
+			o_array = PyArray_NewCopy((PyArrayObject*)o_value, NPY_CORDER);
+		}
+		if (o_array == NULL)
+		{
+			PyErr_Clear();
+			return;
+		}
+		sprintf(buff, "%c%d:", PyArray_DESCR((PyArrayObject*)o_array)->kind,
+			(int)PyArray_ITEMSIZE((PyArrayObject*)o_array));
+		for (i = 0; i < PyArray_NDIM((PyArrayObject*)o_array); i++)
+		{
+			sprintf(buff + strlen(buff), "%ld,",
+				(long)PyArray_DIM((PyArrayObject*)o_array, i));
+		}
+		sha256_update(&sha, (uint8_t*)buff, strlen(buff) + 1);
+		sha256_update(&sha, (uint8_t*)PyArray_DATA((PyArrayObject*)o_array),
+			(uint32_t)PyArray_NBYTES((PyArrayObject*)o_array));
+		Py_DECREF(o_array);
+	}
+	nchildren = PyList_Size(o_clist);
+	names = (const char**)malloc((nchildren + 1) * sizeof(char*));
+	for (n = 0; n < nchildren; n++)
+	{
+		names[n] = PyUnicode_AsUTF8(PyList_GetItem(PyList_GetItem(o_clist, n), 0));
+	}
+	qsort(names, nchildren, sizeof(char*), s2p_cmpname);
+	for (n = 0; n < nchildren; n++)
+	{
+		snprintf(cpath, MAXPATHSIZE, "%s/%s", strcmp(path, "/") ? path : "",
+			names[n]);
+		o_digest = PyDict_GetItemString(context->dgs_obj, cpath);
+		sha256_update(&sha, (uint8_t*)names[n], strlen(names[n]) + 1);
+		if (o_digest != NULL)
+		{
+			sha256_update(&sha, (uint8_t*)PyUnicode_AsUTF8(o_digest), 64);
+		}
+	}
+	free(names);
+	sha256_finish(&sha, digest);
+	for (i = 0; i < 32; i++)
+	{
+		sprintf(hex + 2 * i, "%02x", digest[i]);
+	}
+	o_digest = PyUnicode_FromString(hex);
+	PyDict_SetItemString(context->dgs_obj, path, o_digest);
+	Py_DECREF(o_digest);
+}
+/* ------------------------------------------------------------------------- */
+/* Main read function, parses a node and recurse on its children, creates
+   the Python node structure.
+*/
+static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
+	char        *curpath,
+	char        *subpath,
+	s2p_ctx_t   *context,
+	L3_Cursor_t *l3db)
+{
+	int ndim = 0, tsize = 0, n = 0, child = 0, arraytype = -1, skip = 0, c = 0, p1 = 0, p2 = 0, soft = 0;
+	int index = -1, rank = -1, count = -1, isinterlaced = 0;
 	int trackpath = 0, ix = 0, skipnewarray = 0, linkstatus = 0, islinknode = 0;
 	int pathinlist = 0, memsize = 0, ispartial = 0, iscontiguous = 0;
 	hid_t actualid = -1, id;
@@ -1504,7 +2805,7 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 	PyObject *o_node = NULL, *u_value = NULL, *c_value = NULL;
 	npy_uint32 npyflags = -1;
 	L3_Cursor_t *lkl3db = NULL;
-	L3_Node_t *rnode = NULL, *cnode = NULL;
+	L3_Node_t *rnode = NULL, *cnode = NULL, *tnode = NULL;
 	char *curdir = NULL, *curfile = NULL, *name;
 	s2p_ent_t *curhdf;
 	char destnode[MAXPATHSIZE];
@@ -1519,6 +2820,12 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 	hsize_t d_offset[L3C_MAX_DIMS], d_stride[L3C_MAX_DIMS];
 	hsize_t d_count[L3C_MAX_DIMS], d_block[L3C_MAX_DIMS];
 	char altlabel[L3C_MAX_NAME + 1];
+	char rawfile[L3C_MAX_FILE];
+	L3_Block_t *rawblocks = NULL;
+	int rawcount = 0, ismapped = 0, lazytype = -1, isroot = 0;
+	haddr_t mapoffset = 0;
+	double p_start = 0.0, p_time = 0.0;
+	long p_bytes = 0;
 
 	PyObject *o_name = NULL;
 	PyObject *b_name = NULL;
@@ -1527,12 +2834,17 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 
 	id = anode->id;
 	name = anode->name;
+	if (context->prf != NULL)
+	{
+		p_start = s2p_clock();
+	}
 
 	context->dpt -= 1;
 	trackpath = 1;
-	if ((subpath == NULL)
+	if (((subpath == NULL)
 		|| ((subpath != NULL) && (subpath[0] == '\0'))
 		|| ((subpath != NULL) && (!strcmp(subpath, "/"))))
+		&& !context->sub_cnt)
 	{
 		trackpath = 0;
 	}
@@ -1552,9 +2864,11 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 	curdir = curhdf->dirname;
 	curfile = curhdf->filename;
 	/* step 1: link management ---------------------------------------------- */
+	S2P_PHASE(S2P_PMETA);
 	islinknode = L3_isLinkNode(l3db, id, destfile, destnode);
 	if (islinknode)
 	{
+		S2P_PHASE(S2P_PLINK);
 		linkstatus = S2P_LKOK;
 		strcpy(localnode, curpath);
 		strcat(localnode, "/");
@@ -1618,7 +2932,9 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 					   Then we start our parse from the root node and keep track
 					   of links, the actual node is finally used at the end. */
 					sprintf(targetfile, "%s/%s", destdir, destfile);
+					S2P_PHASE(S2P_POPEN);
 					lkl3db = s2p_addoneHDF(destdir, destfile, context, 0);
+					S2P_PHASE(S2P_PLINK);
 					if (!lkl3db)
 					{
 						S2P_TRACE(("# CHL:linked-to file [%s] found unreadable\n",
@@ -1664,6 +2980,7 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 		}
 	}
 	/* step 2: retrieve actual object id ------------------------------------ */
+	S2P_PHASE(S2P_PMETA);
 	ENTER_NOGIL_BLOCK(1);
 	L3_nodeRelease(&rnode, L3F_R_ALL);
 	L3M_NEWNODE(rnode);
@@ -1685,20 +3002,61 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 	}
 	strcat(curpath, "/");
 	strcat(curpath, rnode->name);
-	skipnewarray = 0;
-	ispartial = s2p_filterDataPartial(context, curpath,
-		s_offset, s_stride, s_count, s_block,
-		d_offset, d_stride, d_count, d_block);
-	iscontiguous = s2p_filterDataContiguous(context, curpath,
-		&index, &rank, &count, &isinterlaced);
-	/* step 3: -------------------------------------------------------------- */
-	if (!S2P_HASFLAG(S2P_FNODATA))
+	/* step 4: check if the exact path is to be skipped, before any data
+	   allocation: a deferred read would write into the freed node data ---- */
+	if (s2p_pathToSkip(context, curpath) && strcmp(curpath, L3S_ROOTNODEPATH))
 	{
-		/* 'update' always overwrites 'contiguous' */
-		u_value = s2p_getUpdateObjectByPath(context->upd_pth, curpath);
-		if (S2P_HASFLAG(S2P_FUPDATEONLY))
+		S2P_TRACE(("# CHL:path skip \'%s\'\n", curpath));
+		curpath[strlen(curpath) - strlen(rnode->name) - 1] = '\0';
+		L3_nodeAndDataFree(&rnode);
+		context->dpt += 1;
+		if (islinknode)
 		{
-			skipnewarray = 1;
+			s2p_popHDF(context);
+		}
+		return NULL;
+	}
+	/* step 5: check if there is a start path (to be merged with step 4) ---- */
+	if (trackpath && strcmp(curpath, L3S_ROOTNODEPATH))
+	{
+		ENTER_NOGIL_BLOCK(1);
+		S2P_TRACE(("# CHL:path filter \'%s\' \'%s\'", subpath, curpath));
+		skip = 0;
+		if (context->sub_cnt)
+		{
+			skip = !s2p_pathToLoad(context, curpath);
+		}
+		else if (subpath != NULL)
+		{
+			skip = !s2p_issubpath(subpath, curpath, 0);
+		}
+		LEAVE_NOGIL_BLOCK();
+		if (skip)
+		{
+			curpath[strlen(curpath) - strlen(rnode->name) - 1] = '\0';
+			L3_nodeAndDataFree(&rnode);
+			S2P_TRACE((" skip\n"));
+			context->dpt += 1;
+			return NULL;
+		}
+		S2P_TRACE((" ok\n"));
+	}
+	skipnewarray = 0;
+	ispartial = s2p_filterDataPartial(context, curpath,
+		s_offset, s_stride, s_count, s_block,
+		d_offset, d_stride, d_count, d_block);
+	iscontiguous = s2p_filterDataContiguous(context, curpath,
+		&index, &rank, &count, &isinterlaced);
+	/* step 3: -------------------------------------------------------------- */
+	L3M_ECLEAR(l3db);
+	if (!S2P_HASFLAG(S2P_FNODATA))
+	{
+		S2P_PHASE(S2P_PDATA);
+		/* 'update' always overwrites 'contiguous' */
+		u_value = s2p_getUpdateObjectByPath(context->upd_pth, curpath);
+		if (S2P_HASFLAG(S2P_FUPDATEONLY))
+		{
+			skipnewarray = 1;
 		}
 		if (u_value != NULL)
 		{
@@ -1745,46 +3103,37 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 			s2p_pathstack(curpath, S2P_SCONTIGUOUS, rnode->dtype, rnode->dims, context);
 			if (rnode->data == NULL) { printf("NULL RETURN\n"); }
 		}
-		else
+		else if (S2P_HASFLAG(S2P_FMEMMAP) && !skipnewarray
+			&& !S2P_READTYPE(l3db, rnode->dtype)
+			&& s2p_isMappable(l3db, actualid, rawfile, &mapoffset))
 		{
+			/* no data read, the memmap view is created with the python node */
+			L3M_UNSETFLAG(l3db, L3F_WITHDATA);
 			rnode = L3_nodeRetrieve(l3db, actualid, rnode);
+			ismapped = 1;
 		}
-		L3M_UNSETFLAG(l3db, L3F_NOALLOCATE);
-		LEAVE_NOGIL_BLOCK();
-	}
-	/* step 4: check if the exact path is to be skipped --------------------- */
-	if (s2p_pathToSkip(context, curpath) && strcmp(curpath, L3S_ROOTNODEPATH))
-	{
-		S2P_TRACE(("# CHL:path skip \'%s\'\n", curpath));
-		curpath[strlen(curpath) - strlen(rnode->name) - 1] = '\0';
-		L3_nodeAndDataFree(&rnode);
-		context->dpt += 1;
-		if (islinknode)
+		else if (context->thr && !skipnewarray
+			&& !S2P_READTYPE(l3db, rnode->dtype)
+			&& (s2p_dataSize(rnode) >= S2P_DEFERREDREADMIN)
+			&& L3_nodeDataBlocks(l3db, actualid, rawfile, &rawblocks, &rawcount))
 		{
-			s2p_popHDF(context);
+			/* allocate only, actual read is performed by s2p_readDeferred */
+			L3M_UNSETFLAG(l3db, L3F_WITHDATA);
+			rnode = L3_nodeRetrieve(l3db, actualid, rnode);
+			rnode->data = s2p_deferData(context, rawfile, curpath, rawblocks, rawcount);
+			free(rawblocks);
+			if (rnode->data == NULL)
+			{
+				L3M_SETFLAG(l3db, L3F_WITHDATA);
+				rnode = L3_nodeRetrieve(l3db, actualid, rnode);
+			}
 		}
-		return NULL;
-	}
-	/* step 5: check if there is a start path (to be merged with step 4) ---- */
-	if (trackpath && strcmp(curpath, L3S_ROOTNODEPATH))
-	{
-		ENTER_NOGIL_BLOCK(1);
-		S2P_TRACE(("# CHL:path filter \'%s\' \'%s\'", subpath, curpath));
-		skip = 0;
-		if (subpath != NULL)
+		else
 		{
-			skip = !s2p_issubpath(subpath, curpath, 0);
+			rnode = L3_nodeRetrieve(l3db, actualid, rnode);
 		}
+		L3M_UNSETFLAG(l3db, L3F_NOALLOCATE);
 		LEAVE_NOGIL_BLOCK();
-		if (skip)
-		{
-			curpath[strlen(curpath) - strlen(rnode->name) - 1] = '\0';
-			L3_nodeAndDataFree(&rnode);
-			S2P_TRACE((" skip\n"));
-			context->dpt += 1;
-			return NULL;
-		}
-		S2P_TRACE((" ok\n"));
 	}
 	if (trackpath && !strcmp(curpath, L3S_ROOTNODEPATH))
 	{
@@ -1815,6 +3164,7 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 		}
 	}
 	/* step 7: create python node with retrieved infos ---------------------- */
+	S2P_PHASE(S2P_PPYTHON);
 	S2P_TRACE(("# CHL:node %d (%s) [%s] ", rnode->id, curpath, rnode->label));
 	if (!skipnewarray || (rnode->dtype != L3E_VOID))
 	{
@@ -1858,6 +3208,10 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 			if ((context->mxs == -1) || (tsize > context->mxs))
 			{
 				s2p_pathstack(curpath, S2P_SNODATA, rnode->dtype, rnode->dims, context);
+				if (S2P_HASFLAG(S2P_FLAZYDATA))
+				{
+					lazytype = s2p_arrayType(rnode->dtype);
+				}
 				rnode->dtype = L3E_VOID;
 			}
 			else
@@ -1865,6 +3219,7 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 				/* Load actual data ptr that should be
 				   shared with numpy.ndarray object.
 				   Do not de-allocate node data ptr */
+				S2P_PHASE(S2P_PDATA);
 				L3_nodeRelease(&rnode,
 					L3F_R_MEM_DATA | L3F_R_HID_CHILDREN | L3F_R_MEM_CHILDREN);
 				L3M_NEWNODE(rnode);
@@ -1888,8 +3243,10 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 				{
 					rnode = L3_nodeRetrieve(l3db, actualid, rnode);
 				}
+				S2P_PHASE(S2P_PPYTHON);
 			}
 		}
+		s2p_checkReadType(l3db, curpath, context);
 		if ((rnode->dtype == L3E_I4) || (rnode->dtype == L3E_I4ptr))
 		{
 			arraytype = NPY_INT32;
@@ -1921,7 +3278,32 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 			memsize = 0;
 		}
 		LEAVE_NOGIL_BLOCK();
-		if (arraytype != -1)
+		if (lazytype != -1)
+		{
+			o_value = s2p_lazyData(context, actualid, ndim, npy_dim_vals, lazytype);
+			if (o_value == NULL)
+			{
+				/* no proxy, the value is None as for FNODATA */
+				PyErr_Clear();
+			}
+		}
+		if ((arraytype != -1) && ismapped)
+		{
+			o_value = s2p_mapData(context, rawfile, mapoffset, ndim, npy_dim_vals,
+				arraytype, S2P_HASFLAG(S2P_FFORTRANFLAG));
+			if (o_value == NULL)
+			{
+				/* cannot map, read data as usual */
+				PyErr_Clear();
+				S2P_PHASE(S2P_PDATA);
+				ENTER_NOGIL_BLOCK(1);
+				L3M_SETFLAG(l3db, L3F_WITHDATA);
+				rnode = L3_nodeRetrieve(l3db, actualid, rnode);
+				LEAVE_NOGIL_BLOCK();
+				S2P_PHASE(S2P_PPYTHON);
+			}
+		}
+		if ((arraytype != -1) && (o_value == NULL))
 		{
 			npyflags = NPY_ARRAY_BEHAVED;
 			if (S2P_HASFLAG(S2P_FOWNDATA)) { npyflags |= NPY_ARRAY_OWNDATA; }
@@ -1932,6 +3314,7 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 			{
 				npyflags &= ~NPY_ARRAY_OWNDATA;
 			}
+			p_bytes = (long)s2p_dataSize(rnode);
 			data_ptr = rnode->data;
 			rnode->data = NULL;
 			o_value = PyArray_New(&PyArray_Type, ndim, npy_dim_vals, arraytype,
@@ -1945,6 +3328,10 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 	/* Loop on children. This is a depth first recurse. In case of a path search,
 	   skip until we have the right name. */
 	o_clist = PyList_New(0);
+	if (context->prf != NULL)
+	{
+		p_time = s2p_clock() - p_start;
+	}
 
 	child = 0;
 	while ((rnode->children != NULL) &&
@@ -1952,6 +3339,7 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 		(context->dpt > 0)
 		)
 	{
+		S2P_PHASE(S2P_PMETA);
 		ENTER_NOGIL_BLOCK(1);
 		L3_nodeRelease(&cnode, L3F_R_ALL);
 		L3M_NEWNODE(cnode);
@@ -1959,8 +3347,16 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 		L3M_UNSETFLAG(l3db, L3F_FOLLOWLINKS);
 		L3M_UNSETFLAG(l3db, L3F_WITHDATA);
 		L3M_UNSETFLAG(l3db, L3F_WITHCHILDREN);
-		cnode = L3_nodeRetrieve(l3db, rnode->children[child], cnode);
+		/* the child parse retrieves the whole node, only its name is used here */
+		tnode = L3_nodeRetrieveName(l3db, rnode->children[child], cnode);
 		LEAVE_NOGIL_BLOCK();
+		if (tnode == NULL)
+		{
+			setError(S2P_EFAILDATARD, "Cannot retrieve a child of node [%s]",
+				curpath, context);
+			break;
+		}
+		cnode = tnode;
 		/* HDF can parse paths, i.e. a node name can be a path and the
 		   resulting ID is the actual last node. However, we SHOULD NOT use that
 		   because we want to have control on LINK PARSE. */
@@ -1983,6 +3379,11 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 		child++;
 	}
 	/* end chidren loop */
+	S2P_PHASE(S2P_PPYTHON);
+	if (context->prf != NULL)
+	{
+		p_start = s2p_clock();
+	}
 
 	L3_nodeRelease(&cnode, L3F_R_ALL);
 	if (skipnewarray)
@@ -1994,7 +3395,20 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 		Py_INCREF(Py_None);
 		o_value = Py_None;
 	}
-	if (strcmp(rnode->name, L3S_ROOTNODENAME))
+	isroot = !strcmp(rnode->name, L3S_ROOTNODENAME);
+	if (context->dgs_obj != NULL)
+	{
+		if (isroot)
+		{
+			s2p_digestNode(context, "/", CG_CGNSTree_n, CG_CGNSTree_ts,
+				Py_None, o_clist);
+		}
+		else
+		{
+			s2p_digestNode(context, curpath, name, altlabel, o_value, o_clist);
+		}
+	}
+	if (!isroot)
 	{
 		curpath[strlen(curpath) - strlen(rnode->name) - 1] = '\0';
 	}
@@ -2067,10 +3481,56 @@ static PyObject* s2p_parseAndReadHDF(L3_Node_t   *anode,
 	}
 	*/
 	LEAVE_NOGIL_BLOCK();
+	if ((context->prf != NULL) && !isroot)
+	{
+		s2p_profileNode(context, curpath, name,
+			p_time + s2p_clock() - p_start, p_bytes);
+	}
 
 	return o_node;
 }
 /* ------------------------------------------------------------------------- */
+/* storage policy tuple is (chunksize, deflate, shuffle, fletcher32) as
+   checked by the python interface */
+static void s2p_getStorage(PyObject *policy, L3_Storage_t *storage)
+{
+	storage->chunksize = (hsize_t)PyLong_AsLongLong(PyTuple_GetItem(policy, 0));
+	storage->deflate = (int)PyLong_AsLong(PyTuple_GetItem(policy, 1));
+	storage->shuffle = PyObject_IsTrue(PyTuple_GetItem(policy, 2));
+	storage->fletcher32 = PyObject_IsTrue(PyTuple_GetItem(policy, 3));
+	storage->extend = PyObject_IsTrue(PyTuple_GetItem(policy, 4));
+}
+/* ------------------------------------------------------------------------- */
+/* per path policy first, then per SIDS type, then default */
+static void s2p_setStorage(L3_Cursor_t *l3db, char *path, char *label,
+	s2p_ctx_t *context)
+{
+	PyObject *policy = NULL;
+	L3_Storage_t storage;
+
+	if (context->sto_dft.chunksize == 0)
+	{
+		return;
+	}
+	if (context->sto_pth != NULL)
+	{
+		policy = PyDict_GetItemString(context->sto_pth, path);
+	}
+	if ((policy == NULL) && (context->sto_typ != NULL))
+	{
+		policy = PyDict_GetItemString(context->sto_typ, label);
+	}
+	if (policy == NULL)
+	{
+		L3_setStorage(l3db, &(context->sto_dft));
+	}
+	else
+	{
+		s2p_getStorage(policy, &storage);
+		L3_setStorage(l3db, &storage);
+	}
+}
+/* ------------------------------------------------------------------------- */
 static int s2p_parseAndWriteHDF(hid_t        id,
 	PyObject    *tree,
 	char        *curpath,
@@ -2093,9 +3553,16 @@ static int s2p_parseAndWriteHDF(hid_t        id,
 	hsize_t d_count[L3C_MAX_DIMS], d_block[L3C_MAX_DIMS];
 	PyObject *ascii_name = NULL;
 	PyObject *ascii_label = NULL;
+	double p_start = 0.0, p_time = 0.0;
+	long p_bytes = 0;
 
 	STR_ALLOC(altlabel, L3C_MAX_NAME + 1);
 	DIM_ALLOC(ddat, int, NPY_MAXDIMS);
+	if (context->prf != NULL)
+	{
+		p_start = s2p_clock();
+	}
+	S2P_PHASE(S2P_PPYTHON);
 
 	if ((curpath[0] != '\0') && s2p_nodeAlreadyParsedCheck(tree, context))
 	{
@@ -2171,6 +3638,7 @@ static int s2p_parseAndWriteHDF(hid_t        id,
 		{
 			S2P_TRACE(("# CHL: [%s] linked to [%s][%s]\n", \
 				curpath, lke->dst_filename, lke->dst_nodename));
+			S2P_PHASE(S2P_PLINK);
 			if (S2P_HASFLAG(S2P_FUPDATE))
 			{
 				L3M_SETFLAG(l3db, L3F_LINKOVERWRITE);
@@ -2269,10 +3737,53 @@ static int s2p_parseAndWriteHDF(hid_t        id,
 			else { S2P_TRACE(("} (no data)\n")); }
 			node = L3_nodeSet(l3db, node, name, altlabel, ddat,
 				L3_typeAsEnum(tdat), vdat, L3F_NONE);
+			s2p_setStorage(l3db, curpath, label, context);
 			ispartial = s2p_filterDataPartial(context, curpath,
 				s_offset, s_stride, s_count, s_block,
 				d_offset, d_stride, d_count, d_block);
-			if (toupdate)
+			/* node creation time is data time if the node has data */
+			if (n && !toskip)
+			{
+				S2P_PHASE(S2P_PDATA);
+				p_bytes = (long)s2p_dataSize(node);
+			}
+			else
+			{
+				S2P_PHASE(S2P_PMETA);
+			}
+			if (ispartial && !toskip)
+			{
+				/* the hyperslab is written in the existing file array */
+				S2P_TRACE(("# CHL:node partial update [%s]\n", curpath));
+				oldid = -1;
+				if (S2P_HASFLAG(S2P_FUPDATE))
+				{
+					oldid = L3_nodeFind(l3db, l3db->root_id, curpath);
+				}
+				if (!H5Iis_valid(oldid))
+				{
+					setError(S2P_EBADPARTIAL,
+						"Partial write requires an existing node [%s]",
+						curpath, context);
+					ret = 0;
+				}
+				else
+				{
+					node->id = oldid;
+					L3_nodeUpdatePartial(l3db,
+						s_offset, s_stride, s_count, s_block,
+						d_offset, d_stride, d_count, d_block,
+						node);
+					if (!L3M_ECHECK(l3db))
+					{
+						setError(S2P_EBADPARTIAL,
+							"Cannot write partial data of node [%s]",
+							curpath, context);
+						ret = 0;
+					}
+				}
+			}
+			else if (toupdate)
 			{
 				if (lke == NULL)
 				{
@@ -2307,9 +3818,14 @@ static int s2p_parseAndWriteHDF(hid_t        id,
 					node = L3_nodeRetrieve(l3db, oldid, node);
 				}
 			}
-			if ((H5Iis_valid(node->id)) && (PyList_Check(PyList_GetItem(tree, 2))))
+			if (ret && (H5Iis_valid(node->id))
+				&& (PyList_Check(PyList_GetItem(tree, 2))))
 			{
 				sz = PyList_Size(PyList_GetItem(tree, 2));
+				if (context->prf != NULL)
+				{
+					p_time = s2p_clock() - p_start;
+				}
 				for (n = 0; n < sz; n++)
 				{
 					ret = s2p_parseAndWriteHDF(node->id,
@@ -2317,9 +3833,14 @@ static int s2p_parseAndWriteHDF(hid_t        id,
 						curpath, path, context, l3db);
 					if (!ret) { break; }
 				}
+				if (context->prf != NULL)
+				{
+					p_start = s2p_clock();
+				}
+				S2P_PHASE(S2P_PMETA);
 				s2p_removeMissingChildren(node->id, tree, context, l3db);
 			}
-			if ((!toskip) && (!H5Iis_valid(node->id)))
+			if (ret && (!toskip) && (!H5Iis_valid(node->id)))
 			{
 				setError(S2P_ECANNOTCREAT,
 					"CGNS/HDF5 cannot create node [%s]",
@@ -2329,6 +3850,11 @@ static int s2p_parseAndWriteHDF(hid_t        id,
 			L3_nodeFree(&node);
 		}
 		curpath[strlen(curpath) - strlen(name) - 1] = '\0';
+		if (context->prf != NULL)
+		{
+			s2p_profileNode(context, curpath, name,
+				p_time + s2p_clock() - p_start, p_bytes);
+		}
 		if (ascii_name != NULL)
 		{
 			Py_DECREF(ascii_name);
@@ -2358,11 +3884,18 @@ PyObject* s2p_loadAsHDF(char     *dirname,
 	int       flags,
 	int       depth,
 	int       maxdata,
+	int       threads,
 	char     *path,
+	PyObject *subpaths,
 	char     *searchpath,
 	PyObject *update,
 	PyObject *filter,
 	PyObject *skip,
+	PyObject *readtypes,
+	PyObject *image,
+	int       profile,
+	PyObject *report,
+	PyObject *digests,
 	PyObject *except)
 {
 	PyObject *tree = NULL, *links = NULL, *paths = NULL, *load_return = NULL;
@@ -2379,6 +3912,7 @@ PyObject* s2p_loadAsHDF(char     *dirname,
 	context->flg = flags;
 	context->dpt = depth;
 	context->skp_pth = skip;
+	s2p_fillskiptable(context);
 	context->mxs = maxdata;
 	if (PyDict_Check(update))
 	{
@@ -2390,6 +3924,32 @@ PyObject* s2p_loadAsHDF(char     *dirname,
 	}
 	context->err = except;
 	context->lsp = searchpath;
+	if (image != Py_None)
+	{
+		context->img_obj = image;
+	}
+	if (PyTuple_Check(readtypes) && PyTuple_Size(readtypes))
+	{
+		context->rdt_obj = readtypes;
+	}
+	s2p_newProfile(profile, context);
+	s2p_setloadpaths(subpaths, context);
+	if (PyDict_Check(digests))
+	{
+		context->dgs_obj = digests;
+	}
+#ifdef CHLONE_HAS_PTHREAD
+	/* checksum is computed during the parse, it requires data */
+	if ((threads > 0) && !S2P_HASFLAG(S2P_FCHECKSUM)
+		&& (context->dgs_obj == NULL))
+	{
+		context->thr = threads;
+	}
+#endif
+	if (S2P_HASFLAG(S2P_FCHECKSUM) || (context->dgs_obj != NULL))
+	{
+		context->flg &= ~S2P_FLAZYDATA;
+	}
 	for (n = 0; n < S2P_EMAXCTGINDEX; n++)
 	{
 		context->ctg_obj[n] = NULL;
@@ -2405,11 +3965,13 @@ PyObject* s2p_loadAsHDF(char     *dirname,
 	H5dont_atexit(); /* MANDATORY FIRST HDF5 function to call */
 #endif
 
+	S2P_PHASE(S2P_POPEN);
 	l3db = s2p_addoneHDF(dirname, filename, context, 1);
 	if (!L3M_ECHECK(l3db))
 	{
 		return NULL;
 	}
+	S2P_PHASE(S2P_PMETA);
 	s2p_setlinksearchpath(l3db, context);
 	L3M_NEWNODE(rnode);
 	__node_count++;
@@ -2427,6 +3989,28 @@ PyObject* s2p_loadAsHDF(char     *dirname,
 	if (S2P_HASFLAG(S2P_FCHECKSUM))
 	{
 	}
+	S2P_PHASE(S2P_PDATA);
+	if (context->rdt_err != NULL)
+	{
+		setError(S2P_EFAILDATARD,
+			"Cannot convert data of node [%s] (value out of range)",
+			context->rdt_err, context);
+	}
+	if ((ret == NULL) || PyErr_Occurred())
+	{
+		/* failed or empty parse: the queued buffers are not owned by any
+		   node anymore, the queue is dropped and not read */
+		s2p_freereadqueue(context);
+	}
+	if ((context->rdt_err != NULL) || PyErr_Occurred()
+		|| (context->rdq_cur && !s2p_readDeferred(context)))
+	{
+		Py_XDECREF(ret);
+		L3_nodeRelease(&rnode, L3F_R_ALL);
+		s2p_freeContext(&context);
+		return NULL;
+	}
+	S2P_PHASE(S2P_PPYTHON);
 	links = s2p_getlinktable(context);
 	paths = s2p_getpathtable(context);
 	if (ret == NULL)
@@ -2477,6 +4061,12 @@ PyObject* s2p_loadAsHDF(char     *dirname,
 	TRACE_HDF5_LEAK("LOAD LEAVE");
 	S2P_TRACE(("# CHL:remaining nodes [%d]\n", __node_count));
 
+	if (context->prf != NULL)
+	{
+		S2P_PHASE(S2P_PCLOSE);
+		s2p_closeallHDF(context);
+		s2p_getProfile(report, context);
+	}
 	s2p_freeContext(&context);
 
 	return load_return;
@@ -2494,6 +4084,10 @@ PyObject* s2p_saveAsHDF(char     *dirname,
 	PyObject *skip,
 	PyObject *lkupdate,
 	PyObject *lkskip,
+	PyObject *storage,
+	PyObject *image,
+	int       profile,
+	PyObject *report,
 	PyObject *except)
 {
 	int toupdate = 0;
@@ -2501,7 +4095,7 @@ PyObject* s2p_saveAsHDF(char     *dirname,
 	Py_ssize_t n = 0;
 	char *tdat = NULL, parentnodename[256], *pt, *cpath, *path;
 	s2p_ctx_t *context = NULL;
-	PyObject *rtree = NULL, *otree = NULL, *paths = NULL;
+	PyObject *rtree = NULL, *otree = NULL, *paths = NULL, *bytes = NULL;
 	int ndat = 0, ret = 1, *dims, *ddat;
 	char *vdat = NULL;
 	char *clabel = NULL;
@@ -2523,6 +4117,7 @@ PyObject* s2p_saveAsHDF(char     *dirname,
 	context->lnk_obj = links;
 	context->upd_pth = update;
 	context->skp_pth = skip;
+	s2p_fillskiptable(context);
 	context->upd_pth_lk = lkupdate;
 	context->skp_pth_lk = lkskip;
 	context->err = except;
@@ -2532,6 +4127,17 @@ PyObject* s2p_saveAsHDF(char     *dirname,
 	{
 		context->flt_dct = filter;
 	}
+	if (PyTuple_Check(storage))
+	{
+		s2p_getStorage(PyTuple_GetItem(storage, 0), &(context->sto_dft));
+		context->sto_typ = PyTuple_GetItem(storage, 1);
+		context->sto_pth = PyTuple_GetItem(storage, 2);
+	}
+	if (image != Py_None)
+	{
+		context->img_obj = image;
+	}
+	s2p_newProfile(profile, context);
 
 #ifdef __THREADING__
 	H5dont_atexit(); /* MANDATORY FIRST HDF5 function to call */
@@ -2549,6 +4155,7 @@ PyObject* s2p_saveAsHDF(char     *dirname,
 		if (S2P_CHECKNODENOCACHE(tree, context))
 		{
 			s2p_filllinktable(links, context);
+			S2P_PHASE(S2P_POPEN);
 			l3db = s2p_addoneHDF(dirname, filename, context, 1);
 			if (!L3M_ECHECK(l3db))
 			{
@@ -2568,6 +4175,7 @@ PyObject* s2p_saveAsHDF(char     *dirname,
 				tdat = PyBytes_AsString(ascii_tdat);
 
 				L3M_ECLEAR(l3db);
+				S2P_PHASE(S2P_PMETA);
 				nodeid = L3_nodeFind(l3db, l3db->root_id, tdat);
 				L3M_NEWNODE(node);
 				__node_count++;
@@ -2576,6 +4184,15 @@ PyObject* s2p_saveAsHDF(char     *dirname,
 				{
 					S2P_TRACE(("# CHL:update path not found '%s'\n", tdat));
 					ret &= 1;
+					if (s2p_filterIsPartial(context, tdat))
+					{
+						setError(S2P_EBADPARTIAL,
+							"Partial write requires an existing node [%s]",
+							tdat, context);
+						ret = 0;
+						if (ascii_tdat != NULL) Py_DECREF(ascii_tdat);
+						break;
+					}
 				}
 				else
 				{
@@ -2592,7 +4209,6 @@ PyObject* s2p_saveAsHDF(char     *dirname,
 						}
 					}
 					parentid = L3_path2Node(l3db, parentnodename);
-					L3M_SETFLAG(l3db, L3F_DEBUG);
 					if (S2P_HASFLAG(S2P_FCOMPRESS))
 					{
 						L3M_SETFLAG(l3db, L3F_COMPRESS);
@@ -2600,11 +4216,22 @@ PyObject* s2p_saveAsHDF(char     *dirname,
 					ret &= s2p_parseAndWriteHDF(parentid,
 						PyDict_GetItemString(context->upd_pth, tdat),
 						parentnodename, "", context, l3db);
+					if (H5Iis_valid(parentid))
+					{
+						S2P_H5_GCLOSE("UPDATE PARENT\n", parentid);
+					}
 				}
 				if (ascii_tdat != NULL) Py_DECREF(ascii_tdat);
 			}
+			S2P_PHASE(S2P_PCLOSE);
 			s2p_closeallHDF(context);
+			if (ret)
+			{
+				s2p_getProfile(report, context);
+			}
+			s2p_freeProfile(context);
 			s2p_freelinktable(context);
+			s2p_freeskiptable(context);
 			s2p_freenodetable(context);
 			free(context);
 		}
@@ -2629,12 +4256,13 @@ PyObject* s2p_saveAsHDF(char     *dirname,
 			if (PyList_Check(rtree))
 			{
 				sz = PyList_Size(rtree);
-				if (!sz)
+				if (!sz && (context->img_obj == NULL))
 				{
 					Py_INCREF(Py_None);
 					return Py_None;
 				}
 			}
+			S2P_PHASE(S2P_POPEN);
 			l3db = s2p_addoneHDF(dirname, filename, context, 1);
 			if (!L3M_ECHECK(l3db))
 			{
@@ -2661,6 +4289,7 @@ PyObject* s2p_saveAsHDF(char     *dirname,
 						&& !strcmp(clabel, CG_CGNSLibraryVersion_ts))
 					{
 						S2P_TRACE(("# CHL:node [CGNSLibraryVersion]\n"));
+						S2P_PHASE(S2P_PMETA);
 						s2p_getData((PyArrayObject*)PyList_GetItem(otree, 1),
 							&tdat, &ndat, ddat, &vdat,
 							0, 0, context);
@@ -2704,9 +4333,11 @@ PyObject* s2p_saveAsHDF(char     *dirname,
 					}
 					if (ascii_label != NULL) { Py_DECREF(ascii_label); }
 				}
+				S2P_PHASE(S2P_PMETA);
 				s2p_removeMissingChildren(l3db->root_id, tree, context, l3db);
 				if (s2p_atleastonelink(context))
 				{
+					S2P_PHASE(S2P_PLINK);
 					S2P_TRACE(("# CHL:create remaining links\n"));
 					link = context->lnk;
 					while (link != NULL)
@@ -2725,8 +4356,20 @@ PyObject* s2p_saveAsHDF(char     *dirname,
 				}
 			}
 			L3_nodeFree(&node); /* free releases hid_t, before actual close */
+			S2P_PHASE(S2P_PCLOSE);
+			if (ret && (context->img_obj != NULL))
+			{
+				bytes = s2p_getImage(l3db, context);
+				ret = (bytes != NULL);
+			}
 			s2p_closeallHDF(context);
+			if (ret)
+			{
+				s2p_getProfile(report, context);
+			}
+			s2p_freeProfile(context);
 			s2p_freelinktable(context);
+			s2p_freeskiptable(context);
 			s2p_freenodetable(context);
 			free(context);
 		}
@@ -2742,8 +4385,16 @@ PyObject* s2p_saveAsHDF(char     *dirname,
 	STR_FREE(path);
 	DIM_FREE(dims);
 	DIM_FREE(ddat);
-	TRACE_HDF5_LEAK("SAVE LEAVE");
+	/* the context is freed, the debug flag is read from the arguments */
+	if (flags & S2P_FDEBUG)
+	{
+		objlist_status("SAVE LEAVE");
+	}
 
+	if (ret && (bytes != NULL))
+	{
+		return bytes;
+	}
 	if (ret)
 	{
 		Py_INCREF(Py_None);
@@ -2791,22 +4442,873 @@ int s2p_garbage(PyObject *tree)
 int s2p_probe(char *filename, char *path)
 {
 	L3_Cursor_t *l3db = NULL;
-	long l3flag = L3F_DEFAULT;
-	int r;
+	s2p_ctx_t *context = NULL;
+	hid_t id = -1;
+	int r, cached = 0;
 
-	l3db = L3_openFile(filename, L3E_OPEN_RDO, l3flag);
+	S2P_NEWCONTEXTPTR(context);
+	l3db = s2p_getHandle(filename, &cached, context);
+	s2p_freeContext(&context);
 	if (!L3M_ECHECK(l3db))
 	{
+		if (l3db != NULL) { L3_close(&l3db); }
 		return 0;
 	}
 	r = 1;
 	if (path[0] != '\0')
 	{
-		r = L3_path2Node(l3db, path);
+		id = L3_path2Node(l3db, path);
+		r = H5Iis_valid(id) ? 1 : 0;
+		if (r)
+		{
+			S2P_H5_GCLOSE("PROBE\n", id);
+		}
 	}
-	L3_close(&l3db);
+	if (cached)
+	{
+		s2p_putHandle(l3db);
+	}
+	else
+	{
+		L3_close(&l3db);
+	}
+	return r;
+}
+/* ------------------------------------------------------------------------- */
+
+PyObject* s2p_loadData(char     *filename,
+	char     *path,
+	int       flags,
+	PyObject *except)
+{
+	s2p_ctx_t *context = NULL;
+	L3_Cursor_t *l3db = NULL;
+	L3_Node_t *rnode = NULL;
+	PyObject *o_value = NULL;
+	hid_t id = -1;
+	int arraytype = -1, cached = 0;
+
+	CHL_import_array();
+
+	S2P_NEWCONTEXTPTR(context);
+	context->flg = flags;
+	context->err = except;
+	S2P_TRACE(("# CHL:lazy load [%s][%s]\n", filename, path));
+
+	l3db = s2p_getHandle(filename, &cached, context);
+	if (l3db == NULL)
+	{
+		setError(S2P_EFILEUNKWOWN, "Cannot read file [%s]", filename, context);
+		s2p_freeContext(&context);
+		return NULL;
+	}
+	ENTER_NOGIL_BLOCK(1);
+	id = L3_nodeFind(l3db, l3db->root_id, path);
+	if (id != -1)
+	{
+		L3M_NEWNODE(rnode);
+		L3M_SETFLAG(l3db, L3F_WITHDATA);
+		L3M_UNSETFLAG(l3db, L3F_WITHCHILDREN);
+		rnode = L3_nodeRetrieve(l3db, id, rnode);
+	}
+	LEAVE_NOGIL_BLOCK();
+	if (cached)
+	{
+		s2p_putHandle(l3db);
+	}
+	else
+	{
+		L3_close(&l3db);
+	}
+	if (rnode != NULL)
+	{
+		arraytype = s2p_arrayType(rnode->dtype);
+	}
+	if ((arraytype == -1) || (rnode->data == NULL))
+	{
+		setError(S2P_EFAILDATARD, "Cannot read data of node [%s]", path, context);
+		L3_nodeRelease(&rnode, L3F_R_ALL);
+		s2p_freeContext(&context);
+		return NULL;
+	}
+	o_value = s2p_newArray(rnode, arraytype, context);
+	L3_nodeRelease(&rnode, L3F_R_ALL);
+	s2p_freeContext(&context);
 
+	return o_value;
+}
+/* ------------------------------------------------------------------------- */
+/* Close the cached handles of the file, or all the handles if filename is
+   an empty string. Returns the count of closed handles. */
+int s2p_releaseData(char *filename)
+{
+	return s2p_releaseHandle(filename);
+}
+/* ------------------------------------------------------------------------- */
+/* Sets the max count of handles kept open, 0 disables the cache. Returns
+   the previous size. */
+int s2p_setCacheSize(int size)
+{
+	int n, r = s2p_hdlsize;
+
+	if (size < 0) { size = 0; }
+	if (size > S2P_MAX_HANDLE_CACHE) { size = S2P_MAX_HANDLE_CACHE; }
+	s2p_hdlsize = size;
+	n = s2p_hdlcount - 1;
+	while ((n >= 0) && (s2p_hdlcount > s2p_hdlsize))
+	{
+		if (!s2p_hdlcache[n].users)
+		{
+			s2p_dropHandle(n);
+		}
+		n--;
+	}
 	return r;
 }
 /* ------------------------------------------------------------------------- */
+PyObject* s2p_cacheInfo(int reset)
+{
+	PyObject *files, *info, *name;
+	int n;
 
+	files = PyList_New(0);
+	for (n = 0; n < s2p_hdlcount; n++)
+	{
+		name = PyUnicode_DecodeUTF8(s2p_hdlcache[n].filename,
+			strlen(s2p_hdlcache[n].filename), "strict");
+		PyList_Append(files, name);
+		Py_DECREF(name);
+	}
+	info = Py_BuildValue("{s:i,s:l,s:l,s:N}", "size", s2p_hdlsize,
+		"hits", s2p_hdlhits, "misses", s2p_hdlmisses, "files", files);
+	if (reset)
+	{
+		s2p_hdlhits = 0;
+		s2p_hdlmisses = 0;
+	}
+	return info;
+}
+/* ------------------------------------------------------------------------- */
+/* Sets the HDF5 file access tuning, a tuple of sizes (metadata cache,
+   chunk cache, page size, page buffer, sieve buffer) or None for defaults.
+   The idle files of the handle cache are closed, the next load opens them
+   again with the new tuning. */
+int s2p_setAccess(PyObject *access)
+{
+	L3_Access_t acc;
+	int n;
+
+	L3M_CLEARACCESS(acc);
+	if (PyTuple_Check(access) && (PyTuple_Size(access) == 5))
+	{
+		acc.mdcsize = (size_t)PyLong_AsSize_t(PyTuple_GetItem(access, 0));
+		acc.chunkcache = (size_t)PyLong_AsSize_t(PyTuple_GetItem(access, 1));
+		acc.pagesize = (size_t)PyLong_AsSize_t(PyTuple_GetItem(access, 2));
+		acc.pagebuffer = (size_t)PyLong_AsSize_t(PyTuple_GetItem(access, 3));
+		acc.sieve = (size_t)PyLong_AsSize_t(PyTuple_GetItem(access, 4));
+	}
+	L3_setAccess(&acc);
+	for (n = s2p_hdlcount - 1; n >= 0; n--)
+	{
+		if (!s2p_hdlcache[n].users)
+		{
+			s2p_dropHandle(n);
+		}
+	}
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
+PyObject* s2p_accessInfo(void)
+{
+	L3_Access_t acc;
+
+	L3_getAccess(&acc);
+	return Py_BuildValue("{s:n,s:n,s:n,s:n,s:n}",
+		"metadatacache", (Py_ssize_t)acc.mdcsize,
+		"chunkcache", (Py_ssize_t)acc.chunkcache,
+		"pagesize", (Py_ssize_t)acc.pagesize,
+		"pagebuffer", (Py_ssize_t)acc.pagebuffer,
+		"sieve", (Py_ssize_t)acc.sieve);
+}
+/* ------------------------------------------------------------------------- */
+int s2p_setLazyFactory(PyObject *factory)
+{
+	Py_XDECREF(s2p_lazyfactory);
+	Py_XINCREF(factory);
+	s2p_lazyfactory = factory;
+
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
+/* Node iterator: the file is parsed depth first, one node per call, using an
+   explicit stack of children ids. No python tree is built, only the returned
+   node tuple (path, name, label, dtype, dims, value) is created. */
+#define S2P_ITERATOR_NAME "CHLone.iterator"
+
+static void s2p_iterFree(s2p_itr_t *itr)
+{
+	hid_t *children;
+	int l, n;
+	s2p_ctx_t *context;
+
+	if ((itr == NULL) || (itr->ctx == NULL)) { return; }
+	for (l = 0; l <= itr->level; l++)
+	{
+		children = itr->stk[l].children;
+		for (n = itr->stk[l].index; (children != NULL) && (children[n] != -1); n++)
+		{
+			if (H5Iis_valid(children[n]))
+			{
+				H5Gclose(children[n]);
+			}
+		}
+		free(children);
+	}
+	itr->level = -1;
+	free(itr->stk);
+	itr->stk = NULL;
+	Py_XDECREF(itr->types);
+	itr->types = NULL;
+	context = itr->ctx;
+	S2P_TRACE(("# CHL:iterator close\n"));
+	s2p_freeContext(&context);
+	itr->ctx = NULL;
+}
+/* ------------------------------------------------------------------------- */
+static void s2p_iterDestructor(PyObject *capsule)
+{
+	s2p_itr_t *itr;
+
+	itr = (s2p_itr_t*)PyCapsule_GetPointer(capsule, S2P_ITERATOR_NAME);
+	if (itr != NULL)
+	{
+		s2p_iterFree(itr);
+		free(itr);
+	}
+}
+/* ------------------------------------------------------------------------- */
+static int s2p_iterPush(s2p_itr_t *itr, hid_t *children)
+{
+	if (itr->level + 1 == itr->stk_max)
+	{
+		itr->stk_max *= 2;
+		itr->stk = (s2p_itl_t*)realloc(itr->stk, itr->stk_max * sizeof(s2p_itl_t));
+	}
+	itr->level++;
+	itr->stk[itr->level].children = children;
+	itr->stk[itr->level].index = 0;
+	itr->stk[itr->level].plen = strlen(itr->path);
+
+	return itr->level;
+}
+/* ------------------------------------------------------------------------- */
+/* Retrieve node without data, a link node is replaced by its actual node
+   but keeps its own name. Returns NULL if the linked-to node is not found. */
+static L3_Node_t *s2p_iterRetrieve(s2p_itr_t *itr, hid_t id, int withchildren)
+{
+	L3_Cursor_t *l3db;
+	L3_Node_t *rnode = NULL;
+	char destfile[L3C_MAX_FILE];
+	char destnode[L3C_MAX_PATH];
+	char name[L3C_MAX_NAME + 1];
+	int islink = 0;
+
+	l3db = itr->l3db;
+	L3M_NEWNODE(rnode);
+	L3M_UNSETFLAG(l3db, L3F_WITHDATA);
+	L3M_UNSETFLAG(l3db, L3F_WITHCHILDREN);
+	L3M_UNSETFLAG(l3db, L3F_FOLLOWLINKS);
+	if ((itr->ctx->flg & S2P_FFOLLOWLINKS)
+		&& L3_isLinkNode(l3db, id, destfile, destnode))
+	{
+		rnode = L3_nodeRetrieve(l3db, id, rnode);
+		if (rnode == NULL) { return NULL; }
+		strcpy(name, rnode->name);
+		L3M_SETFLAG(l3db, L3F_FOLLOWLINKS | L3F_FAILSONLINK);
+		islink = 1;
+	}
+	if (withchildren)
+	{
+		L3M_SETFLAG(l3db, L3F_WITHCHILDREN);
+	}
+	rnode = L3_nodeRetrieve(l3db, id, rnode);
+	L3M_UNSETFLAG(l3db, L3F_FOLLOWLINKS | L3F_FAILSONLINK);
+	if ((rnode != NULL) && islink)
+	{
+		strcpy(rnode->name, name);
+	}
+	return rnode;
+}
+/* ------------------------------------------------------------------------- */
+PyObject* s2p_iterOpen(char     *dirname,
+	char     *filename,
+	int       flags,
+	int       depth,
+	int       withdata,
+	char     *searchpath,
+	PyObject *types,
+	PyObject *except)
+{
+	s2p_itr_t *itr = NULL;
+	s2p_ctx_t *context = NULL;
+	L3_Node_t *rnode = NULL;
+	hid_t *children = NULL;
+
+	CHL_import_array();
+
+	S2P_NEWCONTEXTPTR(context);
+	context->flg = flags;
+	context->err = except;
+	context->lsp = searchpath;
+	S2P_TRACE(("# CHL:iterator open [%s/%s]\n", dirname, filename));
+
+	itr = (s2p_itr_t*)malloc(sizeof(s2p_itr_t));
+	itr->ctx = context;
+	itr->l3db = s2p_addoneHDF(dirname, filename, context, 1);
+	itr->types = NULL;
+	itr->withdata = withdata;
+	itr->depth = depth;
+	itr->stk_max = 32;
+	itr->stk = (s2p_itl_t*)malloc(itr->stk_max * sizeof(s2p_itl_t));
+	itr->level = -1;
+	itr->path[0] = '\0';
+	if (!L3M_ECHECK(itr->l3db))
+	{
+		s2p_iterFree(itr);
+		free(itr);
+		return NULL;
+	}
+	s2p_setlinksearchpath(itr->l3db, context);
+	context->lsp = NULL;
+	if ((types != NULL) && (types != Py_None))
+	{
+		Py_INCREF(types);
+		itr->types = types;
+	}
+	ENTER_NOGIL_BLOCK(1);
+	rnode = s2p_iterRetrieve(itr, itr->l3db->root_id, 1);
+	if (rnode != NULL)
+	{
+		children = rnode->children;
+		rnode->children = NULL;
+		L3_nodeRelease(&rnode, L3F_R_ALL & ~L3F_R_HID_NODE);
+	}
+	LEAVE_NOGIL_BLOCK();
+	s2p_iterPush(itr, children);
+
+	return PyCapsule_New(itr, S2P_ITERATOR_NAME, s2p_iterDestructor);
+}
+/* ------------------------------------------------------------------------- */
+/* Returns the next node tuple, or None if the iteration is done */
+PyObject* s2p_iterNext(PyObject *iterator, PyObject *except)
+{
+	s2p_itr_t *itr;
+	s2p_itl_t *top;
+	s2p_ctx_t *context;
+	L3_Node_t *rnode = NULL;
+	PyObject *o_node = NULL, *o_label, *o_value, *o_dims;
+	npy_intp npy_dim_vals[NPY_MAXDIMS];
+	hid_t id, *children;
+	int n, ndim, selected, arraytype;
+	char name[L3C_MAX_NAME + 1];
+	char dtype[L3C_MAX_DTYPE + 1];
+
+	itr = (s2p_itr_t*)PyCapsule_GetPointer(iterator, S2P_ITERATOR_NAME);
+	if ((itr == NULL) || (itr->ctx == NULL))
+	{
+		Py_INCREF(Py_None);
+		return Py_None;
+	}
+	context = itr->ctx;
+	context->err = except;
+	while ((o_node == NULL) && (itr->level >= 0))
+	{
+		top = &(itr->stk[itr->level]);
+		if ((top->children == NULL) || (top->children[top->index] == -1))
+		{
+			free(top->children);
+			itr->level--;
+			continue;
+		}
+		id = top->children[top->index];
+		top->index++;
+		itr->path[top->plen] = '\0';
+		ENTER_NOGIL_BLOCK(1);
+		rnode = s2p_iterRetrieve(itr,
+			id, !itr->depth || (itr->level + 1 < itr->depth));
+		LEAVE_NOGIL_BLOCK();
+		if (rnode == NULL)
+		{
+			/* not found linked-to node, as for load the node is ignored */
+			S2P_TRACE(("# CHL:iterator skip link [%s/?]\n", itr->path));
+			if (H5Iis_valid(id)) { H5Gclose(id); }
+			continue;
+		}
+		strcat(itr->path, "/");
+		strcat(itr->path, rnode->name);
+		children = rnode->children;
+		rnode->children = NULL;
+		o_label = PyUnicode_FromString(rnode->label);
+		selected = 1;
+		if (itr->types != NULL)
+		{
+			selected = PySequence_Contains(itr->types, o_label);
+		}
+		if (selected == 1)
+		{
+			ndim = s2p_nodeDims(rnode, npy_dim_vals, context);
+			o_dims = PyTuple_New(ndim);
+			for (n = 0; n < ndim; n++)
+			{
+				PyTuple_SetItem(o_dims, n, PyLong_FromLong((long)npy_dim_vals[n]));
+			}
+			strcpy(dtype, L3_typeAsStr(rnode->dtype));
+			strcpy(name, rnode->name);
+			arraytype = s2p_arrayType(rnode->dtype);
+			if (itr->withdata && (arraytype != -1) && ndim)
+			{
+				ENTER_NOGIL_BLOCK(1);
+				L3M_SETFLAG(itr->l3db, L3F_WITHDATA);
+				L3M_UNSETFLAG(itr->l3db, L3F_WITHCHILDREN);
+				rnode = L3_nodeRetrieve(itr->l3db, rnode->id, rnode);
+				LEAVE_NOGIL_BLOCK();
+			}
+			if ((rnode != NULL) && (rnode->data != NULL))
+			{
+				o_value = s2p_newArray(rnode, arraytype, context);
+			}
+			else
+			{
+				Py_INCREF(Py_None);
+				o_value = Py_None;
+			}
+			o_node = Py_BuildValue("(ssOsNN)", itr->path, name, o_label,
+				dtype, o_dims, o_value);
+		}
+		Py_DECREF(o_label);
+		if (children != NULL)
+		{
+			s2p_iterPush(itr, children);
+		}
+		L3_nodeRelease(&rnode, L3F_R_ALL);
+		if (H5Iis_valid(id))
+		{
+			H5Gclose(id);
+		}
+		if (selected == -1)
+		{
+			return NULL;
+		}
+	}
+	if (o_node == NULL)
+	{
+		Py_INCREF(Py_None);
+		return Py_None;
+	}
+	return o_node;
+}
+/* ------------------------------------------------------------------------- */
+int s2p_iterClose(PyObject *iterator)
+{
+	s2p_itr_t *itr;
+
+	itr = (s2p_itr_t*)PyCapsule_GetPointer(iterator, S2P_ITERATOR_NAME);
+	if ((itr == NULL) || (itr->ctx == NULL))
+	{
+		return 0;
+	}
+	s2p_iterFree(itr);
+
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
+/* Append writer: the file is open for update until the writer is closed,
+   each call writes only its own sub-tree or data. The nodes not in the
+   written sub-trees are never removed. */
+#define S2P_WRITER_NAME "CHLone.writer"
+
+static void s2p_writerFree(s2p_wrt_t *wrt)
+{
+	s2p_ctx_t *context;
+
+	if ((wrt == NULL) || (wrt->ctx == NULL)) { return; }
+	context = wrt->ctx;
+	S2P_TRACE(("# CHL:writer close\n"));
+	s2p_freeContext(&context);
+	wrt->ctx = NULL;
+	wrt->l3db = NULL;
+	Py_XDECREF(wrt->storage);
+	wrt->storage = NULL;
+}
+/* ------------------------------------------------------------------------- */
+static void s2p_writerDestructor(PyObject *capsule)
+{
+	s2p_wrt_t *wrt;
+
+	wrt = (s2p_wrt_t*)PyCapsule_GetPointer(capsule, S2P_WRITER_NAME);
+	if (wrt != NULL)
+	{
+		s2p_writerFree(wrt);
+		free(wrt);
+	}
+}
+/* ------------------------------------------------------------------------- */
+static s2p_wrt_t *s2p_writerGet(PyObject *writer, PyObject *except)
+{
+	s2p_wrt_t *wrt;
+
+	wrt = (s2p_wrt_t*)PyCapsule_GetPointer(writer, S2P_WRITER_NAME);
+	if ((wrt == NULL) || (wrt->ctx == NULL))
+	{
+		return NULL;
+	}
+	wrt->ctx->err = except;
+	L3M_ECLEAR(wrt->l3db);
+
+	return wrt;
+}
+/* ------------------------------------------------------------------------- */
+PyObject* s2p_writerOpen(char     *dirname,
+	char     *filename,
+	int       flags,
+	char     *searchpath,
+	PyObject *storage,
+	PyObject *except)
+{
+	s2p_wrt_t *wrt = NULL;
+	s2p_ctx_t *context = NULL;
+
+	CHL_import_array();
+
+	S2P_NEWCONTEXTPTR(context);
+	context->flg = flags;
+	context->err = except;
+	context->lsp = searchpath;
+	S2P_SETFLAG(S2P_FUPDATE);
+	S2P_CLRFLAG(S2P_FNEW);
+	S2P_CLRFLAG(S2P_FDELETEMISSING);
+	S2P_TRACE(("# CHL:writer open [%s/%s]\n", dirname, filename));
+
+	wrt = (s2p_wrt_t*)malloc(sizeof(s2p_wrt_t));
+	wrt->ctx = context;
+	wrt->storage = NULL;
+	if (PyTuple_Check(storage))
+	{
+		Py_INCREF(storage);
+		wrt->storage = storage;
+		s2p_getStorage(PyTuple_GetItem(storage, 0), &(context->sto_dft));
+		context->sto_typ = PyTuple_GetItem(storage, 1);
+		context->sto_pth = PyTuple_GetItem(storage, 2);
+	}
+	wrt->l3db = s2p_addoneHDF(dirname, filename, context, 1);
+	if (!L3M_ECHECK(wrt->l3db))
+	{
+		s2p_writerFree(wrt);
+		free(wrt);
+		return NULL;
+	}
+	s2p_setlinksearchpath(wrt->l3db, context);
+	context->lsp = NULL;
+	if (S2P_HASFLAG(S2P_FCOMPRESS))
+	{
+		L3M_SETFLAG(wrt->l3db, L3F_COMPRESS);
+	}
+	if (S2P_HASFLAG(S2P_FSWMR) && !L3_startSWMR(wrt->l3db))
+	{
+		setError(S2P_EFAILUPDOPEN, "Cannot start SWMR write on file [%s]",
+			filename, context);
+		s2p_writerFree(wrt);
+		free(wrt);
+		return NULL;
+	}
+
+	return PyCapsule_New(wrt, S2P_WRITER_NAME, s2p_writerDestructor);
+}
+/* ------------------------------------------------------------------------- */
+/* Writes the tree as a child of the parent path, an existing node with the
+   same name is updated */
+PyObject* s2p_writerAppend(PyObject *writer,
+	char     *path,
+	PyObject *tree,
+	PyObject *except)
+{
+	s2p_wrt_t *wrt;
+	s2p_ctx_t *context;
+	hid_t parentid;
+	char *cpath;
+	int ret = 0;
+
+	wrt = s2p_writerGet(writer, except);
+	if (wrt == NULL)
+	{
+		return NULL;
+	}
+	context = wrt->ctx;
+	if (S2P_HASFLAG(S2P_FSWMR))
+	{
+		setError(S2P_ECANNOTCREAT,
+			"Cannot create nodes in SWMR mode [%s]", path, context);
+		return NULL;
+	}
+	if (!path[0] || !strcmp(path, "/"))
+	{
+		parentid = wrt->l3db->root_id;
+		L3_incRef(wrt->l3db, parentid);
+	}
+	else
+	{
+		parentid = L3_nodeFind(wrt->l3db, wrt->l3db->root_id, path);
+	}
+	if (!H5Iis_valid(parentid))
+	{
+		setError(S2P_ECANNOTCREAT,
+			"Append requires an existing parent node [%s]", path, context);
+		return NULL;
+	}
+	STR_ALLOC(cpath, MAXPATHSIZE);
+	if (parentid != wrt->l3db->root_id)
+	{
+		strcpy(cpath, path);
+	}
+	S2P_TRACE(("# CHL:writer append [%s]\n", path));
+	ret = s2p_parseAndWriteHDF(parentid, tree, cpath, "", context, wrt->l3db);
+	s2p_freenodetable(context);
+	S2P_H5_GCLOSE("WRITER PARENT\n", parentid);
+	STR_FREE(cpath);
+	if (!ret)
+	{
+		return NULL;
+	}
+	Py_INCREF(Py_None);
+	return Py_None;
+}
+/* ------------------------------------------------------------------------- */
+/* Appends the array at the end of the last numpy dimension of the node data,
+   the other dimensions should be the same as the stored ones */
+PyObject* s2p_writerExtend(PyObject *writer,
+	char     *path,
+	PyObject *value,
+	PyObject *except)
+{
+	s2p_wrt_t *wrt;
+	s2p_ctx_t *context;
+	L3_Node_t *node = NULL;
+	char *tdat = NULL, *vdat = NULL;
+	int ndat = 0, *ddat, ret = 1;
+	hid_t nid;
+
+	wrt = s2p_writerGet(writer, except);
+	if (wrt == NULL)
+	{
+		return NULL;
+	}
+	context = wrt->ctx;
+	nid = L3_nodeFind(wrt->l3db, wrt->l3db->root_id, path);
+	if (!H5Iis_valid(nid))
+	{
+		setError(S2P_EBADPARTIAL,
+			"Extend requires an existing node [%s]", path, context);
+		return NULL;
+	}
+	DIM_ALLOC(ddat, int, NPY_MAXDIMS);
+	S2P_TRACE(("# CHL:writer extend [%s]\n", path));
+	if (!s2p_getData((PyArrayObject*)value, &tdat, &ndat, ddat, &vdat,
+		S2P_HASFLAG(S2P_FREVERSEDIMS), 0, context))
+	{
+		setError(S2P_EBADPARTIAL,
+			"Extend requires a non empty array for node [%s]", path, context);
+		S2P_H5_GCLOSE("WRITER EXTEND\n", nid);
+		ret = 0;
+	}
+	else
+	{
+		node = L3_nodeSet(wrt->l3db, node, NULL, NULL, ddat,
+			L3_typeAsEnum(tdat), vdat, L3F_NONE);
+		node->id = nid;
+		ENTER_NOGIL_BLOCK(1);
+		L3_nodeExtend(wrt->l3db, node);
+		LEAVE_NOGIL_BLOCK();
+		if (!L3M_ECHECK(wrt->l3db))
+		{
+			setError(S2P_EBADPARTIAL,
+				"Cannot extend data of node [%s]", path, context);
+			ret = 0;
+		}
+		/* data belongs to the array, the free closes the node id */
+		node->data = NULL;
+		L3_nodeFree(&node);
+	}
+	DIM_FREE(ddat);
+	if (!ret)
+	{
+		return NULL;
+	}
+	Py_INCREF(Py_None);
+	return Py_None;
+}
+/* ------------------------------------------------------------------------- */
+int s2p_writerFlush(PyObject *writer)
+{
+	s2p_wrt_t *wrt;
+
+	wrt = (s2p_wrt_t*)PyCapsule_GetPointer(writer, S2P_WRITER_NAME);
+	if ((wrt == NULL) || (wrt->ctx == NULL))
+	{
+		return 0;
+	}
+	return L3_flush(wrt->l3db);
+}
+/* ------------------------------------------------------------------------- */
+int s2p_writerClose(PyObject *writer)
+{
+	s2p_wrt_t *wrt;
+
+	wrt = (s2p_wrt_t*)PyCapsule_GetPointer(writer, S2P_WRITER_NAME);
+	if ((wrt == NULL) || (wrt->ctx == NULL))
+	{
+		return 0;
+	}
+	s2p_writerFree(wrt);
+
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
+/* SWMR reader: the file is open as read only while another process writes
+   it in HDF5 SWMR mode, each read refreshes the node data before the read.
+   The file structure is parsed at open time, new nodes are not seen. */
+#define S2P_READER_NAME "CHLone.reader"
+
+static void s2p_readerFree(s2p_rdr_t *rdr)
+{
+	s2p_ctx_t *context;
+
+	if ((rdr == NULL) || (rdr->ctx == NULL)) { return; }
+	context = rdr->ctx;
+	S2P_TRACE(("# CHL:reader close\n"));
+	s2p_freeContext(&context);
+	rdr->ctx = NULL;
+	rdr->l3db = NULL;
+}
+/* ------------------------------------------------------------------------- */
+static void s2p_readerDestructor(PyObject *capsule)
+{
+	s2p_rdr_t *rdr;
+
+	rdr = (s2p_rdr_t*)PyCapsule_GetPointer(capsule, S2P_READER_NAME);
+	if (rdr != NULL)
+	{
+		s2p_readerFree(rdr);
+		free(rdr);
+	}
+}
+/* ------------------------------------------------------------------------- */
+PyObject* s2p_readerOpen(char     *dirname,
+	char     *filename,
+	int       flags,
+	PyObject *except)
+{
+	s2p_rdr_t *rdr = NULL;
+	s2p_ctx_t *context = NULL;
+
+	CHL_import_array();
+
+	S2P_NEWCONTEXTPTR(context);
+	context->flg = flags;
+	context->err = except;
+	S2P_SETFLAG(S2P_FSWMR);
+	S2P_CLRFLAG(S2P_FUPDATE);
+	S2P_CLRFLAG(S2P_FNEW);
+	S2P_TRACE(("# CHL:reader open [%s/%s]\n", dirname, filename));
+
+	rdr = (s2p_rdr_t*)malloc(sizeof(s2p_rdr_t));
+	rdr->ctx = context;
+	rdr->l3db = s2p_addoneHDF(dirname, filename, context, 1);
+	if (!L3M_ECHECK(rdr->l3db))
+	{
+		s2p_readerFree(rdr);
+		free(rdr);
+		return NULL;
+	}
+
+	return PyCapsule_New(rdr, S2P_READER_NAME, s2p_readerDestructor);
+}
+/* ------------------------------------------------------------------------- */
+/* Returns the last flushed data of the node, None if the node has no data */
+PyObject* s2p_readerRead(PyObject *reader,
+	char     *path,
+	PyObject *except)
+{
+	s2p_rdr_t *rdr;
+	s2p_ctx_t *context;
+	L3_Node_t *rnode = NULL;
+	PyObject *o_value = NULL;
+	hid_t id;
+	int arraytype = -1;
+
+	rdr = (s2p_rdr_t*)PyCapsule_GetPointer(reader, S2P_READER_NAME);
+	if ((rdr == NULL) || (rdr->ctx == NULL))
+	{
+		return NULL;
+	}
+	context = rdr->ctx;
+	context->err = except;
+	L3M_ECLEAR(rdr->l3db);
+	S2P_TRACE(("# CHL:reader read [%s]\n", path));
+	id = L3_nodeFind(rdr->l3db, rdr->l3db->root_id, path);
+	if (!H5Iis_valid(id))
+	{
+		setError(S2P_EFAILDATARD, "Cannot find node [%s]", path, context);
+		return NULL;
+	}
+	ENTER_NOGIL_BLOCK(1);
+	if (L3_nodeRefresh(rdr->l3db, id))
+	{
+		L3M_NEWNODE(rnode);
+		L3M_SETFLAG(rdr->l3db, L3F_WITHDATA);
+		L3M_UNSETFLAG(rdr->l3db, L3F_WITHCHILDREN);
+		rnode = L3_nodeRetrieve(rdr->l3db, id, rnode);
+	}
+	LEAVE_NOGIL_BLOCK();
+	if (!L3M_ECHECK(rdr->l3db))
+	{
+		setError(S2P_EFAILDATARD, "Cannot refresh data of node [%s]", path,
+			context);
+		L3_nodeRelease(&rnode, L3F_R_ALL);
+		if (H5Iis_valid(id)) { S2P_H5_GCLOSE("READER NODE\n", id); }
+		return NULL;
+	}
+	if (rnode == NULL)
+	{
+		S2P_H5_GCLOSE("READER NODE\n", id);
+		Py_INCREF(Py_None);
+		return Py_None;
+	}
+	arraytype = s2p_arrayType(rnode->dtype);
+	if ((arraytype == -1) || (rnode->data == NULL))
+	{
+		Py_INCREF(Py_None);
+		o_value = Py_None;
+	}
+	else
+	{
+		o_value = s2p_newArray(rnode, arraytype, context);
+	}
+	L3_nodeRelease(&rnode, L3F_R_ALL);
+
+	return o_value;
+}
+/* ------------------------------------------------------------------------- */
+int s2p_readerClose(PyObject *reader)
+{
+	s2p_rdr_t *rdr;
+
+	rdr = (s2p_rdr_t*)PyCapsule_GetPointer(reader, S2P_READER_NAME);
+	if ((rdr == NULL) || (rdr->ctx == NULL))
+	{
+		return 0;
+	}
+	s2p_readerFree(rdr);
+
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
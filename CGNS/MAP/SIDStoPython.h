@@ -55,9 +55,9 @@
 #define S2P_FCONTIGUOUS    0x00020000 /* RESERVED */
 #define S2P_FINTERLACED    0x00040000 /* RESERVED */
 #define S2P_FCHECKSUM      0x00080000 /* USED */
-#define S2P_FLAG23         0x00100000 /* RESERVED */
-#define S2P_FLAG24         0x00200000 /* RESERVED */
-#define S2P_FLAG25         0x00400000 /* RESERVED */
+#define S2P_FMEMMAP        0x00100000 /* USED */
+#define S2P_FLAZYDATA      0x00200000 /* USED */
+#define S2P_FSWMR          0x00400000 /* USED */
 #define S2P_FLAG26         0x00800000 /* RESERVED */
 #define S2P_FLAG27         0x01000000 /* RESERVED */
 #define S2P_FLAG28         0x02000000 /* RESERVED */
@@ -76,9 +76,12 @@
 #define S2P_EFAILUPDOPEN 103
 #define S2P_EFAILNEWOPEN 104
 #define S2P_EFAILLNKOPEN 105
+#define S2P_EFAILDATARD  106
 #define S2P_EBADSTRUCTOB 200
 #define S2P_ECANNOTCREAT 201
 #define S2P_EDUPLICATEUP 202
+#define S2P_EBADPARTIAL  203
+#define S2P_EFAILALLOC   204
 #define S2P_EBADTREEROOT 300
 #define S2P_EMAXLINKSTCK 400
 #define S2P_EMAXCTGINDEX 1024
@@ -104,6 +107,7 @@ typedef struct s2p_ent_t
   char   	   *filename;
   char   	   *dirname;
   L3_Cursor_t 	   *l3db;
+  int               cached;  /* l3db belongs to the handle cache */
   struct s2p_ent_t *next;
 } s2p_ent_t;
 
@@ -131,6 +135,76 @@ typedef struct s2p_pth_t
   struct s2p_pth_t *next;
 } s2p_pth_t;
 
+/* ------------------------------------------------------------------------- */
+typedef struct s2p_idx_t
+{
+  char      **key;  /* node paths, NULL marks an empty slot */
+  void      **val;  /* value of the node path in the same slot */
+  int         max;  /* allocated slots (power of 2) */
+  int         cur;  /* count of used slots */
+} s2p_idx_t;
+
+/* ------------------------------------------------------------------------- */
+typedef struct s2p_rdq_t
+{
+  char       *filename;/* file name, shared with the other entries of this file */
+  int         node;    /* node index in the deferred read path list */
+  void       *base;    /* allocated memory of the whole node data */
+  L3_Block_t  block;   /* raw data block to read into base */
+  int         status;  /* 1 if read is ok */
+} s2p_rdq_t;
+
+/* ------------------------------------------------------------------------- */
+typedef struct s2p_hdl_t
+{
+  char         filename[L3C_MAX_FILE];/* real path of the file, cache key */
+  long         ino;                   /* file stat when the handle is open */
+  long         size;
+  long         mtime;
+  long         mtime_ns;
+  int          users;                 /* 1 if the handle is in use */
+  L3_Cursor_t *l3db;                  /* read-only handle kept open */
+} s2p_hdl_t;
+
+/* max and default number of read-only handles kept open between loads,
+   the cache is disabled by default */
+#define S2P_MAX_HANDLE_CACHE 64
+#define S2P_DFT_HANDLE_CACHE 0
+
+/* ------------------------------------------------------------------------- */
+/* profile phases, the time of a phase excludes the time of the others */
+#define S2P_PNONE   -1
+#define S2P_POPEN    0 /* file open or handle cache lookup */
+#define S2P_PMETA    1 /* node name, label, type, dims and children */
+#define S2P_PLINK    2 /* link resolution or creation */
+#define S2P_PDATA    3 /* node data read or write */
+#define S2P_PPYTHON  4 /* python objects creation or parse, checksum */
+#define S2P_PCLOSE   5 /* file flush and close */
+#define S2P_PMAX     6
+
+typedef struct s2p_prn_t
+{
+  char   path[L3C_MAX_PATH];
+  double time;   /* node time, children excluded */
+  long   bytes;  /* node data bytes read or written */
+} s2p_prn_t;
+
+typedef struct s2p_prf_t
+{
+  int         phase;           /* current phase */
+  double      start;           /* current phase start time */
+  double      begin;           /* profile start time */
+  double      time[S2P_PMAX];  /* time per phase */
+  long        bytes;           /* node data bytes read or written */
+  long        nodes;           /* count of parsed nodes */
+  long        files;           /* count of files opened or found in cache */
+  long        cached;          /* count of files found in handle cache */
+  L3_Stats_t  stats;           /* HDF5 objects count of all files */
+  s2p_prn_t  *top;             /* slowest nodes, by decreasing time */
+  int         top_max;         /* max count of slowest nodes */
+  int         top_cur;         /* count of slowest nodes */
+} s2p_prf_t;
+
 /* should not have more than MAX link depth entries */
 #define S2P_MAX_LINK_STACK L3C_MAX_LINK_DEPTH+1024
 
@@ -138,7 +212,10 @@ typedef struct s2p_pth_t
 typedef struct s2p_ctx_t
 {
   s2p_pth_t *pth;
+  s2p_pth_t *pth_end;/* last entry of path table */
   s2p_lnk_t *lnk;
+  s2p_lnk_t *lnk_end;/* last entry of link table */
+  s2p_idx_t  lnk_idx;/* link table index by source node path */
   s2p_ent_t *hdf_dbs;                     /* open file entries */
   s2p_ent_t *hdf_stk[S2P_MAX_LINK_STACK]; /* file entries stack */
   int        hdf_idx;                     /* current file entry */
@@ -152,18 +229,75 @@ typedef struct s2p_ctx_t
   void      *ctg_siz[S2P_EMAXCTGINDEX];/* max rank for contiguous objects */
   PyObject  *skp_pth;/* list of paths to ignore */
   PyObject  *skp_pth_lk;/* list of paths to ignore wrt linked-to file */
+  s2p_idx_t  skp_idx;/* index of the paths to ignore */
   PyObject  *err;
-  PyObject **pol_oid;/* parsed object list adresses for loop detection */
-  int        pol_max;/* max allocated of parsed object list */
-  int        pol_cur;/* current index of last used parsed object list */
+  PyObject **pol_oid;/* parsed object hash set adresses for loop detection */
+  int        pol_max;/* allocated slots of parsed object set (power of 2) */
+  int        pol_cur;/* count of used slots of parsed object set */
   unsigned char checksum[32];/* on the fly checksum buffer */
   sha256_t  *sha256;/* on the fly checksum private structure */
   PyGILState_STATE gstate;
   long       flg;
   char      *lsp;
   int        platform;/* unix (0) windows (1) */
+  int        thr;/* worker threads for data read, 0 means serial read */
+  s2p_rdq_t *rdq;/* deferred raw data read queue */
+  int        rdq_max;/* max allocated of deferred read queue */
+  int        rdq_cur;/* count of used entries of deferred read queue */
+  char     **rdq_fnm;/* file names used by deferred read queue */
+  int        rdq_fnc;/* count of file names used by deferred read queue */
+  char     **rdq_pth;/* node paths used by deferred read queue */
+  int        rdq_npt;/* count of node paths used by deferred read queue */
+  PyObject  *map_dct;/* dict of file name/whole file memmap for FMEMMAP */
+  L3_Storage_t sto_dft;/* default data creation policy */
+  PyObject  *sto_typ;/* dict of SIDS type/creation policy tuple */
+  PyObject  *sto_pth;/* dict of node path/creation policy tuple */
+  char     **sub_lst;/* sorted paths of a multiple paths load */
+  int        sub_cnt;/* count of paths of a multiple paths load */
+  PyObject  *img_obj;/* file image buffer for loads, True for dumps */
+  PyObject  *rdt_obj;/* tuple of (stored, in-memory) data type pairs */
+  char      *rdt_err;/* first node path with a failed type conversion */
+  s2p_prf_t *prf;/* profile counters, NULL if no profile */
+  PyObject  *dgs_obj;/* dict of node path/subtree digest, NULL if none */
 } s2p_ctx_t;
 
+/* ------------------------------------------------------------------------- */
+typedef struct s2p_itl_t
+{
+  hid_t *children;/* children ids of a visited node, -1 terminated */
+  int    index;   /* next child to visit */
+  int    plen;    /* path length of the visited node */
+} s2p_itl_t;
+
+/* ------------------------------------------------------------------------- */
+typedef struct s2p_itr_t
+{
+  s2p_ctx_t   *ctx;     /* load context, flags and open file */
+  L3_Cursor_t *l3db;    /* file handle */
+  PyObject    *types;   /* SIDS types to return, NULL means all */
+  int          withdata;/* 1 if returned nodes have their data */
+  int          depth;   /* max depth, 0 means no limit */
+  s2p_itl_t   *stk;     /* stack of visited nodes, one entry per level */
+  int          stk_max; /* allocated entries of stack */
+  int          level;   /* current stack entry, -1 when iteration is done */
+  char         path[L3C_MAX_PATH];
+} s2p_itr_t;
+
+/* ------------------------------------------------------------------------- */
+typedef struct s2p_wrt_t
+{
+  s2p_ctx_t   *ctx;     /* save context, flags and storage policy */
+  L3_Cursor_t *l3db;    /* file handle, open for update until close */
+  PyObject    *storage; /* storage policy tuple used by ctx */
+} s2p_wrt_t;
+
+/* ------------------------------------------------------------------------- */
+typedef struct s2p_rdr_t
+{
+  s2p_ctx_t   *ctx;     /* load context and flags */
+  L3_Cursor_t *l3db;    /* file handle, SWMR read only until close */
+} s2p_rdr_t;
+
 #define S2P_PLATFORM_UNIX    0
 #define S2P_PLATFORM_WINDOWS 1
 
@@ -173,11 +307,18 @@ PyObject* s2p_loadAsHDF(char      *dirname,
 			int        flags,
 			int        depth,
 			int        maxdata,
+			int        threads,
 			char      *path,
+			PyObject  *subpaths,
 			char      *searchpath,
 			PyObject  *update,
 			PyObject  *filter,
             PyObject  *skip,
+			PyObject  *readtypes,
+			PyObject  *image,
+			int        profile,
+			PyObject  *report,
+			PyObject  *digests,
 			PyObject  *except);
 /* ------------------------------------------------------------------------- */
 PyObject* s2p_saveAsHDF(char      *dirname,
@@ -192,11 +333,57 @@ PyObject* s2p_saveAsHDF(char      *dirname,
 			PyObject  *skip,
 			PyObject  *lkupdate,
 			PyObject  *lkskip,
+			PyObject  *storage,
+			PyObject  *image,
+			int        profile,
+			PyObject  *report,
 			PyObject  *except);
 /* ------------------------------------------------------------------------- */
 int s2p_probe(char *filename,char *path);
 int s2p_garbage(PyObject *tree);
 /* ------------------------------------------------------------------------- */
+PyObject* s2p_loadData(char      *filename,
+		       char      *path,
+		       int        flags,
+		       PyObject  *except);
+int s2p_releaseData(char *filename);
+int s2p_setCacheSize(int size);
+PyObject* s2p_cacheInfo(int reset);
+int s2p_setAccess(PyObject *access);
+PyObject* s2p_accessInfo(void);
+int s2p_setLazyFactory(PyObject *factory);
+/* ------------------------------------------------------------------------- */
+PyObject* s2p_iterOpen(char      *dirname,
+		       char      *filename,
+		       int        flags,
+		       int        depth,
+		       int        withdata,
+		       char      *searchpath,
+		       PyObject  *types,
+		       PyObject  *except);
+PyObject* s2p_iterNext(PyObject *iterator, PyObject *except);
+int s2p_iterClose(PyObject *iterator);
+/* ------------------------------------------------------------------------- */
+PyObject* s2p_writerOpen(char      *dirname,
+			 char      *filename,
+			 int        flags,
+			 char      *searchpath,
+			 PyObject  *storage,
+			 PyObject  *except);
+PyObject* s2p_writerAppend(PyObject *writer, char *path, PyObject *tree,
+			   PyObject *except);
+PyObject* s2p_writerExtend(PyObject *writer, char *path, PyObject *value,
+			   PyObject *except);
+int s2p_writerFlush(PyObject *writer);
+int s2p_writerClose(PyObject *writer);
+/* ------------------------------------------------------------------------- */
+PyObject* s2p_readerOpen(char      *dirname,
+			 char      *filename,
+			 int        flags,
+			 PyObject  *except);
+PyObject* s2p_readerRead(PyObject *reader, char *path, PyObject *except);
+int s2p_readerClose(PyObject *reader);
+/* ------------------------------------------------------------------------- */
 
 #endif
 
@@ -12,7 +12,19 @@
 #
 from .EmbeddedCHLone import load
 from .EmbeddedCHLone import save
+from .EmbeddedCHLone import loads
+from .EmbeddedCHLone import dumps
 from .EmbeddedCHLone import probe
+from .EmbeddedCHLone import release
+from .EmbeddedCHLone import cache
+from .EmbeddedCHLone import access
+from .EmbeddedCHLone import iterate
+from .EmbeddedCHLone import snapshot
+from .EmbeddedCHLone import untrack
+from .EmbeddedCHLone import digests
+from .EmbeddedCHLone import Writer
+from .EmbeddedCHLone import Reader
+from .EmbeddedCHLone import SharedTree
 from .EmbeddedCHLone import CHLoneException as error
 #
 from . import EmbeddedCHLone as CHL
@@ -38,6 +50,10 @@ S2P_DEFAULT = CHL.FDEFAULT
 S2P_DEFAULTS = CHL.FDEFAULTS
 S2P_KEEPLIST = CHL.FKEEPLIST
 S2P_CHECKSUM = CHL.FCHECKSUM
+MEMMAP = CHL.FMEMMAP
+S2P_MEMMAP = CHL.FMEMMAP
+S2P_LAZYDATA = CHL.FLAZYDATA
+S2P_SWMR = CHL.FSWMR
 
 S2P_LKOK = CHL.LKOK
 S2P_LKFAIL = CHL.LKFAIL
@@ -69,6 +85,9 @@ DEFAULT = CHL.FDEFAULT
 DEFAULTS = CHL.FDEFAULTS
 KEEPLIST = CHL.FKEEPLIST
 CHECKSUM = CHL.FCHECKSUM
+MEMMAP = CHL.FMEMMAP
+LAZYDATA = CHL.FLAZYDATA
+SWMR = CHL.FSWMR
 
 LKOK = CHL.LKOK
 LKFAIL = CHL.LKFAIL
@@ -79,4 +98,7 @@ LKNONODE = CHL.LKNONODE
 LKLOOP = CHL.LKLOOP
 LKIGNORED = CHL.LKIGNORED
 
+SPARTIAL = CHL.SPARTIAL
+SCONTIGUOUS = CHL.SCONTIGUOUS
+
 # --- last line
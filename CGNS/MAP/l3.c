@@ -55,6 +55,9 @@ static char *L3T_R8_s = L3T_R8;
 
 int __node_count = 0;
 
+/* file access tuning of the next file open, see L3_setAccess */
+static L3_Access_t HDF_Access = { 0, 0, 0, 0, 0 };
+
 /* ------------------------------------------------------------------------- */
 /* WATCH OUT ! PASSING A FUNCTION AS arg will DUPLICATE THE CALL             */
 /* ------------------------------------------------------------------------- */
@@ -190,13 +193,6 @@ static herr_t find_name(hid_t id, const char *nm, const H5A_info_t* i, void *snm
 	return 0;
 }
 /* ------------------------------------------------------------------------- */
-static herr_t gfind_name(hid_t id, const char *nm, void *snm)
-{
-	/*  printf("GFIND [%s][%s]\n",nm,snm);fflush(stdout); */
-	if (!strcmp(nm, (char *)snm)) return 1;
-	return 0;
-}
-/* ------------------------------------------------------------------------- */
 int findExternalLink(hid_t g_id, const char * name,
 	const H5L_info_t * info, void * op_data)
 {
@@ -207,10 +203,11 @@ int findExternalLink(hid_t g_id, const char * name,
 	return 0;
 }
 /* ------------------------------------------------------------------------- */
+/* direct link lookup, do not iterate on all children of the group */
 #define has_data(ID) \
-H5Giterate(ID,".",NULL,gfind_name,(void *)L3S_DATA)
+H5Lexists(ID,L3S_DATA,H5P_DEFAULT)
 #define has_child(ID,NAME) \
-H5Giterate(ID,".",NULL,gfind_name,(void *)NAME)
+H5Lexists(ID,NAME,H5P_DEFAULT)
 
 /* ------------------------------------------------------------------------- */
 static herr_t HDF_Print_Error(unsigned n, H5E_error2_t *desc, void *ctxt)
@@ -270,7 +267,8 @@ CHL_INLINE hid_t ADF_to_HDF_datatype(const char *tp)
 	return 0;
 }
 /* ------------------------------------------------------------------------- */
-CHL_INLINE int HDF_Get_Attribute_As_Integer(hid_t nodeid,
+CHL_INLINE int HDF_Get_Attribute_As_Integer(L3_Cursor_t *ctxt,
+	hid_t nodeid,
 	const char *name,
 	int *value)
 {
@@ -278,6 +276,7 @@ CHL_INLINE int HDF_Get_Attribute_As_Integer(hid_t nodeid,
 	herr_t status;
 
 	aid = H5Aopen_name(nodeid, name);
+	L3M_STAT(ctxt, attributes);
 	if (aid < 0)
 	{
 		return 0; /* bad return, cannot decide error/value ? */
@@ -302,6 +301,7 @@ CHL_INLINE char *HDF_Get_Attribute_As_String(L3_Cursor_t *ctxt,
 
 	value[0] = '\0';
 	aid = H5Aopen_name(nodeid, name);
+	L3M_STAT(ctxt, attributes);
 	if (aid < 0)
 	{
 		return value;
@@ -328,6 +328,7 @@ CHL_INLINE char *HDF_Get_Dtype(L3_Cursor_t *ctxt,
 
 	value[0] = '\0';
 	aid = H5Aopen_name(nodeid, L3S_DTYPE);
+	L3M_STAT(ctxt, attributes);
 	if (aid < 0)
 	{
 		return value;
@@ -352,6 +353,7 @@ CHL_INLINE char *HDF_Get_Name(L3_Cursor_t *ctxt,
 	hid_t aid, tid;
 	value[0] = '\0';
 	aid = H5Aopen_name(nodeid, L3S_NAME);
+	L3M_STAT(ctxt, attributes);
 	if (aid < 0)
 	{
 		return value;
@@ -379,6 +381,7 @@ CHL_INLINE char *HDF_Get_Label(L3_Cursor_t *ctxt,
 
 	value[0] = '\0';
 	aid = H5Aopen_name(nodeid, L3S_LABEL);
+	L3M_STAT(ctxt, attributes);
 	if (aid < 0)
 	{
 		return value;
@@ -412,12 +415,17 @@ CHL_INLINE char *HDF_Get_Attribute_As_Data(hid_t nodeid,
 	return value;
 }
 /* ----------------------------------------------------------------- */
+CHL_INLINE int is_link_dtype(char *ntype)
+{
+	return ((ntype[0] != L3T_LK[0]) && (ntype[1] != L3T_LK[1])) ? 0 : 1;
+}
+/* ----------------------------------------------------------------- */
 CHL_INLINE int is_link(L3_Cursor_t *ctxt, hid_t nodeid)
 {
 	char ntype[L3C_MAX_DTYPE + 1];
 
 	HDF_Get_Dtype(ctxt, nodeid, ntype);
-	return ((ntype[0] != L3T_LK[0]) && (ntype[1] != L3T_LK[1])) ? 0 : 1;
+	return is_link_dtype(ntype);
 }
 /* ----------------------------------------------------------------- */
 static hid_t get_link_actual_id(L3_Cursor_t *ctxt, hid_t id)
@@ -469,11 +477,13 @@ static hid_t get_link_actual_id(L3_Cursor_t *ctxt, hid_t id)
 				free(ctxt->currentpath);
 			}
 			ctxt->currentpath = (char*)malloc(strlen(dfile) + 1);
+			strcpy(ctxt->currentpath, dfile);
 			H5Pset_elink_prefix(ctxt->l_proplist, ctxt->currentpath);
 			if ((lid = H5Gopen2(id, L3S_LINK, H5P_DEFAULT)) < 0)
 			{
 				return -1;
 			}
+			L3M_STAT(ctxt, groups);
 			L3_T_ID("GL1", lid);
 		}
 		else
@@ -482,6 +492,7 @@ static hid_t get_link_actual_id(L3_Cursor_t *ctxt, hid_t id)
 			{
 				return -1;
 			}
+			L3M_STAT(ctxt, groups);
 			L3_T_ID("GL3", lid);
 		}
 	}
@@ -491,6 +502,7 @@ static hid_t get_link_actual_id(L3_Cursor_t *ctxt, hid_t id)
 		{
 			return -1;
 		}
+		L3M_STAT(ctxt, groups);
 		L3_T_ID("GL2", lid);
 	}
 	return lid;
@@ -569,34 +581,27 @@ static herr_t print_children(hid_t id, const char *name, const H5L_info_t *info,
 	return 0;
 }
 /* ------------------------------------------------------------------------- */
-static herr_t count_children(hid_t id, const char *name, void *count)
+typedef struct HDF_Children_t
 {
-	if (name && (name[0] != ' '))
-	{
-		(*((int *)count))++;
-	}
-	return 0;
-}
-/* ------------------------------------------------------------------------- */
+	hid_t *ids;   /* children ids, last is -1 */
+	int    count; /* count of children ids */
+	int    max;   /* allocated ids, without the sentinel */
+} HDF_Children_t;
+
 static herr_t feed_children_ids_list(hid_t id, const char *name,
-	const H5L_info_t *linfo, void *idlist)
+	const H5L_info_t *linfo, void *children)
 {
-	hid_t cid;
-	int n;
+	HDF_Children_t *clist;
 
+	clist = (HDF_Children_t *)children;
 	/* skip names starting with a <space> */
-	if (name && (name[0] == ' '))
+	if ((name == NULL) || (name[0] == ' ') || (clist->count == clist->max))
 	{
 		return 0;
 	}
-	cid = H5Gopen(id, name, H5P_DEFAULT);
-	/* L3_T_ID("FCH",cid); */
-	n = 0;
-	while (((hid_t*)idlist)[n] + 1) /* != -1 */
-	{
-		n++;
-	}
-	((hid_t*)idlist)[n] = cid;
+	clist->ids[clist->count] = H5Gopen(id, name, H5P_DEFAULT);
+	/* L3_T_ID("FCH",clist->ids[clist->count]); */
+	clist->count++;
 	return 0;
 }
 /* ------------------------------------------------------------------------- */
@@ -620,48 +625,95 @@ char *backToParent(char *path)
 	return path;
 }
 /* ------------------------------------------------------------------------- */
-hid_t *HDF_Get_Children(hid_t nodeid, int asciiorder)
+hid_t *HDF_Get_Children(L3_Cursor_t *ctxt, hid_t nodeid, int asciiorder)
 {
-	hid_t *idlist, gpl;
-	int    nchildren, n;
+	HDF_Children_t clist;
+	H5G_info_t ginfo;
+	H5_index_t index;
+	hid_t gpl;
 	unsigned order = 0;
+	int n;
 
-	nchildren = 0;
-	/* order not used here */
-	H5Giterate(nodeid, ".", NULL, count_children, (void *)&nchildren);
-	if (!nchildren)
+	/* the link count includes the <space> names (data, link...),
+	   then the list may be a bit larger than the children count */
+	if ((H5Gget_info(nodeid, &ginfo) < 0) || (ginfo.nlinks == 0))
 	{
 		return NULL;
 	}
-	idlist = (hid_t*)malloc(sizeof(hid_t)*(nchildren + 1));
-
+	clist.max = (int)ginfo.nlinks;
+	clist.count = 0;
+	clist.ids = (hid_t*)malloc(sizeof(hid_t)*(clist.max + 1));
 	/* use last -1 as sentinel */
-	for (n = 0; n <= nchildren; n++) { idlist[n] = (hid_t)-1; }
-	/* order used here - if creation fails use name */
-	gpl = H5Gget_create_plist(nodeid);
-	if (H5Iis_valid(gpl))
+	for (n = 0; n <= clist.max; n++) { clist.ids[n] = (hid_t)-1; }
+
+	/* order used here - if creation order is not tracked use name */
+	index = H5_INDEX_NAME;
+	if (!asciiorder)
+	{
+		gpl = H5Gget_create_plist(nodeid);
+		if (H5Iis_valid(gpl))
+		{
+			H5Pget_link_creation_order(gpl, &order);
+			H5Pclose(gpl);
+		}
+		if ((order & H5_INDEX_CRT_ORDER) == H5_INDEX_CRT_ORDER)
+		{
+			index = H5_INDEX_CRT_ORDER;
+		}
+	}
+	if ((H5Literate(nodeid, index, H5_ITER_INC, NULL,
+		feed_children_ids_list, (void *)&clist) < 0)
+		&& (index == H5_INDEX_CRT_ORDER) && (clist.count == 0))
+	{
+		H5Literate(nodeid, H5_INDEX_NAME, H5_ITER_INC, NULL,
+			feed_children_ids_list, (void *)&clist);
+	}
+	if (clist.count == 0)
 	{
-		H5Pget_link_creation_order(gpl, &order);
+		free(clist.ids);
+		return NULL;
 	}
-	if (!asciiorder && ((order & H5_INDEX_CRT_ORDER) == H5_INDEX_CRT_ORDER))
+	if (ctxt != NULL) { ctxt->stats.groups += clist.count; }
+	return clist.ids;
+}
+/* ------------------------------------------------------------------------- */
+static hid_t HDF_Native_Type(int dtype)
+{
+	switch (dtype)
 	{
-		H5Literate(nodeid, H5_INDEX_CRT_ORDER, H5_ITER_INC,
-			NULL, feed_children_ids_list, (void *)idlist);
+	case L3E_I4: case L3E_I4ptr: return H5T_NATIVE_INT32;
+	case L3E_I8: case L3E_I8ptr: return H5T_NATIVE_INT64;
+	case L3E_R4: case L3E_R4ptr: return H5T_NATIVE_FLOAT;
+	case L3E_R8: case L3E_R8ptr: return H5T_NATIVE_DOUBLE;
+	default: return -1;
 	}
-	if ((nchildren > 0) && (idlist[0] == -1))
+}
+/* ------------------------------------------------------------------------- */
+/* in-memory type of the read of a node data of the stored dtype */
+static int HDF_Read_Type(L3_Cursor_t *ctxt, int dtype)
+{
+	if ((dtype < 0) || (dtype > L3E_VOID) || L3M_HASFLAG(ctxt, L3F_NOALLOCATE))
 	{
-		H5Literate(nodeid, H5_INDEX_NAME, H5_ITER_INC,
-			NULL, feed_children_ids_list, (void *)idlist);
+		return dtype;
 	}
-	if (H5Iis_valid(gpl))
+	return ctxt->readtype[dtype];
+}
+/* ------------------------------------------------------------------------- */
+/* a value out of the range of the in-memory type aborts the read, the other
+   exceptions (precision, truncation) use the HDF5 default conversion */
+static H5T_conv_ret_t HDF_Conv_Range(H5T_conv_except_t except, hid_t src_id,
+	hid_t dst_id, void *src_buf, void *dst_buf, void *user_data)
+{
+	if ((except == H5T_CONV_EXCEPT_RANGE_HI)
+		|| (except == H5T_CONV_EXCEPT_RANGE_LOW))
 	{
-		H5Pclose(gpl);
+		return H5T_CONV_ABORT;
 	}
-	return idlist;
+	return H5T_CONV_UNHANDLED;
 }
 /* ------------------------------------------------------------------------- */
 void *HDF_Read_Array(L3_Cursor_t *ctxt, hid_t nid, hid_t did, hid_t yid,
-	void *data, hsize_t *int_dim_vals)
+	hid_t xid, void *data, hsize_t *int_dim_vals)
 {
 	herr_t stat;
 	int n;
@@ -703,9 +755,20 @@ void *HDF_Read_Array(L3_Cursor_t *ctxt, hid_t nid, hid_t did, hid_t yid,
 	{
 		L3M_DBG(ctxt, ("HDF_Read_Array NO ALLOCATE %p from %d @@@\n", data, nid));
 	}
-	stat = H5Dread(did, yid, H5S_ALL, H5S_ALL, H5P_DEFAULT, data);
+	stat = H5Dread(did, yid, H5S_ALL, H5S_ALL, xid, data);
 
 	L3M_DBG(ctxt, ("HDF_Read_Array status [%d]\n", stat));
+	if ((stat < 0) && (xid != H5P_DEFAULT))
+	{
+		/* type conversion aborted, see HDF_Conv_Range */
+		HDF_Get_Name(ctxt, nid, name);
+		CHL_setError(ctxt, 3029, name);
+		if (!L3M_HASFLAG(ctxt, L3F_NOALLOCATE))
+		{
+			free(data);
+		}
+		return NULL;
+	}
 	return data;
 }
 /* ------------------------------------------------------------------------- */
@@ -743,6 +806,7 @@ int HDF_Get_DataDimensions(L3_Cursor_t *ctxt, hid_t nid, int *dims)
 	L3M_CLEARDIMS(int_dim_vals);
 
 	did = H5Dopen2(nid, L3S_DATA, H5P_DEFAULT);
+	L3M_STAT(ctxt, datasets);
 	sid = H5Dget_space(did);
 	ndims = H5Sget_simple_extent_ndims(sid);
 	H5Sget_simple_extent_dims(sid, int_dim_vals, NULL);
@@ -804,6 +868,7 @@ void *HDF_Get_DataArrayPartial(L3_Cursor_t *ctxt, hid_t nid, int *dst_dims,
 	herr_t stat;
 
 	did = H5Dopen2(nid, L3S_DATA, H5P_DEFAULT);
+	L3M_STAT(ctxt, datasets);
 	sid = H5Dget_space(did);
 	src_ndims = H5Sget_simple_extent_ndims(sid);
 	H5Sget_simple_extent_dims(sid, src_dim_vals, NULL);
@@ -899,7 +964,8 @@ void *HDF_Get_DataArrayPartial(L3_Cursor_t *ctxt, hid_t nid, int *dst_dims,
 /* ------------------------------------------------------------------------- */
 void *HDF_Get_DataArray(L3_Cursor_t *ctxt, hid_t nid, int *dims, void *data)
 {
-	hid_t tid, did, yid;
+	hid_t tid, did, yid, xid = H5P_DEFAULT;
+	int dt, rt;
 	char  buff[L3C_MAX_ATTRIB_SIZE + 1];
 	char  name[L3C_MAX_ATTRIB_SIZE + 1];
 	hsize_t int_dim_vals[L3C_MAX_DIMS];
@@ -918,6 +984,7 @@ void *HDF_Get_DataArray(L3_Cursor_t *ctxt, hid_t nid, int *dims, void *data)
 		int_dim_vals[n] = (hsize_t)(dims[n]);
 	}
 	did = H5Dopen2(nid, L3S_DATA, H5P_DEFAULT);
+	L3M_STAT(ctxt, datasets);
 	tid = ADF_to_HDF_datatype(HDF_Get_Dtype(ctxt, nid, buff));
 	if (!tid)
 	{
@@ -927,9 +994,24 @@ void *HDF_Get_DataArray(L3_Cursor_t *ctxt, hid_t nid, int *dims, void *data)
 		CHL_setError(ctxt, 3019);
 		return NULL;
 	}
-	yid = H5Tget_native_type(tid, H5T_DIR_ASCEND);
+	dt = L3_typeAsEnum(buff);
+	rt = HDF_Read_Type(ctxt, dt);
+	if ((rt != dt) && (HDF_Native_Type(rt) != -1))
+	{
+		yid = H5Tcopy(HDF_Native_Type(rt));
+		xid = H5Pcreate(H5P_DATASET_XFER);
+		H5Pset_type_conv_cb(xid, HDF_Conv_Range, NULL);
+	}
+	else
+	{
+		yid = H5Tget_native_type(tid, H5T_DIR_ASCEND);
+	}
 
-	data = HDF_Read_Array(ctxt, nid, did, yid, data, int_dim_vals);
+	data = HDF_Read_Array(ctxt, nid, did, yid, xid, data, int_dim_vals);
+	if (xid != H5P_DEFAULT)
+	{
+		H5Pclose(xid);
+	}
 	L3M_DBG(ctxt, ("HDF_Get_DataArray from %d/%d/%d/%d @@@\n",
 		yid, tid, did, nid));
 
@@ -940,13 +1022,199 @@ void *HDF_Get_DataArray(L3_Cursor_t *ctxt, hid_t nid, int *dims, void *data)
 	return data;
 }
 /* ------------------------------------------------------------------------- */
+/* Chunks are a slab of the first (slowest) dimension, each chunk is then a
+   contiguous memory block. The only filter allowed is deflate. */
+static int HDF_Get_ChunkBlocks(hid_t did, hid_t pid, int rank, hsize_t *dims,
+	hsize_t tsize, L3_Block_t **blocks, int *count)
+{
+#if H5_VERSION_GE(1,10,5)
+	hsize_t chunk[L3C_MAX_DIMS], coords[L3C_MAX_DIMS];
+	hsize_t slab, size;
+	haddr_t offset;
+	unsigned int mask, fflags;
+	size_t nelmts = 0;
+	int n, nchunks, nfilters, filter = L3E_FILTER_NONE;
+
+	nfilters = H5Pget_nfilters(pid);
+	if (nfilters == 1)
+	{
+#ifdef CHLONE_HAS_ZLIB
+		if (H5Pget_filter2(pid, 0, &fflags, &nelmts, NULL, 0, NULL, NULL)
+			== H5Z_FILTER_DEFLATE)
+		{
+			filter = L3E_FILTER_DEFLATE;
+		}
+		else
+#endif
+		{
+			return 0;
+		}
+	}
+	else if (nfilters != 0)
+	{
+		return 0;
+	}
+	if (H5Pget_chunk(pid, rank, chunk) != rank)
+	{
+		return 0;
+	}
+	for (n = 1; n < rank; n++)
+	{
+		coords[n] = 0;
+		if (chunk[n] != dims[n]) { return 0; }
+	}
+	slab = (tsize / dims[0]) * chunk[0];
+	nchunks = (int)((dims[0] + chunk[0] - 1) / chunk[0]);
+	*blocks = (L3_Block_t*)malloc(sizeof(L3_Block_t)*nchunks);
+	for (n = 0; n < nchunks; n++)
+	{
+		coords[0] = n * chunk[0];
+		if ((H5Dget_chunk_info_by_coord(did, coords, &mask, &offset, &size) < 0)
+			|| (offset == HADDR_UNDEF))
+		{
+			free(*blocks);
+			*blocks = NULL;
+			return 0;
+		}
+		(*blocks)[n].offset = offset;
+		(*blocks)[n].size = size;
+		(*blocks)[n].start = n * slab;
+		(*blocks)[n].count = (tsize - n * slab < slab) ? tsize - n * slab : slab;
+		(*blocks)[n].extent = slab;
+		(*blocks)[n].filter = (mask & 1) ? L3E_FILTER_NONE : filter;
+		if (((*blocks)[n].filter == L3E_FILTER_NONE) && (size < slab))
+		{
+			free(*blocks);
+			*blocks = NULL;
+			return 0;
+		}
+	}
+	*count = nchunks;
+	return 1;
+#else
+	return 0;
+#endif
+}
+/* ------------------------------------------------------------------------- */
+/* Returns 1 if the node data can be read as raw blocks of bytes from the
+   file, without type conversion and using the default (sec2) file driver. */
+int HDF_Get_DataBlocks(L3_Cursor_t *ctxt, hid_t nid, char *filename,
+	L3_Block_t **blocks, int *count)
+{
+	hid_t tid, did, yid, fid, pid, sid, hid, aid;
+	hsize_t dims[L3C_MAX_DIMS], tsize;
+	haddr_t offset;
+	char  buff[L3C_MAX_ATTRIB_SIZE + 1];
+	int   rank, status = 0;
+
+	*blocks = NULL;
+	*count = 0;
+	if (!has_data(nid))
+	{
+		return 0;
+	}
+	tid = ADF_to_HDF_datatype(HDF_Get_Dtype(ctxt, nid, buff));
+	if (tid <= 0)
+	{
+		return 0;
+	}
+	did = H5Dopen2(nid, L3S_DATA, H5P_DEFAULT);
+	L3M_STAT(ctxt, datasets);
+	if (did < 0)
+	{
+		H5Tclose(tid);
+		return 0;
+	}
+	yid = H5Tget_native_type(tid, H5T_DIR_ASCEND);
+	fid = H5Dget_type(did);
+	pid = H5Dget_create_plist(did);
+	sid = H5Dget_space(did);
+	hid = H5Iget_file_id(did);
+	aid = H5Fget_access_plist(hid);
+	rank = H5Sget_simple_extent_dims(sid, dims, NULL);
+	tsize = H5Sget_simple_extent_npoints(sid)*H5Tget_size(yid);
+	if ((rank > 0) && (tsize > 0)
+		&& (H5Tequal(fid, yid) > 0)
+		&& (H5Pget_driver(aid) == H5FD_SEC2)
+		&& (H5Fget_name(did, filename, L3C_MAX_FILE) > 0))
+	{
+		switch (H5Pget_layout(pid))
+		{
+		case H5D_CONTIGUOUS:
+			offset = H5Dget_offset(did);
+			if ((offset != HADDR_UNDEF)
+				&& (H5Pget_external_count(pid) == 0)
+				&& (H5Dget_storage_size(did) == tsize))
+			{
+				*blocks = (L3_Block_t*)malloc(sizeof(L3_Block_t));
+				(*blocks)->offset = offset;
+				(*blocks)->size = tsize;
+				(*blocks)->start = 0;
+				(*blocks)->count = tsize;
+				(*blocks)->extent = tsize;
+				(*blocks)->filter = L3E_FILTER_NONE;
+				*count = 1;
+				status = 1;
+			}
+			break;
+		case H5D_CHUNKED:
+			status = HDF_Get_ChunkBlocks(did, pid, rank, dims, tsize, blocks, count);
+			break;
+		default:
+			break;
+		}
+	}
+	H5Pclose(aid);
+	H5Fclose(hid);
+	H5Pclose(pid);
+	H5Sclose(sid);
+	H5Tclose(fid);
+	H5Tclose(yid);
+	H5Tclose(tid);
+	H5Dclose(did);
+
+	return status;
+}
+/* ------------------------------------------------------------------------- */
+/* Chunk dims for the storage policy, returns 0 if the data should be
+   contiguous. Starting from the whole array, the slowest varying dims are
+   cut down until the chunk fits the target size. */
+static int HDF_Get_StorageChunk(L3_Storage_t *sto, int rank, hsize_t *dims,
+	size_t size, hsize_t *chunk)
+{
+	hsize_t bytes, slice;
+	int n, filtered;
+
+	filtered = (sto->deflate > 0) || sto->shuffle || sto->fletcher32;
+	bytes = (hsize_t)size;
+	for (n = 0; n < rank; n++)
+	{
+		if (dims[n] == 0) { return 0; }
+		chunk[n] = dims[n];
+		bytes *= dims[n];
+	}
+	if (!rank || (!filtered && (bytes <= sto->chunksize)))
+	{
+		return 0;
+	}
+	for (n = 0; (n < rank) && (bytes > sto->chunksize); n++)
+	{
+		slice = bytes / chunk[n];
+		chunk[n] = sto->chunksize / slice;
+		if (chunk[n] < 1) { chunk[n] = 1; }
+		bytes = slice * chunk[n];
+	}
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
 int HDF_Add_DataArray(L3_Cursor_t *ctxt, hid_t nid, int *dims, void *data)
 {
 	hid_t tid, sid, did, yid, pid;
 	char buff[L3C_MAX_ATTRIB_SIZE + 1];
 	char name[L3C_MAX_ATTRIB_SIZE + 1];
 	hsize_t int_dim_vals[L3C_MAX_DIMS], chunkdims[L3C_MAX_DIMS];
-	int n, rank, totalsize, skipchunk;
+	hsize_t max_dim_vals[L3C_MAX_DIMS];
+	int n, rank, totalsize, skipchunk, extend;
 
 	L3M_ECLEAR(ctxt);
 	L3M_CLEARDIMS(int_dim_vals);
@@ -972,6 +1240,25 @@ int HDF_Add_DataArray(L3_Cursor_t *ctxt, hid_t nid, int *dims, void *data)
 		else { skipchunk = 1; }
 	}
 	tid = ADF_to_HDF_datatype(HDF_Get_Dtype(ctxt, nid, buff));
+	if ((tid > 0) && (ctxt->storage.chunksize > 0))
+	{
+		skipchunk = !HDF_Get_StorageChunk(&(ctxt->storage),
+			rank, int_dim_vals, H5Tget_size(tid), chunkdims);
+	}
+	extend = (ctxt->storage.extend && rank);
+	if (extend)
+	{
+		/* a resizable data has to be chunked, chunks may exceed the dims */
+		for (n = 0; n < rank; n++)
+		{
+			if (skipchunk) { chunkdims[n] = int_dim_vals[n]; }
+			if (chunkdims[n] < 1) { chunkdims[n] = 1; }
+			max_dim_vals[n] = int_dim_vals[n];
+		}
+		if (chunkdims[0] < L3C_MIN_EXTEND) { chunkdims[0] = L3C_MIN_EXTEND; }
+		max_dim_vals[0] = H5S_UNLIMITED;
+		skipchunk = 0;
+	}
 	if (!tid)
 	{
 		if (!strcmp(buff, L3T_MT))
@@ -997,7 +1284,7 @@ int HDF_Add_DataArray(L3_Cursor_t *ctxt, hid_t nid, int *dims, void *data)
 		H5Tclose(tid);
 		return 0;
 	}
-	sid = H5Screate_simple(n, int_dim_vals, NULL);
+	sid = H5Screate_simple(n, int_dim_vals, extend ? max_dim_vals : NULL);
 	if (sid < 0)
 	{
 		L3M_DBG(ctxt, ("HDF_Add_DataArray [%s] bad sid %d dims\n", name, n));
@@ -1017,15 +1304,29 @@ int HDF_Add_DataArray(L3_Cursor_t *ctxt, hid_t nid, int *dims, void *data)
 	if (!skipchunk)
 	{
 		H5Pset_chunk(pid, rank, chunkdims);
-		if (L3M_HASFLAG(ctxt, L3F_COMPRESS))
+		if (ctxt->storage.shuffle)
+		{
+			H5Pset_shuffle(pid);
+		}
+		if (ctxt->storage.deflate > 0)
+		{
+			H5Pset_deflate(pid, ctxt->storage.deflate);
+		}
+		else if (L3M_HASFLAG(ctxt, L3F_COMPRESS))
 		{
 			H5Pset_deflate(pid, 6);
 		}
+		if (ctxt->storage.fletcher32)
+		{
+			H5Pset_fletcher32(pid);
+		}
 		did = H5Dcreate2(nid, L3S_DATA, tid, sid, H5P_DEFAULT, pid, H5P_DEFAULT);
+		L3M_STAT(ctxt, datasets);
 	}
 	else
 	{
 		did = H5Dcreate2(nid, L3S_DATA, tid, sid, H5P_DEFAULT, H5P_DEFAULT, H5P_DEFAULT);
+		L3M_STAT(ctxt, datasets);
 	}
 	if (did < 0)
 	{
@@ -1075,6 +1376,7 @@ int HDF_Set_DataArray(L3_Cursor_t *ctxt, hid_t nid, int *dims, void *data)
 	if (samedims)
 	{
 		did = H5Dopen2(nid, L3S_DATA, H5P_DEFAULT);
+		L3M_STAT(ctxt, datasets);
 		tid = ADF_to_HDF_datatype(HDF_Get_Dtype(ctxt, nid, buff));
 		if (!tid)
 		{
@@ -1113,6 +1415,137 @@ int HDF_Set_DataArray(L3_Cursor_t *ctxt, hid_t nid, int *dims, void *data)
 	return 1;
 }
 /* ------------------------------------------------------------------------- */
+/* Rewrite the data of an existing node as an extendable data, the data is
+   read with its own type, removed and added again with the same values.
+   Returns the new dataset id, -1 if failure. */
+static hid_t HDF_Set_DataExtendable(L3_Cursor_t *ctxt, hid_t nid, hid_t did,
+	int rank, hsize_t *dims)
+{
+	hid_t tid, yid;
+	int n, int_dims[L3C_MAX_DIMS], saved;
+	hsize_t npoints;
+	void *data;
+	herr_t stat;
+
+	tid = H5Dget_type(did);
+	yid = H5Tget_native_type(tid, H5T_DIR_ASCEND);
+	npoints = 1;
+	for (n = 0; n < L3C_MAX_DIMS; n++)
+	{
+		int_dims[n] = -1;
+		if (n < rank)
+		{
+			int_dims[n] = (int)dims[n];
+			npoints *= dims[n];
+		}
+	}
+	data = malloc(npoints * H5Tget_size(yid));
+	stat = H5Dread(did, yid, H5S_ALL, H5S_ALL, H5P_DEFAULT, data);
+	H5Tclose(yid);
+	H5Tclose(tid);
+	H5Dclose(did);
+	did = -1;
+	if (stat >= 0)
+	{
+		L3M_DBG(ctxt, ("HDF_Set_DataExtendable rewrite\n"));
+		H5Ldelete(nid, L3S_DATA, H5P_DEFAULT);
+		saved = ctxt->storage.extend;
+		ctxt->storage.extend = 1;
+		if (HDF_Add_DataArray(ctxt, nid, int_dims, data))
+		{
+			did = H5Dopen2(nid, L3S_DATA, H5P_DEFAULT);
+			L3M_STAT(ctxt, datasets);
+		}
+		ctxt->storage.extend = saved;
+	}
+	free(data);
+
+	return did;
+}
+/* ------------------------------------------------------------------------- */
+static int HDF_Is_SWMR(L3_Cursor_t *ctxt)
+{
+#if H5_VERSION_GE(1,10,0)
+	unsigned intent = 0;
+
+	H5Fget_intent(ctxt->file_id, &intent);
+	return ((intent & H5F_ACC_SWMR_WRITE) != 0);
+#else
+	return 0;
+#endif
+}
+/* ------------------------------------------------------------------------- */
+/* Append data at the end of the first dimension, returns 0 if dims or
+   data type do not fit the stored data, -1 if the data cannot be rewritten
+   as extendable */
+int HDF_Extend_DataArray(L3_Cursor_t *ctxt, hid_t nid, int *dims, int dtype,
+	void *data)
+{
+	hid_t did, fid, mid, tid, yid;
+	hsize_t old_dims[L3C_MAX_DIMS], max_dims[L3C_MAX_DIMS];
+	hsize_t new_dims[L3C_MAX_DIMS], offset[L3C_MAX_DIMS];
+	hsize_t count[L3C_MAX_DIMS];
+	int n, rank;
+	herr_t stat = -1;
+
+	L3M_ECLEAR(ctxt);
+
+	did = H5Dopen2(nid, L3S_DATA, H5P_DEFAULT);
+	L3M_STAT(ctxt, datasets);
+	fid = H5Dget_space(did);
+	rank = H5Sget_simple_extent_ndims(fid);
+	H5Sget_simple_extent_dims(fid, old_dims, max_dims);
+	H5Sclose(fid);
+	for (n = 0; (n < L3C_MAX_DIMS) && (dims[n] != -1); n++)
+	{
+		if ((n >= rank) || ((n > 0) && ((hsize_t)dims[n] != old_dims[n])))
+		{
+			H5Dclose(did);
+			return 0;
+		}
+		count[n] = (hsize_t)dims[n];
+		offset[n] = 0;
+		new_dims[n] = old_dims[n];
+	}
+	tid = ADF_to_HDF_datatype(L3_typeAsStr(dtype));
+	if ((n != rank) || (tid <= 0))
+	{
+		H5Dclose(did);
+		return 0;
+	}
+	if ((max_dims[0] != H5S_UNLIMITED) && HDF_Is_SWMR(ctxt))
+	{
+		/* no new dataset while readers may parse the file */
+		H5Tclose(tid);
+		H5Dclose(did);
+		return -1;
+	}
+	if (max_dims[0] != H5S_UNLIMITED)
+	{
+		did = HDF_Set_DataExtendable(ctxt, nid, did, rank, old_dims);
+	}
+	offset[0] = old_dims[0];
+	new_dims[0] = old_dims[0] + count[0];
+	if ((did >= 0) && (H5Dset_extent(did, new_dims) >= 0))
+	{
+		fid = H5Dget_space(did);
+		mid = H5Screate_simple(rank, count, NULL);
+		H5Sselect_hyperslab(fid, H5S_SELECT_SET, offset, NULL, count, NULL);
+		yid = H5Tget_native_type(tid, H5T_DIR_ASCEND);
+		stat = H5Dwrite(did, yid, mid, fid, H5P_DEFAULT, data);
+		H5Tclose(yid);
+		H5Sclose(mid);
+		H5Sclose(fid);
+	}
+	H5Tclose(tid);
+	if (did >= 0)
+	{
+		H5Dclose(did);
+	}
+
+	return (stat >= 0);
+}
+/* ------------------------------------------------------------------------- */
 int HDF_Add_Attribute_As_Integer(L3_Cursor_t *ctxt,
 	hid_t nodeid, const char *name, int value)
 {
@@ -1130,6 +1563,7 @@ int HDF_Add_Attribute_As_Integer(L3_Cursor_t *ctxt,
 	}
 
 	aid = H5Acreate(nodeid, name, H5T_NATIVE_INT, sid, H5P_DEFAULT, H5P_DEFAULT);
+	L3M_STAT(ctxt, attributes);
 	if (aid < 0)
 	{
 		L3M_DBG(ctxt, ("HDF_Add_Attribute_As_Integer [%s] create attribute failed\n", name));
@@ -1193,6 +1627,7 @@ int HDF_Add_Attribute_As_String(L3_Cursor_t *ctxt,
 		return 0;
 	}
 	aid = H5Acreate(nodeid, name, tid, sid, H5P_DEFAULT, H5P_DEFAULT);
+	L3M_STAT(ctxt, attributes);
 	if (aid < 0)
 	{
 		L3M_DBG(ctxt, ("HDF_Add_Attribute_As_String [%s] create failed\n", name));
@@ -1227,6 +1662,7 @@ static int HDF_Set_Attribute_As_Integer(L3_Cursor_t *ctxt,
 
 	L3M_DBG(ctxt, ("HDF_Set_Attribute_As_Integer: [%s]=[%d]\n", name, value));
 	aid = H5Aopen_name(nodeid, name);
+	L3M_STAT(ctxt, attributes);
 	if (aid < 0)
 	{
 		return 0;
@@ -1250,6 +1686,7 @@ static int HDF_Set_Attribute_As_String(L3_Cursor_t *ctxt,
 
 	L3M_DBG(ctxt, ("HDF_Set_Attribute_As_String: [%s]=[%s]\n", name, value));
 	aid = H5Aopen_name(nodeid, name);
+	L3M_STAT(ctxt, attributes);
 	if (aid < 0)
 	{
 		return 0;
@@ -1290,6 +1727,7 @@ static int HDF_Add_Attribute_As_Data(L3_Cursor_t *ctxt,
 	}
 	did = H5Dcreate2(id, name, H5T_NATIVE_CHAR, sid,
 		H5P_DEFAULT, H5P_DEFAULT, H5P_DEFAULT);
+	L3M_STAT(ctxt, datasets);
 	if (did < 0)
 	{
 		L3M_DBG(ctxt, ("HDF_Add_Attribute_As_Data [%s] create data failed\n", name));
@@ -1382,6 +1820,7 @@ hid_t L3_nodeCreate(L3_Cursor_t *ctxt, hid_t pid, L3_Node_t *node)
 	if (has_child(pid, node->name))
 	{
 		nid = H5Gopen(pid, node->name, H5P_DEFAULT);
+		L3M_STAT(ctxt, groups);
 		node->id = nid;
 		L3M_MXUNLOCK(ctxt);
 		L3_nodeUpdate(ctxt, node);
@@ -1390,6 +1829,7 @@ hid_t L3_nodeCreate(L3_Cursor_t *ctxt, hid_t pid, L3_Node_t *node)
 	else
 	{
 		nid = H5Gcreate2(pid, node->name, H5P_DEFAULT, ctxt->g_proplist, H5P_DEFAULT);
+		L3M_STAT(ctxt, groups);
 	}
 	if (!H5Iis_valid(nid))
 	{
@@ -1478,6 +1918,7 @@ hid_t L3_nodeUpdate(L3_Cursor_t *ctxt, L3_Node_t *node)
 		H5Iget_name(nid, ppath, 256);
 		ppath = backToParent(ppath);
 		pid = H5Gopen(ctxt->root_id, ppath, H5P_DEFAULT);
+		L3M_STAT(ctxt, groups);
 		free(ppath);
 		L3M_TRACE(ctxt, ("L3_nodeUpdate H5Lmove [%d:%s] ... @@@\n", pid, oldname));
 		L3M_TRACE(ctxt, ("L3_nodeUpdate H5Lmove to [%d:%s]  @@@\n", pid, node->name));
@@ -1556,47 +1997,197 @@ hid_t L3_nodeUpdatePartial(L3_Cursor_t *ctxt,
 	hsize_t *dst_block,
 	L3_Node_t *node)
 {
-	;
-}
-/* ------------------------------------------------------------------------- */
-hid_t L3_nodeLink(L3_Cursor_t *ctxt, hid_t node,
-	char *srcname, char *destfile, char *destname)
-{
-	hid_t nid;
+	hid_t nid, did, fid, mid, tid, yid;
+	hsize_t dim_vals[L3C_MAX_DIMS];
+	char name[L3C_MAX_ATTRIB_SIZE + 1];
+	int n, rank, valid;
+	herr_t stat = -1;
 
 	L3M_CHECK_CTXT_OR_DIE(ctxt, -1);
 	L3M_MXLOCK(ctxt);
 	L3M_ECLEAR(ctxt);
-	L3M_TRACE(ctxt, ("L3_nodeLink [%s]->[%s][%s]\n", srcname, destfile, destname));
-	L3M_ECHECKID(ctxt, node, -1);
+	L3M_TRACE(ctxt, ("L3_nodeUpdatePartial\n"));
+	L3M_ECHECKL3NODE(ctxt, node, -1);
 
-	if (is_link(ctxt, node))
-	{
-		CHL_setError(ctxt, 3060);
-	}
-	if (L3M_HASFLAG(ctxt, L3F_LINKOVERWRITE) && has_child(node, srcname))
+	nid = node->id;
+	if (!HDF_Check_Node(nid))
 	{
-		H5Giterate(node, srcname, NULL, delete_children, NULL);
-		H5Gunlink(node, srcname);
+		CHL_setError(ctxt, 3051);
+		L3M_MXUNLOCK(ctxt);
+		return nid;
 	}
-	nid = H5Gcreate2(node, srcname, H5P_DEFAULT, ctxt->g_proplist, H5P_DEFAULT);
-	if (nid < 0)
+	HDF_Get_Name(ctxt, nid, name);
+	if ((node->data == NULL) || !has_data(nid))
 	{
-		CHL_setError(ctxt, 3061, srcname);
+		CHL_setError(ctxt, 3058, name);
+		L3M_MXUNLOCK(ctxt);
+		return nid;
 	}
-	if (!HDF_Add_Attribute_As_String(ctxt, nid, L3S_NAME, srcname))
+	/* memory space is the node array, file space is the existing dataset,
+	   both selections are checked against the rank of their space */
+	rank = 0;
+	for (n = 0; (n < L3C_MAX_DIMS) && (node->dims[n] != -1); n++)
 	{
-		CHL_setError(ctxt, 3062, srcname);
+		dim_vals[n] = (hsize_t)(node->dims[n]);
+		rank++;
 	}
-	if (!HDF_Add_Attribute_As_String(ctxt, nid, L3S_DTYPE, L3T_LK))
-	{
-		CHL_setError(ctxt, 3063, srcname);
+	did = H5Dopen2(nid, L3S_DATA, H5P_DEFAULT);
+	L3M_STAT(ctxt, datasets);
+	fid = H5Dget_space(did);
+	mid = H5Screate_simple(rank, dim_vals, NULL);
+	for (n = 0; (n < L3C_MAX_DIMS) && (src_count[n] != (hsize_t)-1); n++);
+	valid = (n == rank);
+	for (n = 0; (n < L3C_MAX_DIMS) && (dst_count[n] != (hsize_t)-1); n++);
+	valid = valid && (n == H5Sget_simple_extent_ndims(fid));
+	if (valid)
+	{
+		H5Sselect_hyperslab(mid, H5S_SELECT_SET,
+			src_offset, src_stride, src_count, src_block);
+		H5Sselect_hyperslab(fid, H5S_SELECT_SET,
+			dst_offset, dst_stride, dst_count, dst_block);
+		valid = (H5Sselect_valid(mid) > 0) && (H5Sselect_valid(fid) > 0)
+			&& (H5Sget_select_npoints(mid) == H5Sget_select_npoints(fid));
+	}
+	if (!valid)
+	{
+		CHL_setError(ctxt, 3057, name);
 	}
-	if (!HDF_Add_Attribute_As_String(ctxt, nid, L3S_LABEL, ""))
+	else
 	{
-		CHL_setError(ctxt, 3064, srcname);
+		L3M_TRACE(ctxt, ("L3_nodeUpdatePartial [%s] %d points\n",
+			name, (int)H5Sget_select_npoints(fid)));
+		/* the data is converted to the stored type if they differ */
+		tid = ADF_to_HDF_datatype(L3_typeAsStr(node->dtype));
+		if (tid > 0)
+		{
+			yid = H5Tget_native_type(tid, H5T_DIR_ASCEND);
+			stat = H5Dwrite(did, yid, mid, fid, H5P_DEFAULT, node->data);
+			H5Tclose(yid);
+			H5Tclose(tid);
+		}
+		if (stat < 0)
+		{
+			CHL_setError(ctxt, 3058, name);
+		}
 	}
-	HDF_Add_Attribute_As_Data(ctxt, nid, L3S_PATH, destname, strlen(destname));
+	H5Sclose(mid);
+	H5Sclose(fid);
+	H5Dclose(did);
+	L3M_MXUNLOCK(ctxt);
+	return nid;
+}
+/* ------------------------------------------------------------------------- */
+hid_t L3_nodeExtend(L3_Cursor_t *ctxt, L3_Node_t *node)
+{
+	hid_t nid;
+	char name[L3C_MAX_ATTRIB_SIZE + 1];
+
+	L3M_CHECK_CTXT_OR_DIE(ctxt, -1);
+	L3M_MXLOCK(ctxt);
+	L3M_ECLEAR(ctxt);
+	L3M_TRACE(ctxt, ("L3_nodeExtend\n"));
+	L3M_ECHECKL3NODE(ctxt, node, -1);
+
+	nid = node->id;
+	if (!HDF_Check_Node(nid))
+	{
+		CHL_setError(ctxt, 3051);
+		L3M_MXUNLOCK(ctxt);
+		return nid;
+	}
+	HDF_Get_Name(ctxt, nid, name);
+	if ((node->data == NULL) || !has_data(nid))
+	{
+		CHL_setError(ctxt, 3111, name);
+	}
+	else
+	{
+		switch (HDF_Extend_DataArray(ctxt, nid, node->dims, node->dtype,
+			node->data))
+		{
+		case 0: CHL_setError(ctxt, 3110, name); break;
+		case -1: CHL_setError(ctxt, 3112, name); break;
+		default: break;
+		}
+	}
+	L3M_MXUNLOCK(ctxt);
+	return nid;
+}
+/* ------------------------------------------------------------------------- */
+int L3_nodeRefresh(L3_Cursor_t *ctxt, hid_t id)
+{
+	hid_t did;
+	herr_t stat = -1;
+	char name[L3C_MAX_ATTRIB_SIZE + 1];
+
+	L3M_CHECK_CTXT_OR_DIE(ctxt, 0);
+	L3M_MXLOCK(ctxt);
+	L3M_ECLEAR(ctxt);
+	L3M_TRACE(ctxt, ("L3_nodeRefresh\n"));
+	L3M_ECHECKID(ctxt, id, 0);
+
+	if (!has_data(id))
+	{
+		L3M_MXUNLOCK(ctxt);
+		return 0;
+	}
+	did = H5Dopen2(id, L3S_DATA, H5P_DEFAULT);
+	L3M_STAT(ctxt, datasets);
+	if (did >= 0)
+	{
+#if H5_VERSION_GE(1,10,0)
+		stat = H5Drefresh(did);
+#endif
+		H5Dclose(did);
+	}
+	if (stat < 0)
+	{
+		HDF_Get_Name(ctxt, id, name);
+		CHL_setError(ctxt, 3113, name);
+	}
+	L3M_MXUNLOCK(ctxt);
+	return (stat >= 0);
+}
+/* ------------------------------------------------------------------------- */
+hid_t L3_nodeLink(L3_Cursor_t *ctxt, hid_t node,
+	char *srcname, char *destfile, char *destname)
+{
+	hid_t nid;
+
+	L3M_CHECK_CTXT_OR_DIE(ctxt, -1);
+	L3M_MXLOCK(ctxt);
+	L3M_ECLEAR(ctxt);
+	L3M_TRACE(ctxt, ("L3_nodeLink [%s]->[%s][%s]\n", srcname, destfile, destname));
+	L3M_ECHECKID(ctxt, node, -1);
+
+	if (is_link(ctxt, node))
+	{
+		CHL_setError(ctxt, 3060);
+	}
+	if (L3M_HASFLAG(ctxt, L3F_LINKOVERWRITE) && has_child(node, srcname))
+	{
+		H5Giterate(node, srcname, NULL, delete_children, NULL);
+		H5Gunlink(node, srcname);
+	}
+	nid = H5Gcreate2(node, srcname, H5P_DEFAULT, ctxt->g_proplist, H5P_DEFAULT);
+	L3M_STAT(ctxt, groups);
+	if (nid < 0)
+	{
+		CHL_setError(ctxt, 3061, srcname);
+	}
+	if (!HDF_Add_Attribute_As_String(ctxt, nid, L3S_NAME, srcname))
+	{
+		CHL_setError(ctxt, 3062, srcname);
+	}
+	if (!HDF_Add_Attribute_As_String(ctxt, nid, L3S_DTYPE, L3T_LK))
+	{
+		CHL_setError(ctxt, 3063, srcname);
+	}
+	if (!HDF_Add_Attribute_As_String(ctxt, nid, L3S_LABEL, ""))
+	{
+		CHL_setError(ctxt, 3064, srcname);
+	}
+	HDF_Add_Attribute_As_Data(ctxt, nid, L3S_PATH, destname, strlen(destname));
 
 	if (strcmp(destfile, ""))
 	{
@@ -1638,6 +2229,7 @@ hid_t L3_nodeMove(L3_Cursor_t *ctxt, hid_t pid, hid_t nid,
 	L3M_TRACE(ctxt, ("L3_nodeMove [%s][%s]->[%s][%s]\n", opn, oldname, npn, newname));
 	H5Gmove2(pid, oldname, nid, newname);
 	tid = H5Gopen2(nid, newname, H5P_DEFAULT);
+	L3M_STAT(ctxt, groups);
 	L3_T_ID("MV", tid);
 	if (!HDF_Set_Attribute_As_String(ctxt, tid, L3S_NAME, newname))
 	{
@@ -1727,6 +2319,7 @@ hid_t L3_nodeFind(L3_Cursor_t *ctxt, hid_t parent, char *path)
 				{
 					pid = cid;
 					cid = H5Gopen(cid, pcurrent, H5P_DEFAULT);
+					L3M_STAT(ctxt, groups);
 					if (!H5Iis_valid(cid))
 					{
 						L3M_MXUNLOCK(ctxt);
@@ -1761,6 +2354,7 @@ hid_t L3_nodeFind(L3_Cursor_t *ctxt, hid_t parent, char *path)
 		L3_H5_GCLOSE("NODE FIND 2\n", cid);
 	}
 	rid = H5Gopen2(parent, path, H5P_DEFAULT);
+	L3M_STAT(ctxt, groups);
 	L3_T_ID("FIND", rid);
 
 	L3M_MXUNLOCK(ctxt);
@@ -1776,6 +2370,7 @@ L3_Node_t *L3_nodeRetrieve(L3_Cursor_t *ctxt, hid_t oid, L3_Node_t *node)
 	void *data;
 	char  name[L3C_MAX_ATTRIB_SIZE + 1];
 	char  label[L3C_MAX_ATTRIB_SIZE + 1];
+	char  dtype[L3C_MAX_ATTRIB_SIZE + 1];
 
 	L3M_CHECK_CTXT_OR_DIE(ctxt, NULL);
 	L3M_MXLOCK(ctxt);
@@ -1788,11 +2383,13 @@ L3_Node_t *L3_nodeRetrieve(L3_Cursor_t *ctxt, hid_t oid, L3_Node_t *node)
 
 	if (HDF_Check_Node(oid))
 	{
+		/* the type attribute is read once, it tells the link nodes too */
 		nid = oid;
-		islk = is_link(ctxt, oid);
+		islk = is_link_dtype(HDF_Get_Dtype(ctxt, oid, dtype));
 		if (islk && L3M_HASFLAG(ctxt, L3F_FOLLOWLINKS))
 		{
 			nid = get_link_actual_id(ctxt, oid);
+			HDF_Get_Dtype(ctxt, nid, dtype);
 			if (!HDF_Check_Node(nid) && L3M_HASFLAG(ctxt, L3F_FAILSONLINK))
 			{
 				CHL_setError(ctxt, 3091);
@@ -1815,12 +2412,12 @@ L3_Node_t *L3_nodeRetrieve(L3_Cursor_t *ctxt, hid_t oid, L3_Node_t *node)
 		HDF_Get_Label(ctxt, nid, label);
 		L3_N_setName(node, name);
 		L3_N_setLabel(node, label);
-		dt = L3_typeAsEnum(HDF_Get_Dtype(ctxt, nid, buff));
+		dt = L3_typeAsEnum(dtype);
 		L3_N_setDtype(node, dt);
 		L3_N_getName(node, buff);
 		if (!islk && strcmp(buff, L3S_ROOTNODENAME))
 		{
-			flg = HDF_Get_Attribute_As_Integer(nid, L3S_FLAGS, &ibuff);
+			flg = HDF_Get_Attribute_As_Integer(ctxt, nid, L3S_FLAGS, &ibuff);
 			L3_N_setFlags(node, flg);
 		}
 		else
@@ -1828,8 +2425,7 @@ L3_Node_t *L3_nodeRetrieve(L3_Cursor_t *ctxt, hid_t oid, L3_Node_t *node)
 			L3_N_setFlags(node, L3F_NONE);
 		}
 		node->id = nid;
-		if (!islk &&
-			strcmp(HDF_Get_Dtype(ctxt, nid, buff), L3T_MT))
+		if (!islk && strcmp(dtype, L3T_MT))
 		{
 			HDF_Get_DataDimensions(ctxt, nid, dims);
 			L3_N_setDims(node, dims);
@@ -1837,11 +2433,15 @@ L3_Node_t *L3_nodeRetrieve(L3_Cursor_t *ctxt, hid_t oid, L3_Node_t *node)
 			{
 				data = HDF_Get_DataArray(ctxt, nid, dims, node->data);
 				L3_N_setData(node, data);
+				if (data != NULL)
+				{
+					L3_N_setDtype(node, HDF_Read_Type(ctxt, dt));
+				}
 			}
 		}
 		if (!islk && L3M_HASFLAG(ctxt, L3F_WITHCHILDREN))
 		{
-			node->children = HDF_Get_Children(nid, L3M_HASFLAG(ctxt, L3F_ASCIIORDER));
+			node->children = HDF_Get_Children(ctxt, nid, L3M_HASFLAG(ctxt, L3F_ASCIIORDER));
 		}
 	}
 	else
@@ -1854,6 +2454,201 @@ L3_Node_t *L3_nodeRetrieve(L3_Cursor_t *ctxt, hid_t oid, L3_Node_t *node)
 	return node;
 }
 /* ------------------------------------------------------------------------- */
+L3_Node_t *L3_nodeRetrieveName(L3_Cursor_t *ctxt, hid_t oid, L3_Node_t *node)
+{
+	char  name[L3C_MAX_ATTRIB_SIZE + 1];
+
+	L3M_CHECK_CTXT_OR_DIE(ctxt, NULL);
+	L3M_MXLOCK(ctxt);
+	L3M_ECLEAR(ctxt);
+	L3M_TRACE(ctxt, ("L3_nodeRetrieveName [%d] @@@\n", oid));
+
+	if (!HDF_Check_Node(oid))
+	{
+		CHL_setError(ctxt, 3090);
+		L3M_MXUNLOCK(ctxt);
+		return NULL;
+	}
+	if (node == NULL)
+	{
+		CHL_setError(ctxt, 3092);
+		L3M_MXUNLOCK(ctxt);
+		return NULL;
+	}
+	HDF_Get_Name(ctxt, oid, name);
+	L3_N_setName(node, name);
+	node->id = oid;
+	L3M_MXUNLOCK(ctxt);
+	return node;
+}
+/* ------------------------------------------------------------------------- */
+int L3_nodeDataBlocks(L3_Cursor_t *ctxt, hid_t oid, char *filename,
+	L3_Block_t **blocks, int *count)
+{
+	int status = 0;
+
+	L3M_CHECK_CTXT_OR_DIE(ctxt, 0);
+	L3M_MXLOCK(ctxt);
+	L3M_ECLEAR(ctxt);
+	L3M_TRACE(ctxt, ("L3_nodeDataBlocks [%d] @@@\n", oid));
+
+	*blocks = NULL;
+	*count = 0;
+	if (HDF_Check_Node(oid) && !is_link(ctxt, oid))
+	{
+		status = HDF_Get_DataBlocks(ctxt, oid, filename, blocks, count);
+	}
+	L3M_MXUNLOCK(ctxt);
+	return status;
+}
+/* ------------------------------------------------------------------------- */
+int L3_setStorage(L3_Cursor_t *ctxt, L3_Storage_t *storage)
+{
+	L3M_CHECK_CTXT_OR_DIE(ctxt, 0);
+	if (storage == NULL)
+	{
+		L3M_CLEARSTORAGE(ctxt->storage);
+	}
+	else
+	{
+		ctxt->storage = *storage;
+	}
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
+int L3_setAccess(L3_Access_t *access)
+{
+	if (access == NULL)
+	{
+		L3M_CLEARACCESS(HDF_Access);
+	}
+	else
+	{
+		HDF_Access = *access;
+	}
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
+int L3_getAccess(L3_Access_t *access)
+{
+	if (access == NULL)
+	{
+		return 0;
+	}
+	*access = HDF_Access;
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
+int L3_setReadType(L3_Cursor_t *ctxt, int dtype, int readtype)
+{
+	L3M_CHECK_CTXT_OR_DIE(ctxt, 0);
+	if ((HDF_Native_Type(dtype) == -1) || (HDF_Native_Type(readtype) == -1))
+	{
+		CHL_setError(ctxt, 3016, dtype, readtype);
+		return 0;
+	}
+	/* same conversion for the plain and the pointer enumerates,
+	   L3_typeAsEnum returns the pointer one */
+	if (dtype > L3E_R8) { dtype -= 4; }
+	if (readtype > L3E_R8) { readtype -= 4; }
+	ctxt->readtype[dtype] = readtype;
+	ctxt->readtype[dtype + 4] = readtype + 4;
+	return 1;
+}
+/* ------------------------------------------------------------------------- */
+int L3_resetCursor(L3_Cursor_t *ctxt, long flags)
+{
+	L3M_CHECK_CTXT_OR_DIE(ctxt, 0);
+	L3M_ECLEAR(ctxt);
+	ctxt->config = flags;
+	ctxt->ebuff[0] = '\0';
+	if (ctxt->pathlist != NULL)
+	{
+		CHL_freeLinkSearchPath(ctxt);
+		ctxt->pathlist = NULL;
+	}
+	L3M_CLEARSTORAGE(ctxt->storage);
+	L3M_CLEARREADTYPE(ctxt->readtype);
+	L3M_CLEARSTATS(ctxt->stats);
+	if (!L3M_HASFLAG(ctxt, L3F_DEBUG))
+	{
+		H5Eset_auto2(H5E_DEFAULT, HDF_Walk_Error, ctxt);
+	}
+	else
+	{
+		ctxt->config |= L3F_TRACE;
+	}
+	if (!H5Iis_valid(ctxt->file_id))
+	{
+		return 0;
+	}
+	if (!H5Iis_valid(ctxt->root_id))
+	{
+		ctxt->root_id = H5Gopen2(ctxt->file_id, "/", H5P_DEFAULT);
+	}
+	return H5Iis_valid(ctxt->root_id) ? 1 : 0;
+}
+/* ------------------------------------------------------------------------- */
+int L3_blockRead(int fd, L3_Block_t *block, void *base)
+{
+	char *dst, *raw = NULL, *tmp = NULL;
+	hsize_t done;
+	ssize_t r;
+	int status = 1;
+
+	dst = (char*)base + block->start;
+	if (block->filter != L3E_FILTER_NONE)
+	{
+		raw = (char*)malloc(block->size);
+		if (raw == NULL) { return 0; }
+	}
+	else
+	{
+		raw = dst;
+	}
+	done = 0;
+	while (done < ((block->filter != L3E_FILTER_NONE) ? block->size : block->count))
+	{
+		r = pread(fd, raw + done,
+			((block->filter != L3E_FILTER_NONE) ? block->size : block->count) - done,
+			(off_t)(block->offset + done));
+		if (r <= 0) { status = 0; break; }
+		done += r;
+	}
+#ifdef CHLONE_HAS_ZLIB
+	if (status && (block->filter == L3E_FILTER_DEFLATE))
+	{
+		uLongf dlen = (uLongf)block->extent;
+
+		/* last chunk may be partially used, inflate it in a buffer */
+		if (block->count < block->extent)
+		{
+			tmp = (char*)malloc(block->extent);
+		}
+		if ((tmp == NULL) && (block->count < block->extent))
+		{
+			status = 0;
+		}
+		else if ((uncompress((Bytef*)(tmp ? tmp : dst), &dlen,
+			(Bytef*)raw, (uLong)block->size) != Z_OK)
+			|| (dlen != block->extent))
+		{
+			status = 0;
+		}
+		else if (tmp != NULL)
+		{
+			memcpy(dst, tmp, block->count);
+		}
+		if (tmp != NULL) { free(tmp); }
+	}
+#endif
+	if (block->filter != L3E_FILTER_NONE)
+	{
+		free(raw);
+	}
+	return status;
+}
+/* ------------------------------------------------------------------------- */
 L3_Node_t *L3_nodeRetrieveContiguous(L3_Cursor_t *ctxt, hid_t oid,
 	int index, int rank, int count,
 	int interlaced,
@@ -1918,7 +2713,7 @@ L3_Node_t *L3_nodeRetrieveContiguous(L3_Cursor_t *ctxt, hid_t oid,
 		L3_N_getName(node, buff);
 		if (!islk && strcmp(buff, L3S_ROOTNODENAME))
 		{
-			flg = HDF_Get_Attribute_As_Integer(nid, L3S_FLAGS, &ibuff);
+			flg = HDF_Get_Attribute_As_Integer(ctxt, nid, L3S_FLAGS, &ibuff);
 			L3_N_setFlags(node, flg);
 		}
 		else
@@ -2005,7 +2800,7 @@ L3_Node_t *L3_nodeRetrieveContiguous(L3_Cursor_t *ctxt, hid_t oid,
 		}
 		if (!islk && L3M_HASFLAG(ctxt, L3F_WITHCHILDREN))
 		{
-			node->children = HDF_Get_Children(nid, L3M_HASFLAG(ctxt, L3F_ASCIIORDER));
+			node->children = HDF_Get_Children(ctxt, nid, L3M_HASFLAG(ctxt, L3F_ASCIIORDER));
 		}
 	}
 	else
@@ -2081,7 +2876,7 @@ L3_Node_t *L3_nodeRetrievePartial(L3_Cursor_t *ctxt, hid_t oid,
 		L3_N_getName(node, buff);
 		if (!islk && strcmp(buff, L3S_ROOTNODENAME))
 		{
-			flg = HDF_Get_Attribute_As_Integer(nid, L3S_FLAGS, &ibuff);
+			flg = HDF_Get_Attribute_As_Integer(ctxt, nid, L3S_FLAGS, &ibuff);
 			L3_N_setFlags(node, flg);
 		}
 		else
@@ -2115,7 +2910,7 @@ L3_Node_t *L3_nodeRetrievePartial(L3_Cursor_t *ctxt, hid_t oid,
 		}
 		if (!islk && L3M_HASFLAG(ctxt, L3F_WITHCHILDREN))
 		{
-			node->children = HDF_Get_Children(nid, L3M_HASFLAG(ctxt, L3F_ASCIIORDER));
+			node->children = HDF_Get_Children(ctxt, nid, L3M_HASFLAG(ctxt, L3F_ASCIIORDER));
 		}
 	}
 	else
@@ -2152,6 +2947,9 @@ L3_openHID(hid_t root, long flags)
 	ctxt->result = NULL;
 	ctxt->pathlist = NULL;
 	ctxt->currentpath = NULL;
+	L3M_CLEARSTORAGE(ctxt->storage);
+	L3M_CLEARREADTYPE(ctxt->readtype);
+	L3M_CLEARSTATS(ctxt->stats);
 
 	return ctxt;
 }
@@ -2323,8 +3121,136 @@ void L3_nodePrint(L3_Node_t *node)
 	}
 }
 /* ------------------------------------------------------------------------- */
-L3_Cursor_t*
-L3_openFile(char *filename, int mode, long flags)
+/* Jenkins lookup3 hash, this is the HDF5 metadata checksum */
+#define HDF_ROT(x, k) (((x) << (k)) ^ ((x) >> (32 - (k))))
+static unsigned int HDF_Checksum_Metadata(const unsigned char *k, size_t length)
+{
+	unsigned int a, b, c;
+
+	a = b = c = 0xdeadbeef + (unsigned int)length;
+	while (length > 12)
+	{
+		a += k[0] + (k[1] << 8) + (k[2] << 16) + ((unsigned int)k[3] << 24);
+		b += k[4] + (k[5] << 8) + (k[6] << 16) + ((unsigned int)k[7] << 24);
+		c += k[8] + (k[9] << 8) + (k[10] << 16) + ((unsigned int)k[11] << 24);
+		a -= c; a ^= HDF_ROT(c, 4);  c += b;
+		b -= a; b ^= HDF_ROT(a, 6);  a += c;
+		c -= b; c ^= HDF_ROT(b, 8);  b += a;
+		a -= c; a ^= HDF_ROT(c, 16); c += b;
+		b -= a; b ^= HDF_ROT(a, 19); a += c;
+		c -= b; c ^= HDF_ROT(b, 4);  b += a;
+		length -= 12;
+		k += 12;
+	}
+	switch (length)
+	{
+	case 12: c += (unsigned int)k[11] << 24;
+	case 11: c += k[10] << 16;
+	case 10: c += k[9] << 8;
+	case 9:  c += k[8];
+	case 8:  b += (unsigned int)k[7] << 24;
+	case 7:  b += k[6] << 16;
+	case 6:  b += k[5] << 8;
+	case 5:  b += k[4];
+	case 4:  a += (unsigned int)k[3] << 24;
+	case 3:  a += k[2] << 16;
+	case 2:  a += k[1] << 8;
+	case 1:  a += k[0];
+		break;
+	case 0:
+		return c;
+	}
+	c ^= b; c -= HDF_ROT(b, 14);
+	a ^= c; a -= HDF_ROT(c, 11);
+	b ^= a; b -= HDF_ROT(a, 25);
+	c ^= b; c -= HDF_ROT(b, 16);
+	a ^= c; a -= HDF_ROT(c, 4);
+	b ^= a; b -= HDF_ROT(a, 14);
+	c ^= b; c -= HDF_ROT(b, 24);
+
+	return c;
+}
+/* ------------------------------------------------------------------------- */
+/* H5Fget_file_image clears the status flags of a version 2/3 superblock (the
+   file is no more open for write in the image) but does not update the
+   superblock checksum, the image could not be opened again */
+static void HDF_Fix_Image_Superblock(unsigned char *image, size_t size)
+{
+	size_t sbsize;
+	unsigned int sum;
+
+	if ((size < 12) || (image[8] < 2))
+	{
+		return;
+	}
+	/* signature, versions/sizes/flags, 4 addresses, checksum */
+	sbsize = 12 + 4 * (size_t)image[9];
+	if (size < sbsize + 4)
+	{
+		return;
+	}
+	sum = HDF_Checksum_Metadata(image, sbsize);
+	image[sbsize] = sum & 0xff;
+	image[sbsize + 1] = (sum >> 8) & 0xff;
+	image[sbsize + 2] = (sum >> 16) & 0xff;
+	image[sbsize + 3] = (sum >> 24) & 0xff;
+}
+/* ------------------------------------------------------------------------- */
+/* file access tuning, page size and page buffer only for files on disk */
+static void HDF_Set_Access(hid_t fapl, hid_t fcpl, int memory)
+{
+	H5AC_cache_config_t mdc;
+	size_t nslots, nbytes;
+	int nelmts;
+	double w0;
+
+	if (HDF_Access.mdcsize)
+	{
+		mdc.version = H5AC__CURR_CACHE_CONFIG_VERSION;
+		H5Pget_mdc_config(fapl, &mdc);
+		mdc.set_initial_size = 1;
+		mdc.initial_size = HDF_Access.mdcsize;
+		mdc.max_size = HDF_Access.mdcsize;
+		if (mdc.min_size > HDF_Access.mdcsize)
+		{
+			mdc.min_size = HDF_Access.mdcsize;
+		}
+		H5Pset_mdc_config(fapl, &mdc);
+	}
+	if (HDF_Access.chunkcache)
+	{
+		/* slots count grows with the cache size, odd to spread the hash */
+		H5Pget_cache(fapl, &nelmts, &nslots, &nbytes, &w0);
+		if (HDF_Access.chunkcache > nbytes)
+		{
+			nslots = (nslots * (HDF_Access.chunkcache / nbytes)) | 1;
+		}
+		H5Pset_cache(fapl, nelmts, nslots, HDF_Access.chunkcache, w0);
+	}
+	if (HDF_Access.sieve)
+	{
+		H5Pset_sieve_buf_size(fapl, HDF_Access.sieve);
+	}
+	if (memory)
+	{
+		return;
+	}
+	if (HDF_Access.pagesize)
+	{
+		H5Pset_file_space_strategy(fcpl, H5F_FSPACE_STRATEGY_PAGE, 1, 1);
+		H5Pset_file_space_page_size(fcpl, HDF_Access.pagesize);
+	}
+	if (HDF_Access.pagebuffer)
+	{
+		H5Pset_page_buffer_size(fapl, HDF_Access.pagebuffer, 0, 0);
+	}
+}
+/* ------------------------------------------------------------------------- */
+/* memory is true for the HDF5 core driver without backing store, image is
+   the initial contents of the memory file (NULL for an empty new file) */
+static L3_Cursor_t*
+HDF_Open_File(char *filename, int mode, long flags,
+	int memory, void *image, size_t size)
 {
 	L3_Cursor_t *ctxt;
 	hid_t fapl, fcpl;
@@ -2345,6 +3271,9 @@ L3_openFile(char *filename, int mode, long flags)
 	ctxt->result = NULL;
 	ctxt->pathlist = NULL;
 	ctxt->currentpath = NULL;
+	L3M_CLEARSTORAGE(ctxt->storage);
+	L3M_CLEARREADTYPE(ctxt->readtype);
+	L3M_CLEARSTATS(ctxt->stats);
 
 	H5dont_atexit(); /* MANDATORY FIRST HDF5 function to call for Threading */
 
@@ -2367,6 +3296,16 @@ L3_openFile(char *filename, int mode, long flags)
 	}
 	H5Pset_fclose_degree(fapl, H5F_CLOSE_WEAK);
 	H5Pset_libver_bounds(fapl, H5F_LIBVER_LATEST, H5F_LIBVER_LATEST);
+	if (memory)
+	{
+		if ((H5Pset_fapl_core(fapl, L3C_IMAGE_INCREMENT, 0) < 0)
+			|| ((image != NULL) && (H5Pset_file_image(fapl, image, size) < 0)))
+		{
+			CHL_setError(ctxt, 3014);
+			H5Pclose(fapl);
+			return ctxt;
+		}
+	}
 
 	fcpl = H5Pcreate(H5P_FILE_CREATE);
 	if (fcpl < 0)
@@ -2376,6 +3315,7 @@ L3_openFile(char *filename, int mode, long flags)
 	}
 	H5Pset_link_creation_order(fcpl,
 		H5P_CRT_ORDER_TRACKED | H5P_CRT_ORDER_INDEXED);
+	HDF_Set_Access(fapl, fcpl, memory);
 
 	ctxt->g_proplist = H5Pcreate(H5P_GROUP_CREATE);
 	if (ctxt->g_proplist < 0)
@@ -2400,6 +3340,12 @@ L3_openFile(char *filename, int mode, long flags)
 	case L3E_OPEN_NEW:
 		L3M_TRACE(ctxt, ("newL3_Cursor_t open new\n"));
 		ctxt->file_id = H5Fcreate(filename, H5F_ACC_TRUNC, fcpl, fapl);
+		if ((ctxt->file_id < 0) && HDF_Access.pagebuffer && !memory)
+		{
+			/* no page buffer for files without pages */
+			H5Pset_page_buffer_size(fapl, 0, 0, 0);
+			ctxt->file_id = H5Fcreate(filename, H5F_ACC_TRUNC, fcpl, fapl);
+		}
 		if (ctxt->file_id < 0)
 		{
 			CHL_setError(ctxt, 3002, filename);
@@ -2411,22 +3357,49 @@ L3_openFile(char *filename, int mode, long flags)
 		break;
 	case L3E_OPEN_OLD:
 		L3M_TRACE(ctxt, ("newL3_Cursor_t open old\n"));
-		printf("ACC RDWR\n");
-		objlist_status("OPEN");
+		if (L3M_HASFLAG(ctxt, L3F_DEBUG))
+		{
+			objlist_status("OPEN");
+		}
 		ctxt->file_id = H5Fopen(filename, H5F_ACC_RDWR, fapl);
+		if ((ctxt->file_id < 0) && HDF_Access.pagebuffer && !memory)
+		{
+			/* no page buffer for files without pages */
+			H5Pset_page_buffer_size(fapl, 0, 0, 0);
+			ctxt->file_id = H5Fopen(filename, H5F_ACC_RDWR, fapl);
+		}
 		H5Eprint1(stdout);
 		if (ctxt->file_id < 0)
 		{
 			CHL_setError(ctxt, 3003, filename);
 		}
 		break;
+	case L3E_OPEN_SWMR:
+		L3M_TRACE(ctxt, ("newL3_Cursor_t read only SWMR\n"));
+#if H5_VERSION_GE(1,10,0)
+		/* no page buffer, the pages could change under the reader */
+		H5Pset_page_buffer_size(fapl, 0, 0, 0);
+		ctxt->file_id = H5Fopen(filename,
+			H5F_ACC_RDONLY | H5F_ACC_SWMR_READ, fapl);
+#endif
+		if (ctxt->file_id < 0)
+		{
+			CHL_setError(ctxt, 3007, filename);
+		}
+		break;
 	case L3E_OPEN_RDO:
 	default:
 		L3M_TRACE(ctxt, ("newL3_Cursor_t read only\n"));
 		ctxt->file_id = H5Fopen(filename, H5F_ACC_RDONLY, fapl);
+		if ((ctxt->file_id < 0) && HDF_Access.pagebuffer && !memory)
+		{
+			/* no page buffer for files without pages */
+			H5Pset_page_buffer_size(fapl, 0, 0, 0);
+			ctxt->file_id = H5Fopen(filename, H5F_ACC_RDONLY, fapl);
+		}
 		if (ctxt->file_id < 0)
 		{
-			CHL_setError(ctxt, 3004, filename);
+			CHL_setError(ctxt, (memory ? 3005 : 3004), filename);
 		}
 		break;
 	}
@@ -2437,6 +3410,86 @@ L3_openFile(char *filename, int mode, long flags)
 	return ctxt;
 }
 /* ------------------------------------------------------------------------- */
+L3_Cursor_t*
+L3_openFile(char *filename, int mode, long flags)
+{
+	return HDF_Open_File(filename, mode, flags, 0, NULL, 0);
+}
+/* ------------------------------------------------------------------------- */
+L3_Cursor_t*
+L3_openImage(char *name, void *image, size_t size, long flags)
+{
+	if (image == NULL)
+	{
+		return HDF_Open_File(name, L3E_OPEN_NEW, flags, 1, NULL, 0);
+	}
+	return HDF_Open_File(name, L3E_OPEN_RDO, flags, 1, image, size);
+}
+/* ------------------------------------------------------------------------- */
+size_t
+L3_getImage(L3_Cursor_t *ctxt, void **image)
+{
+	ssize_t size;
+
+	L3M_CHECK_CTXT_OR_DIE(ctxt, 0);
+	L3M_MXLOCK(ctxt);
+
+	*image = NULL;
+	H5Fflush(ctxt->file_id, H5F_SCOPE_GLOBAL);
+	size = H5Fget_file_image(ctxt->file_id, NULL, 0);
+	if (size > 0)
+	{
+		*image = malloc(size);
+		if ((*image != NULL)
+			&& (H5Fget_file_image(ctxt->file_id, *image, size) != size))
+		{
+			free(*image);
+			*image = NULL;
+		}
+	}
+	if (*image == NULL)
+	{
+		CHL_setError(ctxt, 3006);
+		L3M_MXUNLOCK(ctxt);
+		return 0;
+	}
+	HDF_Fix_Image_Superblock((unsigned char*)*image, (size_t)size);
+	L3M_MXUNLOCK(ctxt);
+	return (size_t)size;
+}
+/* ------------------------------------------------------------------------- */
+int L3_flush(L3_Cursor_t *ctxt)
+{
+	herr_t err;
+
+	L3M_CHECK_CTXT_OR_DIE(ctxt, 0);
+	L3M_MXLOCK(ctxt);
+	L3M_TRACE(ctxt, ("Flush\n"));
+	err = H5Fflush(ctxt->file_id, H5F_SCOPE_GLOBAL);
+	L3M_MXUNLOCK(ctxt);
+
+	return (err >= 0);
+}
+/* ------------------------------------------------------------------------- */
+int L3_startSWMR(L3_Cursor_t *ctxt)
+{
+	herr_t err = -1;
+
+	L3M_CHECK_CTXT_OR_DIE(ctxt, 0);
+	L3M_MXLOCK(ctxt);
+	L3M_TRACE(ctxt, ("Start SWMR\n"));
+#if H5_VERSION_GE(1,10,0)
+	err = H5Fstart_swmr_write(ctxt->file_id);
+#endif
+	if (err < 0)
+	{
+		CHL_setError(ctxt, 3008);
+	}
+	L3M_MXUNLOCK(ctxt);
+
+	return (err >= 0);
+}
+/* ------------------------------------------------------------------------- */
 int L3_close(L3_Cursor_t **ctxt_ptr)
 {
 	herr_t err;
@@ -2802,6 +3855,7 @@ hid_t L3_path2Node(L3_Cursor_t *ctxt, char *path)
 
 	L3M_MXLOCK(ctxt);
 	id = H5Gopen2(ctxt->root_id, path, H5P_DEFAULT);
+	L3M_STAT(ctxt, groups);
 	L3_T_ID("PTH", id);
 	L3M_MXUNLOCK(ctxt);
 
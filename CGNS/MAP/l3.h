@@ -38,6 +38,7 @@
 #define L3C_MAX_FORMAT      20
 #define L3C_MAX_FILE        1024
 #define L3C_MAX_PATH        4096   
+#define L3C_IMAGE_INCREMENT (1024*1024)
 
 /*
 @@ Enumerate: Open Modes
@@ -45,6 +46,7 @@
 #define L3E_OPEN_NEW 0 /*=* create a new file that should not already exist */
 #define L3E_OPEN_OLD 1 /*=* read or write an existing file */
 #define L3E_OPEN_RDO 2 /*=* open an existing file as read only */
+#define L3E_OPEN_SWMR 3 /*=* read only, the file may be written by another process */
 #define L3E_OPEN_READ   L3E_OPEN_RDO
 #define L3E_OPEN_UPDATE L3E_OPEN_OLD
 #define L3E_OPEN_CREATE L3E_OPEN_NEW
@@ -157,6 +159,65 @@ typedef struct L3_PathList_t
   int   index;  
 } L3_PathList_t;
  
+/* ------------------------------------------------------------------------- */
+/*
+   Dataset creation policy for new node data, a zero chunk size keeps the
+   default CHLone layout (1024 elements chunks for 1D, one slab chunks else)
+   An extendable data is always chunked, its first HDF5 dimension (the
+   last numpy one) is unlimited and can grow with L3_nodeExtend
+*/
+typedef struct L3_Storage_t
+{
+  hsize_t chunksize;  /* target chunk size in bytes, 0 means default */
+  int     deflate;    /* deflate level 1-9, 0 means no deflate */
+  int     shuffle;    /* 1 adds the shuffle filter before deflate */
+  int     fletcher32; /* 1 adds the fletcher32 checksum filter */
+  int     extend;     /* 1 makes the first dimension unlimited */
+} L3_Storage_t;
+
+#define L3M_CLEARSTORAGE(sto) \
+{(sto).chunksize=0;(sto).deflate=0;(sto).shuffle=0;(sto).fletcher32=0;\
+(sto).extend=0;}
+
+/* min count of first dimension entries in a chunk of an extendable data */
+#define L3C_MIN_EXTEND 64
+
+/* ------------------------------------------------------------------------- */
+/*
+   File access tuning used by the next file open or create, a zero value
+   keeps the HDF5 default. Page size and page buffer are not used for
+   memory files, a page buffer is used only with files created with pages.
+*/
+typedef struct L3_Access_t
+{
+  size_t mdcsize;    /* metadata cache size in bytes */
+  size_t chunkcache; /* raw data chunk cache size per dataset in bytes */
+  size_t pagesize;   /* file space page size of new files in bytes */
+  size_t pagebuffer; /* page buffer size in bytes */
+  size_t sieve;      /* sieve buffer size in bytes */
+} L3_Access_t;
+
+#define L3M_CLEARACCESS(acc) \
+{(acc).mdcsize=0;(acc).chunkcache=0;(acc).pagesize=0;(acc).pagebuffer=0;\
+(acc).sieve=0;}
+
+/* in-memory type of node data read, indexed by stored type, see
+   L3_setReadType */
+#define L3M_CLEARREADTYPE(rdt) \
+{int __n;for (__n=0;__n<=L3E_VOID;__n++){(rdt)[__n]=__n;}}
+
+/* ------------------------------------------------------------------------- */
+/* count of HDF5 objects opened or created with a cursor, the counters
+   are cleared when the file is open and by L3_resetCursor */
+typedef struct L3_Stats_t {
+  long groups;     /* node groups, children included */
+  long datasets;   /* node data and link description datasets */
+  long attributes; /* node name, label, type and flags attributes */
+} L3_Stats_t;
+
+#define L3M_CLEARSTATS(sts) \
+{(sts).groups=0;(sts).datasets=0;(sts).attributes=0;}
+
 /* ------------------------------------------------------------------------- */
 /*
    A cursor is a context keeping information on a CGNS tree, file, status
@@ -182,6 +243,9 @@ typedef struct L3_Cursor_t {
   hid_t  str_cache_label;                /* cached type attribute name */
   hid_t  str_cache_name;                 /* cached type attribute label */
   hid_t  str_cache_dtype;                /* cached type attribute dtype */
+  L3_Storage_t storage;                  /* creation policy of node data */
+  int    readtype[L3E_VOID+1];           /* in-memory type per stored type */
+  L3_Stats_t stats;                      /* HDF5 objects open/create count */
 #ifdef CHLONE_TRACK_TIME
   struct tms time;                       /* time storage for debug only */
 #endif
@@ -209,6 +273,25 @@ typedef struct L3_Node_t {
   hsize_t *block;                 /* hdf5/hyperslab spec */
 } L3_Node_t;
 
+/* ------------------------------------------------------------------------- */
+/*
+@@ Enumerate: Data Block Filters
+*/
+#define L3E_FILTER_NONE    0 /*=* raw bytes */
+#define L3E_FILTER_DEFLATE 1 /*=* zlib deflate */
+
+/*
+   A block is a part of the data of a node, stored as raw bytes in the file
+*/
+typedef struct L3_Block_t {
+  haddr_t  offset;                /* byte offset in file */
+  hsize_t  size;                  /* byte size in file */
+  hsize_t  start;                 /* byte offset in data memory */
+  hsize_t  count;                 /* byte size used in data memory */
+  hsize_t  extent;                /* byte size of the block once inflated */
+  int      filter;                /* L3E_FILTER_ enumerate */
+} L3_Block_t;
+
 #define L3M_CLEARDIMS(dims) \
 {int __nn;for (__nn=0;__nn<L3C_MAX_DIMS;__nn++){dims[__nn]=(int)-1;};}
 
@@ -278,12 +361,16 @@ nodeptr->flags=L3F_NONE;\
 /*
 @@ Function:  L3_nodeUpdatePartial
 @@ Arg:       ctxt:L3_Cursor_t*:Context to use
+@@ Arg:       src_*:hsize_t*:Hyperslab selected in the node data (memory)
+@@ Arg:       dst_*:hsize_t*:Hyperslab selected in the existing dataset (file)
 @@ Arg:       node:L3_Node_t*:Node attributes to use
-@@ Return:    The parameter context is returned
+@@ Return:    The target node hid_t
 @@ Remarks:   
-@@ The target node hid_t is in the L3_Node_t* 
-@@ If a value is NULL, or L3F_NULL for flags or L3E_NULL for data type,
-@@ then previous node value is unchanged for this attribute
+@@ The target node hid_t is in the L3_Node_t*, its data array should exist.
+@@ Only the selected part of the dataset is written, the dimensions, data
+@@ type and other attributes of the stored node are unchanged. Each
+@@ hyperslab array has one entry per dimension of its space and ends
+@@ with (hsize_t)-1, both selections should have the same points count.
 */
 /*#*/hid_t L3_nodeUpdatePartial(L3_Cursor_t *ctxt,
 				hsize_t *src_offset,
@@ -296,6 +383,35 @@ nodeptr->flags=L3F_NONE;\
 				hsize_t *dst_block,
 				L3_Node_t *node);
 
+/* ------------------------------------------------------------------------- */
+/*
+@@ Function:  L3_nodeExtend
+@@ Arg:       ctxt:L3_Cursor_t*:Context to use
+@@ Arg:       node:L3_Node_t*:Node attributes to use
+@@ Return:    The target node hid_t
+@@ Remarks:   
+@@ The target node hid_t is in the L3_Node_t*, its data array should exist.
+@@ The node data is appended at the end of the first dimension of the
+@@ stored data, the other dimensions should be the same. The data type of
+@@ the stored node is unchanged. A data stored without an unlimited first
+@@ dimension is rewritten once as an extendable chunked data, but not
+@@ if the file is in SWMR mode.
+*/
+/*#*/hid_t L3_nodeExtend(L3_Cursor_t *ctxt,L3_Node_t *node);
+
+/* ------------------------------------------------------------------------- */
+/*
+@@ Function:  L3_nodeRefresh
+@@ Arg:       ctxt:L3_Cursor_t*:Context to use
+@@ Arg:       id:hid_t:Node id
+@@ Return:    Status int (1 is ok, 0 if the node has no data)
+@@ Remarks:   
+@@ Drops the cached metadata of the node data, the next L3_nodeRetrieve
+@@ reads the dims and values as last flushed by the SWMR writer.
+@@ The file should be open with L3E_OPEN_SWMR.
+*/
+/*#*/int L3_nodeRefresh(L3_Cursor_t *ctxt,hid_t id);
+
 /* ------------------------------------------------------------------------- */
 /*
 @@ Function:  L3_nodeRelease
@@ -422,6 +538,20 @@ nodeptr->flags=L3F_NONE;\
 */
 /*#*/L3_Node_t *L3_nodeRetrieve(L3_Cursor_t *ctxt,hid_t id,L3_Node_t *node);
 
+/* ------------------------------------------------------------------------- */
+/*
+@@ Function:  L3_nodeRetrieveName
+@@ Arg:       ctxt:L3_Cursor_t*:Context to use
+@@ Arg:       id:hid_t:Node target id
+@@ Arg:       node:L3_Node_t*:Pointer to allocated node to fill in
+@@ Return:    A L3_Node_t with target node id and name
+@@ Remarks:   
+@@ Same as L3_nodeRetrieve but only the name attribute is read, the
+@@ other node attributes are unchanged. Links are not followed.
+@@ Use it to walk through children when only their names are required.
+*/
+/*#*/L3_Node_t *L3_nodeRetrieveName(L3_Cursor_t *ctxt,hid_t id,L3_Node_t *node);
+
 /* ------------------------------------------------------------------------- */
 /*
 @@ Function:  L3_nodeRetrievePartial
@@ -447,6 +577,108 @@ nodeptr->flags=L3F_NONE;\
 
 L3_Node_t *L3_nodeRetrieveContiguous(L3_Cursor_t *ctxt,hid_t oid,int index, int rank, int count, int interlaced, L3_Node_t *node);
 
+/* ------------------------------------------------------------------------- */
+/*
+@@ Function:  L3_nodeDataBlocks
+@@ Arg:       ctxt:L3_Cursor_t*:Context to use
+@@ Arg:       id:hid_t:Node target id
+@@ Arg:       filename:char*:User-allocated buffer (L3C_MAX_FILE) for file name
+@@ Arg:       blocks:L3_Block_t**:Allocated list of blocks of data in the file
+@@ Arg:       count:int*:Number of blocks in the list
+@@ Return:    Status int (1 is ok, data can be read as raw blocks of the file)
+@@ Remarks:
+@@ The node data can be read without HDF5 using L3_blockRead, for
+@@ contiguous allocated datasets or for chunked datasets with one-slab chunks
+@@ and deflate as only filter, the file type should be the native memory
+@@ type. The node should not be a link. The user application has to release
+@@ the blocks list. If status is 0, use L3_nodeRetrieve to get data.
+*/
+/*#*/int L3_nodeDataBlocks(L3_Cursor_t *ctxt,hid_t id,char *filename,L3_Block_t **blocks,int *count);
+
+/* ------------------------------------------------------------------------- */
+/*
+@@ Function:  L3_setStorage
+@@ Arg:       ctxt:L3_Cursor_t*:Context to use
+@@ Arg:       storage:L3_Storage_t*:Policy to use, NULL resets to default
+@@ Return:    Status int (1 is ok)
+@@ Remarks:
+@@ Sets the chunk size and filters used for the next created node data.
+@@ A chunk size of 0 keeps the default layout, the L3F_COMPRESS flag then
+@@ is the only way to add a filter. Arrays smaller than the chunk size are
+@@ contiguous unless a filter is set. Chunks are one slab or less of the
+@@ slowest varying dimension, with complete other dimensions if possible.
+*/
+/*#*/int L3_setStorage(L3_Cursor_t *ctxt,L3_Storage_t *storage);
+
+/* ------------------------------------------------------------------------- */
+/*
+@@ Function:  L3_setAccess
+@@ Arg:       access:L3_Access_t*:Tuning to use, NULL resets to default
+@@ Return:    Status int (1 is ok)
+@@ Remarks:
+@@ Sets the HDF5 file access tuning for all the next L3_openFile and
+@@ L3_openImage, the already open files are unchanged. The metadata cache
+@@ size is the initial and the max size of the adaptive cache, the chunk
+@@ cache is per dataset. The page size sets a paged file space strategy
+@@ for new files, the page buffer is ignored for files without pages.
+*/
+/*#*/int L3_setAccess(L3_Access_t *access);
+
+/* ------------------------------------------------------------------------- */
+/*
+@@ Function:  L3_getAccess
+@@ Arg:       access:L3_Access_t*:Pointer to allocated tuning to fill in
+@@ Return:    Status int (1 is ok)
+@@ Remarks:
+@@ Copies the current file access tuning, see L3_setAccess.
+*/
+/*#*/int L3_getAccess(L3_Access_t *access);
+
+/* ------------------------------------------------------------------------- */
+/*
+@@ Function:  L3_setReadType
+@@ Arg:       ctxt:L3_Cursor_t*:Context to use
+@@ Arg:       dtype:int:Stored data type (L3E_I4, L3E_I8, L3E_R4, L3E_R8
+@@            or the pointer enumerates)
+@@ Arg:       readtype:int:In-memory data type (same enumerates)
+@@ Return:    Status int (1 is ok)
+@@ Remarks:
+@@ The next L3_nodeRetrieve of a node data with the stored dtype returns
+@@ the data and the node dtype as readtype. The conversion is performed
+@@ by HDF5 during the read, there is no intermediate buffer of the stored
+@@ type. The read fails with an error if a value is out of the readtype
+@@ range. The conversion is not performed for partial or contiguous reads
+@@ or with the L3F_NOALLOCATE flag. L3_resetCursor clears all conversions.
+*/
+/*#*/int L3_setReadType(L3_Cursor_t *ctxt,int dtype,int readtype);
+
+/* ------------------------------------------------------------------------- */
+/*
+@@ Function:  L3_resetCursor
+@@ Arg:       ctxt:L3_Cursor_t*:Context to reset
+@@ Arg:       flags:long:Config flags, as for L3_openFile
+@@ Return:    Status int (1 is ok, the context can be used again)
+@@ Remarks:
+@@ Resets an open context to its L3_openFile state without closing
+@@ the file: config flags, error, link search path, storage policy, read
+@@ types and objects counters.
+@@ The root group is opened again if it has been closed. Used to keep
+@@ a file open between two parses.
+*/
+/*#*/int L3_resetCursor(L3_Cursor_t *ctxt,long flags);
+
+/* ------------------------------------------------------------------------- */
+/*
+@@ Function:  L3_blockRead
+@@ Arg:       fd:int:File descriptor of the file of the block
+@@ Arg:       block:L3_Block_t*:Block to read
+@@ Arg:       base:void*:Memory of the whole data array
+@@ Return:    Status int (1 is ok)
+@@ Remarks:
+@@ No HDF5 call, can be used by concurrent threads on different blocks.
+*/
+/*#*/int L3_blockRead(int fd,L3_Block_t *block,void *base);
+
 /* ------------------------------------------------------------------------- */
 /*
 @@ Function:  L3_nodePrint
@@ -471,6 +703,34 @@ L3_Node_t *L3_nodeRetrieveContiguous(L3_Cursor_t *ctxt,hid_t oid,int index, int
 */
 /*#*/L3_Cursor_t *L3_openFile(char *filename,int mode,long flags);
 
+/* ------------------------------------------------------------------------- */
+/*
+@@ Function:  L3_openImage
+@@ Arg:       name:char*:Name of the memory file (not used on disk)
+@@ Arg:       image:void*:HDF5 file image or NULL
+@@ Arg:       size:size_t:Size of the file image in bytes
+@@ Arg:       flags:long:Set of flags
+@@ Return:    A new L3_Cursor_t
+@@ Remarks:   
+@@ Same as L3_openFile but the file lives in memory (HDF5 core driver,
+@@ no backing store). With a NULL image a new empty file is created,
+@@ else the image is copied and opened as read only.
+@@ The name should be unique among the opened files.
+*/
+/*#*/L3_Cursor_t *L3_openImage(char *name,void *image,size_t size,long flags);
+
+/* ------------------------------------------------------------------------- */
+/*
+@@ Function:  L3_getImage
+@@ Arg:       ctxt:L3_Cursor_t*:Context of a memory file
+@@ Arg:       image:void**:Returned file image
+@@ Return:    Size of the image in bytes (0 on error)
+@@ Remarks:   
+@@ Flushes the file and returns a copy of its HDF5 file image, the
+@@ image is allocated and should be released with free() by the caller.
+*/
+/*#*/size_t L3_getImage(L3_Cursor_t *ctxt,void **image);
+
 /* ------------------------------------------------------------------------- */
 /*
 @@ Function:  L3_openHID
@@ -494,6 +754,29 @@ L3_Node_t *L3_nodeRetrieveContiguous(L3_Cursor_t *ctxt,hid_t oid,int index, int
 */
 /*#*/int L3_close(L3_Cursor_t **ctxt_ptr);
 
+/* ------------------------------------------------------------------------- */
+/*
+@@ Function:  L3_flush
+@@ Arg:       ctxt:L3_Cursor_t*:Context to flush
+@@ Return:    Status int (1 is ok)
+@@ Remarks:   
+@@ The HDF5 buffers of the cursor file are written, the file stays open
+*/
+/*#*/int L3_flush(L3_Cursor_t *ctxt);
+
+/* ------------------------------------------------------------------------- */
+/*
+@@ Function:  L3_startSWMR
+@@ Arg:       ctxt:L3_Cursor_t*:Context of a file open for update
+@@ Return:    Status int (1 is ok)
+@@ Remarks:   
+@@ Switches the file to HDF5 single writer multiple readers mode, the
+@@ readers open the file with L3E_OPEN_SWMR. Only the existing datasets
+@@ can be written or extended, no node can be created or removed until
+@@ the file is closed.
+*/
+/*#*/int L3_startSWMR(L3_Cursor_t *ctxt);
+
 int L3_closeShutDown(L3_Cursor_t **ctxt_ptr);
 
 /* ------------------------------------------------------------------------- */
@@ -47,6 +47,11 @@ printf msg;fflush(stdout);}
 #define L3M_TIMESTAMP( ctxt, msg )
 #endif
 
+/* ------------------------------------------------------------------------- */
+/* objects count, some attributes are read without context */
+#define L3M_STAT( ctxt, obj ) \
+if (ctxt != NULL) { ((L3_Cursor_t*)ctxt)->stats.obj++; }
+
 /* ------------------------------------------------------------------------- */
 #define L3M_ECHECKID(ctxt,id,ret)			\
 if (H5Iis_valid(id) != 1){ L3M_MXUNLOCK( ctxt ); return ret;}
@@ -8,8 +8,14 @@
 {3002,1,"Create file '%s' fails"},/*@<filename>@*/
 {3003,1,"Update file '%s' fails"},/*@<filename>@*/
 {3004,1,"Open file '%s' as read only fails"},/* @<filename>@*/
+{3005,1,"Open memory file image '%s' fails"},/*@<filename>@*/
+{3006,1,"Get memory file image fails"},/*@@*/
+{3007,1,"Open file '%s' as SWMR reader fails"},/*@<filename>@*/
+{3008,1,"Start SWMR write on file fails"},/*@@*/
 {3010,1,"Unknown file mode (integer=%d)"},/*@<filename>@*/
 {3011,1,"Property list fails for 'file'"},/*@@*/
+{3014,1,"Property list fails for 'file image'"},/*@@*/
+{3016,1,"Bad read type conversion (integer=%d to %d)"},/*@@*/
 {3012,1,"Property list fails for 'link'"},/*@@*/
 {3013,1,"Property list fails for 'group'"},/*@@*/
 {3017,1,"L3 HDF_Add_DataArray: DataType not found in this node"},/*@@*/
@@ -24,6 +30,7 @@
 {3026,1,"Create root fails while trying to set format"},/*@@*/
 {3027,1,"Create root fails while trying to set version"},/*@@*/
 {3028,1,"L3 HDF_Get_DataArrayPartial bad hyperslab parameters"},/*@@*/
+{3029,1,"Read with type conversion fails (value out of range) [%s]"},/*@<nodename>@*/
 {3030,1,"Bad nodeCreate: cannot create node [%s]"},/*@<nodename>@*/
 {3031,1,"Bad nodeCreate: cannot add name attribute [%s]"},/*@<attributename>@*/  
 {3032,1,"Bad nodeCreate: cannot add 'label' attribute"},/*@@*/  
@@ -41,6 +48,8 @@
 {3054,1,"Bad nodeUpdate: cannot update dtype on [%s]"},/*@<nodename>@*/
 {3055,1,"L3 nodeUpdate: cannot update data on [%s]"},/*@<nodename>@*/
 {3056,1,"Bad nodeUpdate: cannot update flags on [%s]"},/*@<nodename>@*/
+{3057,1,"Bad nodeUpdatePartial: bad hyperslab on [%s]"},/*@<nodename>@*/
+{3058,1,"L3 nodeUpdatePartial: cannot write data on [%s]"},/*@<nodename>@*/
 {3060,1,"Bad nodeLink: parent already is a link"},/*@@*/ 
 {3061,1,"Bad nodeLink: cannot create node [%s]"},/*@<nodename>@*/
 {3062,1,"Bad nodeLink: cannot add name attribute [%s]"},/*@<nodename>@*/
@@ -54,5 +63,9 @@
 {3092,1,"Bad nodeRetrieve: node to return not allocated"},/*@@*/
 {3093,1,"Bad node2Path: invalid node id [%d]"},/*@<id>@*/
 {3100,1,"L3 context is NULL"},/*@@*/
+{3110,1,"Bad nodeExtend: dims or type do not fit data of [%s]"},/*@<nodename>@*/
+{3111,1,"L3 nodeExtend: no data to extend on [%s]"},/*@<nodename>@*/
+{3112,1,"Bad nodeExtend: cannot rewrite [%s] as extendable in SWMR mode"},/*@<nodename>@*/
+{3113,1,"L3 nodeRefresh: cannot refresh data of [%s]"},/*@<nodename>@*/
 
 /* --- last line ----------------------------------------------------------- */
@@ -0,0 +1,494 @@
+#  -------------------------------------------------------------------------
+#  pyCGNS - Python package for CFD General Notation System -
+#  See license.txt file in the root directory of this Python module source
+#  -------------------------------------------------------------------------
+#
+# BENCHMARKS FOR RAW CHLONE INTERFACE ***
+# - not a test suite, run as a script:
+#   python -m CGNS.MAP.test.bench [benchmark [nodes...]]
+#
+from __future__ import unicode_literals
+from __future__ import print_function
+from builtins import (str, range)
+import os
+import sys
+import tempfile
+import time
+
+import numpy
+
+import CGNS.PAT.cgnslib as CGL
+import CGNS.PAT.cgnskeywords as CGK
+import CGNS.PAT.cgnsutils as CGU
+
+# each zone has 1+1+1+8 nodes, Base and CGNSLibraryVersion add 2+1 nodes
+NODESPERZONE = 11
+
+
+def genTree(nnodes, narrays=8):
+    """Create a CGNS/Python tree of about nnodes nodes, many small zones"""
+    T = CGL.newCGNSTree()
+    b = CGL.newBase(T, 'Base', 3, 3)
+    zs = numpy.array([[3, 2, 0]] * 3, dtype=numpy.int32, order='F')
+    for z in range(max(1, nnodes // NODESPERZONE)):
+        zn = CGL.newZone(b, 'Zone%07d' % z, zs)
+        f = CGL.newFlowSolution(zn, 'FlowSolution')
+        for a in range(narrays):
+            CGL.newDataArray(f, 'F%02d' % a, numpy.ones((3, 3, 3), order='F'))
+    return T
+
+
+def countNodes(T):
+    count = 0
+    stack = [T]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node[2])
+    return count
+
+
+def timeIt(fun, *args, **kw):
+    t = time.time()
+    r = fun(*args, **kw)
+    return (time.time() - t, r)
+
+
+def benchSave(sizes):
+    """Save time per node, should be flat wrt the tree size"""
+    import CGNS.MAP
+    (fd, filename) = tempfile.mkstemp(suffix='.hdf')
+    os.close(fd)
+    print('%10s %10s %12s' % ('nodes', 'save (s)', 'us/node'))
+    try:
+        for size in sizes:
+            T = genTree(size)
+            count = countNodes(T)
+            os.unlink(filename)
+            (t, r) = timeIt(CGNS.MAP.save, filename, T)
+            print('%10d %10.3f %12.2f' % (count, t, t / count * 1e6))
+    finally:
+        if os.path.exists(filename):
+            os.unlink(filename)
+
+
+STORAGE_POLICIES = [
+    ('default', None),
+    ('chunk 64k', {'chunksize': 1 << 16}),
+    ('chunk 4M', {'chunksize': 1 << 22}),
+    ('deflate 1+shuffle', {'deflate': 1, 'shuffle': True}),
+    ('deflate 6', {'deflate': 6}),
+    ('deflate 6+shuffle', {'deflate': 6, 'shuffle': True}),
+]
+
+
+def benchStorage(sizes):
+    """Write time, file size and read time for each storage policy"""
+    import CGNS.MAP
+    (fd, filename) = tempfile.mkstemp(suffix='.hdf')
+    os.close(fd)
+    print('%10s %20s %10s %10s %10s' % ('size', 'policy', 'save (s)',
+                                        'MB', 'load (s)'))
+    try:
+        for size in sizes:
+            T = CGL.newCGNSTree()
+            b = CGL.newBase(T, 'Base', 3, 3)
+            zs = numpy.array([[size, size - 1, 0]], dtype=numpy.int32)
+            z = CGL.newZone(b, 'Zone', zs, CGK.Unstructured_s)
+            x = numpy.cumsum(numpy.random.rand(size) * 1e-3)
+            CGL.newCoordinates(z, 'CoordinateX', x)
+            for (name, policy) in STORAGE_POLICIES:
+                os.unlink(filename)
+                kw = {}
+                if policy is not None:
+                    kw['storage'] = policy
+                (t, r) = timeIt(CGNS.MAP.save, filename, T, **kw)
+                mb = os.path.getsize(filename) / 1e6
+                (l, r) = timeIt(CGNS.MAP.load, filename)
+                print('%10d %20s %10.3f %10.2f %10.3f' % (size, name, t,
+                                                          mb, l))
+    finally:
+        if os.path.exists(filename):
+            os.unlink(filename)
+
+
+def tempSave(T):
+    """dumps the way it was done before, with a temporary file"""
+    import CGNS.MAP
+    (fd, filename) = tempfile.mkstemp(suffix='.hdf')
+    os.close(fd)
+    try:
+        CGNS.MAP.save(filename, T)
+        with open(filename, 'rb') as f:
+            return f.read()
+    finally:
+        os.unlink(filename)
+
+
+def tempLoad(image):
+    """loads the way it was done before, with a temporary file"""
+    import CGNS.MAP
+    (fd, filename) = tempfile.mkstemp(suffix='.hdf')
+    try:
+        os.write(fd, image)
+        os.close(fd)
+        return CGNS.MAP.load(filename)
+    finally:
+        CGNS.MAP.release(filename)
+        os.unlink(filename)
+
+
+def benchDumps(sizes):
+    """Tree to bytes and back, in memory versus with a temporary file"""
+    import CGNS.MAP
+    print('%10s %10s %10s %12s %10s %10s' % ('nodes', 'MB', 'dumps (s)',
+                                             'tmp save (s)', 'loads (s)',
+                                             'tmp load (s)'))
+    for size in sizes:
+        T = genTree(size)
+        count = countNodes(T)
+        (d, image) = timeIt(CGNS.MAP.dumps, T)
+        (s, r) = timeIt(tempSave, T)
+        (l, r) = timeIt(CGNS.MAP.loads, image)
+        (t, r) = timeIt(tempLoad, image)
+        print('%10d %10.2f %10.3f %12.3f %10.3f %10.3f' % (count,
+                                                          len(image) / 1e6,
+                                                          d, s, l, t))
+
+
+def benchSkeleton(sizes):
+    """Load time per node without data, metadata only"""
+    import CGNS.MAP
+    (fd, filename) = tempfile.mkstemp(suffix='.hdf')
+    os.close(fd)
+    flags = CGNS.MAP.S2P_DEFAULT | CGNS.MAP.S2P_NODATA
+    print('%10s %10s %12s' % ('nodes', 'load (s)', 'us/node'))
+    try:
+        for size in sizes:
+            T = genTree(size)
+            count = countNodes(T)
+            os.unlink(filename)
+            CGNS.MAP.save(filename, T)
+            (t, r) = timeIt(CGNS.MAP.load, filename, flags=flags, maxdata=0)
+            print('%10d %10.3f %12.2f' % (count, t, t / count * 1e6))
+            CGNS.MAP.release(filename)
+    finally:
+        if os.path.exists(filename):
+            os.unlink(filename)
+
+
+ACCESS_SETTINGS = [
+    ('default', False, {}),
+    ('mdc 32M', False, {'metadatacache': 1 << 25}),
+    ('mdc 128M', False, {'metadatacache': 1 << 27}),
+    ('paged', True, {}),
+    ('paged mdc 64M', True, {'metadatacache': 1 << 26}),
+]
+
+
+def benchAccess(sizes):
+    """Load time without data for each file access tuning"""
+    import CGNS.MAP
+    tmpdir = tempfile.mkdtemp()
+    files = {False: os.path.join(tmpdir, 'flat.hdf'),
+             True: os.path.join(tmpdir, 'paged.hdf')}
+    flags = CGNS.MAP.S2P_DEFAULT | CGNS.MAP.S2P_NODATA
+    print('%10s %20s %10s %12s' % ('nodes', 'access', 'load (s)', 'us/node'))
+    try:
+        for size in sizes:
+            T = genTree(size)
+            count = countNodes(T)
+            for paged in files:
+                if os.path.exists(files[paged]):
+                    os.unlink(files[paged])
+                CGNS.MAP.access(reset=True, pagesize=(1 << 16) * paged)
+                CGNS.MAP.save(files[paged], T)
+            for (name, paged, access) in ACCESS_SETTINGS:
+                CGNS.MAP.access(reset=True, **access)
+                (t, r) = timeIt(CGNS.MAP.load, files[paged], flags=flags,
+                                maxdata=0)
+                CGNS.MAP.release(files[paged])
+                print('%10d %20s %10.3f %12.2f' % (count, name, t,
+                                                   t / count * 1e6))
+    finally:
+        CGNS.MAP.access(reset=True)
+        for f in files.values():
+            if os.path.exists(f):
+                os.unlink(f)
+        os.rmdir(tmpdir)
+
+
+def benchLinks(sizes):
+    """Save and load time per link, should be flat wrt the link count"""
+    import CGNS.MAP
+    tmpdir = tempfile.mkdtemp()
+    target = os.path.join(tmpdir, 'target.hdf')
+    master = os.path.join(tmpdir, 'master.hdf')
+    print('%10s %10s %10s %12s %10s' % ('links', 'save (s)', 'load (s)',
+                                        'skip load (s)', 'us/link'))
+    try:
+        for size in sizes:
+            T = genTree(size * NODESPERZONE, narrays=1)
+            zones = ['/Base/Zone%07d' % z for z in range(size)]
+            links = [[tmpdir, 'target.hdf', p + '/FlowSolution',
+                      p + '/FlowSolution'] for p in zones]
+            skip = [p + '/ZoneType' for p in zones]
+            for f in (target, master):
+                if os.path.exists(f):
+                    os.unlink(f)
+            CGNS.MAP.save(target, T)
+            (s, r) = timeIt(CGNS.MAP.save, master, T, links=links)
+            flags = CGNS.MAP.S2P_DEFAULT | CGNS.MAP.S2P_FOLLOWLINKS
+            (l, r) = timeIt(CGNS.MAP.load, master, flags=flags,
+                            lksearch=[tmpdir])
+            (k, r) = timeIt(CGNS.MAP.load, master, flags=flags,
+                            lksearch=[tmpdir], skip=skip)
+            print('%10d %10.3f %10.3f %12.3f %10.2f' % (size, s, l, k,
+                                                        (s + l) / size * 1e6))
+            CGNS.MAP.release(master)
+            CGNS.MAP.release(target)
+    finally:
+        for f in (target, master):
+            if os.path.exists(f):
+                os.unlink(f)
+        os.rmdir(tmpdir)
+
+
+PARTIAL_SLICES = 8
+
+
+def benchPartial(sizes):
+    """Write of a large array slice by slice, full update vs partial write"""
+    import CGNS.MAP
+    (fd, filename) = tempfile.mkstemp(suffix='.hdf')
+    os.close(fd)
+    path = '/Base/Zone/FlowSolution/Density'
+    flags = CGNS.MAP.S2P_DEFAULT | CGNS.MAP.S2P_UPDATE
+    print('%12s %12s %12s %12s' % ('size', 'slices', 'full (s)',
+                                   'partial (s)'))
+    try:
+        for size in sizes:
+            T = CGL.newCGNSTree()
+            b = CGL.newBase(T, 'Base', 3, 3)
+            z = CGL.newZone(b, 'Zone', numpy.array([[size, size - 1, 0]],
+                                                   dtype=numpy.int32))
+            f = CGL.newFlowSolution(z, 'FlowSolution')
+            CGL.newDataArray(f, 'Density', numpy.zeros(size))
+            os.unlink(filename)
+            CGNS.MAP.save(filename, T)
+            n = size // PARTIAL_SLICES
+            # each writer reads the whole array, sets its slice, writes it back
+            t = time.time()
+            for k in range(PARTIAL_SLICES):
+                (t1, l, p) = CGNS.MAP.load(filename, path=path)
+                CGNS.MAP.release(filename)
+                d = CGU.getNodeByPath(t1, path)
+                d[1][k * n:(k + 1) * n] = k
+                CGNS.MAP.save(filename, t1, flags=flags, update={path: d})
+            tfull = time.time() - t
+            # each writer writes its own slice only
+            t = time.time()
+            for k in range(PARTIAL_SLICES):
+                slab = [[0], [1], [n], [1], [k * n], [1], [n], [1]]
+                d = ['Density', numpy.ones(n) * k, [], 'DataArray_t']
+                CGNS.MAP.save(filename, T, flags=flags, update={path: d},
+                              filter={path: (CGNS.MAP.SPARTIAL, slab)})
+            tpartial = time.time() - t
+            print('%12d %12d %12.3f %12.3f' % (size, PARTIAL_SLICES,
+                                               tfull, tpartial))
+    finally:
+        if os.path.exists(filename):
+            os.unlink(filename)
+
+
+WRITER_STEPS = 20
+
+
+def benchWriter(sizes):
+    """Time of the last output steps, update save vs writer"""
+    import CGNS.MAP
+    (fd, filename) = tempfile.mkstemp(suffix='.hdf')
+    os.close(fd)
+    z = '/Base/Zone'
+    b = '/Base/BaseIterativeData'
+    flags = CGNS.MAP.S2P_DEFAULT | CGNS.MAP.S2P_UPDATE
+    print('%12s %12s %14s %14s' % ('step size', 'steps', 'save (ms/step)',
+                                   'writer (ms/step)'))
+
+    def newTree():
+        T = CGL.newCGNSTree()
+        s = CGL.newBase(T, 'Base', 3, 3)
+        CGL.newZone(s, 'Zone', numpy.array([[4, 3, 0]], dtype=numpy.int32))
+        i = CGL.newBaseIterativeData(s, 'BaseIterativeData', 1,
+                                     itype=CGK.TimeValues_s)
+        i[2][0][1] = numpy.array([0.0])
+        return T
+
+    def newSolution(k, size):
+        f = CGL.newFlowSolution(None, 'FS%06d' % k)
+        CGL.newDataArray(f, 'Density', numpy.ones(size))
+        return f
+
+    try:
+        for size in sizes:
+            # each step reloads the iterative data and saves the updates
+            os.unlink(filename)
+            CGNS.MAP.save(filename, newTree())
+            for k in range(1, WRITER_STEPS + 1):
+                if k == WRITER_STEPS // 2:
+                    t = time.time()
+                (t1, l, p) = CGNS.MAP.load(filename, path=b)
+                CGNS.MAP.release(filename)
+                i = CGU.getNodeByPath(t1, b)
+                i[1][0] = k + 1
+                v = i[2][0]
+                v[1] = numpy.append(v[1], [k])
+                CGNS.MAP.save(filename, t1, flags=flags,
+                              update={z + '/FS%06d' % k: newSolution(k, size),
+                                      b: i})
+            tsave = time.time() - t
+            # the writer only appends the new step
+            os.unlink(filename)
+            w = CGNS.MAP.Writer(filename, newTree())
+            for k in range(1, WRITER_STEPS + 1):
+                if k == WRITER_STEPS // 2:
+                    t = time.time()
+                w.append(z, newSolution(k, size))
+                w.extend(b + '/TimeValues', numpy.array([float(k)]))
+                w.append('/Base', ['BaseIterativeData',
+                                   numpy.array([k + 1], dtype=numpy.int32),
+                                   [], CGK.BaseIterativeData_ts])
+                w.flush()
+            twriter = time.time() - t
+            w.close()
+            n = WRITER_STEPS - WRITER_STEPS // 2 + 1
+            print('%12d %12d %14.3f %14.3f' % (size, WRITER_STEPS,
+                                               tsave / n * 1e3,
+                                               twriter / n * 1e3))
+    finally:
+        if os.path.exists(filename):
+            os.unlink(filename)
+
+
+SWMR_POLLS = 20
+
+
+def benchSWMR(sizes):
+    """Time of one poll of a file being written, load vs reader"""
+    import CGNS.MAP
+    (fd, filename) = tempfile.mkstemp(suffix='.hdf')
+    os.close(fd)
+    b = '/Base/BaseIterativeData'
+    v = b + '/TimeValues'
+    flags = CGNS.MAP.S2P_DEFAULT | CGNS.MAP.S2P_SWMR
+    print('%10s %14s %16s' % ('nodes', 'load (ms/poll)', 'reader (ms/poll)'))
+    try:
+        for size in sizes:
+            T = genTree(size)
+            i = CGL.newBaseIterativeData(CGU.getNodeByPath(T, '/Base'),
+                                         'BaseIterativeData', 1,
+                                         itype=CGK.TimeValues_s)
+            i[2][0][1] = numpy.array([0.0])
+            count = countNodes(T)
+            os.unlink(filename)
+            w = CGNS.MAP.Writer(filename, T, flags=flags)
+            r = CGNS.MAP.Reader(filename)
+            (tload, treader) = (0.0, 0.0)
+            for k in range(1, SWMR_POLLS + 1):
+                w.extend(v, numpy.array([float(k)]))
+                w.flush()
+                t = time.time()
+                r.read(v)
+                treader += time.time() - t
+            r.close()
+            # the loads share the HDF5 file with the writer, not with the reader
+            for k in range(1, SWMR_POLLS + 1):
+                w.extend(v, numpy.array([float(k)]))
+                w.flush()
+                t = time.time()
+                CGNS.MAP.load(filename, flags=flags, path=b)
+                tload += time.time() - t
+            w.close()
+            print('%10d %14.3f %16.3f' % (count, tload / SWMR_POLLS * 1e3,
+                                          treader / SWMR_POLLS * 1e3))
+    finally:
+        if os.path.exists(filename):
+            os.unlink(filename)
+
+
+def benchDigests(sizes):
+    """Digests cost per node, file digests vs plain load and tree digests"""
+    import CGNS.MAP
+    (fd, filename) = tempfile.mkstemp(suffix='.hdf')
+    os.close(fd)
+    print('%10s %14s %16s %16s' % ('nodes', 'load (us/node)',
+                                   'file (us/node)', 'tree (us/node)'))
+    try:
+        for size in sizes:
+            T = genTree(size)
+            count = countNodes(T)
+            os.unlink(filename)
+            CGNS.MAP.save(filename, T)
+            (tload, r) = timeIt(CGNS.MAP.load, filename)
+            (tfile, d) = timeIt(CGNS.MAP.digests, filename)
+            (ttree, e) = timeIt(CGNS.MAP.digests, T)
+            assert d == e
+            print('%10d %14.2f %16.2f %16.2f' % (count, tload / count * 1e6,
+                                                 tfile / count * 1e6,
+                                                 ttree / count * 1e6))
+    finally:
+        if os.path.exists(filename):
+            os.unlink(filename)
+
+
+def benchShared(sizes):
+    """Handoff of a tree to another process, pickle vs shared tree"""
+    import pickle
+    import CGNS.MAP
+    print('%10s %14s %14s %14s %14s' % ('nodes', 'pickle (MB)', 'pickle (ms)',
+                                        'shared (MB)', 'shared (ms)'))
+    for size in sizes:
+        T = genTree(size, narrays=2)
+        for z in CGU.getNodeByPath(T, '/Base')[2]:
+            CGL.newGridCoordinates(z, 'GridCoordinates')
+            CGL.newDataArray(z[2][-1], 'CoordinateX',
+                             numpy.ones((100, 100), order='F'))
+        count = countNodes(T)
+        (tpickle, t) = timeIt(lambda: pickle.loads(pickle.dumps(T, -1)))
+        ipickle = len(pickle.dumps(T, -1))
+        with CGNS.MAP.SharedTree(T) as s:
+            (tshared, w) = timeIt(lambda: pickle.loads(pickle.dumps(s, -1)))
+            ishared = len(pickle.dumps(s, -1))
+            w.close()
+            w = None
+        print('%10d %14.1f %14.1f %14.1f %14.1f' % (count, ipickle / 1e6,
+                                                    tpickle * 1e3,
+                                                    ishared / 1e6,
+                                                    tshared * 1e3))
+
+
+BENCHMARKS = {
+    'save': (benchSave, [10000, 100000, 1000000]),
+    'storage': (benchStorage, [1000000, 10000000, 100000000]),
+    'dumps': (benchDumps, [10000, 100000, 1000000]),
+    'links': (benchLinks, [1000, 10000]),
+    'skeleton': (benchSkeleton, [10000, 100000, 1000000]),
+    'access': (benchAccess, [10000, 100000, 1000000]),
+    'partial': (benchPartial, [1000000, 10000000, 100000000]),
+    'writer': (benchWriter, [1000, 100000, 1000000]),
+    'swmr': (benchSWMR, [10000, 100000, 1000000]),
+    'digests': (benchDigests, [10000, 100000, 1000000]),
+    'shared': (benchShared, [1000, 10000, 100000]),
+}
+
+if __name__ == '__main__':
+    name = 'save'
+    if len(sys.argv) > 1:
+        name = sys.argv[1]
+    (bench, sizes) = BENCHMARKS[name]
+    if len(sys.argv) > 2:
+        sizes = [int(s) for s in sys.argv[2:]]
+    print('-' * 70 + '\nCGNS.MAP benchmark [%s]' % name)
+    bench(sizes)
+
+# --- last line
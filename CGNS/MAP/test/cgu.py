@@ -11,13 +11,16 @@ from __future__ import unicode_literals
 from __future__ import print_function
 from builtins import (bytes, str, range, dict)
 import os
+import pickle
 import subprocess
+import sys
 import unittest
 
 import numpy
 
 import CGNS.PAT.cgnskeywords as CGK
 import CGNS.PAT.cgnslib as CGL
+import CGNS.PAT.cgnsutils as CGU
 
 
 def genTrees():
@@ -169,6 +172,681 @@ class MAPTestCase(unittest.TestCase):
         CHLone.save(self.HDF01, self.T)
         (t, l, p) = CHLone.load(self.HDF01)
 
+    def test_019_Load_Threads(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        g = CGU.getNodeByPath(self.T, '/{Base}/{Zone}/GridCoordinates')
+        for n in range(4):
+            CGL.newDataArray(g, 'Large%d' % n,
+                             numpy.random.rand(100, 100 + n).astype('d', order='F'))
+        CGL.newDataArray(g, 'LargeI', numpy.arange(20000, dtype='i'))
+        for flags in [CHLone.FDEFAULT, CHLone.FDEFAULT | CHLone.FCOMPRESS]:
+            self.unlink(self.HDF01)
+            CHLone.save(self.HDF01, self.T, flags=flags)
+            (t1, l, p) = CHLone.load(self.HDF01)
+            (t2, l, p) = CHLone.load(self.HDF01, threads=3)
+            g1 = CGU.getNodeByPath(t1, '/{Base}/{Zone}/GridCoordinates')
+            g2 = CGU.getNodeByPath(t2, '/{Base}/{Zone}/GridCoordinates')
+            self.assertEqual([n[0] for n in g1[2]], [n[0] for n in g2[2]])
+            for (n1, n2) in zip(g1[2], g2[2]):
+                self.assertEqual(n1[1].dtype, n2[1].dtype)
+                self.assertEqual(n1[1].shape, n2[1].shape)
+                self.assertTrue(n2[1].flags.f_contiguous)
+                self.assertTrue(numpy.array_equal(n1[1], n2[1]))
+        self.assertRaisesRegexp(CHLone.CHLoneException,
+                                "[918].*", CHLone.load, self.HDF01, threads='4')
+
+    def test_020_Load_Memmap(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        p = '/{Base}/{Zone}/GridCoordinates'
+        CGL.newDataArray(CGU.getNodeByPath(self.T, p), 'Vector',
+                         numpy.random.rand(1000))
+        self.unlink(self.HDF01)
+        CHLone.save(self.HDF01, self.T)
+        (t1, l, x) = CHLone.load(self.HDF01)
+        (t2, l, x) = CHLone.load(self.HDF01, mmap=True)
+        v1 = CGU.getNodeByPath(t1, p + '/Vector')[1]
+        v2 = CGU.getNodeByPath(t2, p + '/Vector')[1]
+        self.assertTrue(isinstance(v2, numpy.memmap))
+        self.assertFalse(v2.flags.writeable)
+        self.assertTrue(numpy.array_equal(v1, v2))
+        # chunked data is read as usual
+        v1 = CGU.getNodeByPath(t1, p + '/CoordinateX')[1]
+        v2 = CGU.getNodeByPath(t2, p + '/CoordinateX')[1]
+        self.assertFalse(isinstance(v2, numpy.memmap))
+        self.assertTrue(numpy.array_equal(v1, v2))
+
+    def test_021_Load_Lazy(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        p = '/{Base}/{Zone}/GridCoordinates'
+        CGL.newDataArray(CGU.getNodeByPath(self.T, p), 'Vector',
+                         numpy.random.rand(100, 20).astype('d', order='F'))
+        self.unlink(self.HDF01)
+        CHLone.save(self.HDF01, self.T)
+        (t1, l, x) = CHLone.load(self.HDF01)
+        (t2, l, x) = CHLone.load(self.HDF01, lazy=100)
+        # small data is read as usual
+        v2 = CGU.getNodeByPath(t2, p + '/CoordinateX')[1]
+        self.assertTrue(isinstance(v2, numpy.ndarray))
+        v1 = CGU.getNodeByPath(t1, p + '/Vector')[1]
+        v2 = CGU.getNodeByPath(t2, p + '/Vector')[1]
+        self.assertTrue(isinstance(v2, CHLone.CHLoneLazyArray))
+        self.assertEqual(v2.shape, v1.shape)
+        self.assertEqual(v2.dtype, v1.dtype)
+        self.assertFalse(v2.loaded)
+        self.assertEqual(v2[3, 4], v1[3, 4])
+        self.assertTrue(v2.loaded)
+        self.assertTrue(numpy.array_equal(numpy.asarray(v2), v1))
+        self.assertTrue(numpy.asarray(v2).flags.f_contiguous)
+        self.assertTrue(numpy.array_equal(v2 * 2, v1 * 2))
+        v2.release()
+        self.assertFalse(v2.loaded)
+        # no handle cache by default, the file is not kept open
+        self.assertEqual(CHLone.release(self.HDF01), 0)
+        self.assertEqual(v2.sum(), v1.sum())
+        # save closes the lazy handles of the target file
+        CHLone.save(self.HDF01, t1)
+        self.assertEqual(CHLone.release(), 0)
+        self.assertRaisesRegexp(CHLone.CHLoneException,
+                                "[919].*", CHLone.load, self.HDF01, lazy='4')
+        self.assertRaisesRegexp(CHLone.CHLoneException,
+                                "[909].*", CHLone.load, self.HDF01,
+                                lazy=True, maxdata=4)
+        # the values not accessed are read by the save, to another file
+        # and back to their own file
+        for target in [self.HDF02, self.HDF01]:
+            (t2, l, x) = CHLone.load(self.HDF01, lazy=100)
+            self.assertFalse(CGU.getNodeByPath(t2, p + '/Vector')[1].loaded)
+            self.unlink(self.HDF02)
+            CHLone.save(target, t2)
+            self.assertFalse(CGU.getNodeByPath(t2, p + '/Vector')[1].loaded)
+            (t3, l, x) = CHLone.load(target)
+            self.assertEqual(CGU.diff(t1, t3), {})
+            self.assertTrue(numpy.array_equal(CGU.getNodeByPath(t3, p + '/Vector')[1],
+                                              CGU.getNodeByPath(t1, p + '/Vector')[1]))
+        self.unlink(self.HDF02)
+
+    def test_022_Iterate(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        self.unlink(self.HDF01)
+        CHLone.save(self.HDF01, self.T)
+        (t, l, x) = CHLone.load(self.HDF01)
+        r = list(CHLone.iterate(self.HDF01))
+        self.assertEqual(sorted([n[0] for n in r]), sorted(CGU.getAllPaths(t)))
+        for (path, name, stype, dtype, dims, value) in r:
+            node = CGU.getNodeByPath(t, path)
+            self.assertEqual(name, node[0])
+            self.assertEqual(stype, node[3])
+            self.assertIsNone(value)
+            if node[1] is not None:
+                self.assertEqual(dims, node[1].shape)
+        r = list(CHLone.iterate(self.HDF01, types=[CGK.DataArray_ts],
+                                withdata=True))
+        self.assertEqual(len(r), 3)
+        for n in r:
+            self.assertTrue(numpy.array_equal(n[5], CGU.getNodeByPath(t, n[0])[1]))
+        r = [n[0] for n in CHLone.iterate(self.HDF01, depth=2)]
+        self.assertEqual(r, ['/CGNSLibraryVersion', '/{Base}', '/{Base}/{Zone}'])
+        it = CHLone.iterate(self.HDF01)
+        self.assertEqual(next(it)[0], '/CGNSLibraryVersion')
+        it.close()
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[900].*",
+                                list, CHLone.iterate('foo.hdf'))
+
+    def test_023_Save_Storage(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        p = '/{Base}/{Zone}/GridCoordinates'
+        CGL.newDataArray(CGU.getNodeByPath(self.T, p), 'Vector',
+                         numpy.zeros((200, 300), dtype='d', order='F'))
+        self.unlink(self.HDF01)
+        CHLone.save(self.HDF01, self.T)
+        size = os.path.getsize(self.HDF01)
+        (t1, l, x) = CHLone.load(self.HDF01)
+        self.unlink(self.HDF01)
+        CHLone.save(self.HDF01, self.T,
+                    storage={'chunksize': 4096,
+                             'types': {'DataArray_t': {'deflate': 4,
+                                                       'shuffle': True}},
+                             'paths': {p + '/CoordinateX':
+                                       {'fletcher32': True}}})
+        self.assertTrue(os.path.getsize(self.HDF01) < size)
+        (t2, l, x) = CHLone.load(self.HDF01)
+        for path in CGU.getAllPaths(t1):
+            v1 = CGU.getNodeByPath(t1, path)[1]
+            v2 = CGU.getNodeByPath(t2, path)[1]
+            if v1 is None:
+                self.assertIsNone(v2)
+            else:
+                self.assertTrue(numpy.array_equal(v1, v2))
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[940].*",
+                                CHLone.save, self.HDF01, self.T,
+                                storage={'chunk': 4096})
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[940].*",
+                                CHLone.save, self.HDF01, self.T,
+                                storage={'deflate': 12})
+
+    def test_024_Save_Incremental(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        p = '/{Base}/{Zone}/GridCoordinates'
+        self.unlink(self.HDF01)
+        CHLone.save(self.HDF01, self.T)
+        (t, l, x) = CHLone.load(self.HDF01, track=True)
+        snap = CHLone.snapshot(t)
+        self.assertEqual(sorted(snap), sorted(CGU.getAllPaths(t)))
+        CHLone.save(self.HDF01, t, incremental=True)
+        n = CGU.getNodeByPath(t, p + '/CoordinateX')
+        n[1] = n[1] * 2.0
+        CGL.newDataArray(CGU.getNodeByPath(t, p), 'Vector',
+                         numpy.ones((4, 3), order='F'))
+        CGU.removeChildByName(CGU.getNodeByPath(t, p), 'CoordinateY')
+        self.assertEqual(sorted([k for k in CHLone.snapshot(t)
+                                 if snap.get(k) != CHLone.snapshot(t)[k]]),
+                         [p + '/CoordinateX', p + '/Vector'])
+        CHLone.save(self.HDF01, t, incremental=True)
+        (t2, l, x) = CHLone.load(self.HDF01)
+        self.assertEqual(sorted(CGU.getAllPaths(t)), sorted(CGU.getAllPaths(t2)))
+        for path in CGU.getAllPaths(t):
+            v1 = CGU.getNodeByPath(t, path)[1]
+            v2 = CGU.getNodeByPath(t2, path)[1]
+            if v1 is None:
+                self.assertIsNone(v2)
+            else:
+                self.assertTrue(numpy.array_equal(v1, v2))
+        # an explicit snapshot can be used instead of the load tracking
+        snap = CHLone.snapshot(t2)
+        CGU.getNodeByPath(t2, p + '/Vector')[1][0, 0] = 5.0
+        CHLone.save(self.HDF01, t2, incremental=snap)
+        (t3, l, x) = CHLone.load(self.HDF01)
+        self.assertEqual(CGU.getNodeByPath(t3, p + '/Vector')[1][0, 0], 5.0)
+        # the tracking keeps no reference to the tree
+        (t4, l, x) = CHLone.load(self.HDF01, track=True)
+        r = sys.getrefcount(t4)
+        CHLone.untrack(t4)
+        self.assertEqual(sys.getrefcount(t4), r)
+        # lazy tree: a proxy changed in place is rewritten with its data,
+        # the proxies not accessed are kept as they are in the file
+        (t5, l, x) = CHLone.load(self.HDF01, track=True, lazy=8)
+        v = CGU.getNodeByPath(t5, p + '/CoordinateX')[1]
+        self.assertTrue(isinstance(v, CHLone.CHLoneLazyArray))
+        v[0, 0] = -3.0
+        CHLone.save(self.HDF01, t5, incremental=True)
+        self.assertFalse(CGU.getNodeByPath(t5, p + '/Vector')[1].loaded)
+        (t6, l, x) = CHLone.load(self.HDF01)
+        self.assertEqual(CGU.getNodeByPath(t6, p + '/CoordinateX')[1][0, 0], -3.0)
+        for path in CGU.getAllPaths(t3):
+            v1 = CGU.getNodeByPath(t3, path)[1]
+            v2 = CGU.getNodeByPath(t6, path)[1]
+            if v1 is None:
+                self.assertIsNone(v2)
+            elif path != p + '/CoordinateX':
+                self.assertTrue(numpy.array_equal(v1, v2))
+        CHLone.untrack()
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[921].*",
+                                CHLone.save, self.HDF01, t, incremental=1)
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[909].*",
+                                CHLone.save, self.HDF01, t,
+                                incremental=True, skip=[p])
+
+    def test_025_Cache(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        p = '/{Base}/{Zone}/GridCoordinates/CoordinateX'
+        self.unlink(self.HDF01)
+        CHLone.save(self.HDF01, self.T)
+        CHLone.release()
+        self.assertEqual(CHLone.cache()['size'], 0)
+        (t1, l, x) = CHLone.load(self.HDF01)
+        self.assertEqual(CHLone.cache()['files'], [])
+        CHLone.cache(size=8, reset=True)
+        (t1, l, x) = CHLone.load(self.HDF01)
+        for n in range(3):
+            (t2, l, x) = CHLone.load(self.HDF01, path='/{Base}/{Zone}')
+        self.assertTrue(CHLone.probe(self.HDF01, '/{Base}'))
+        self.assertFalse(CHLone.probe(self.HDF01, '/Foo'))
+        c = CHLone.cache()
+        self.assertEqual((c['hits'], c['misses']), (5, 1))
+        self.assertEqual(c['files'], [os.path.realpath(self.HDF01)])
+        # a cached file can be written and is read again after the change
+        n = CGU.getNodeByPath(self.T, p)
+        n[1] = n[1] + 1.0
+        CHLone.save(self.HDF01, self.T)
+        (t2, l, x) = CHLone.load(self.HDF01)
+        self.assertTrue(numpy.array_equal(CGU.getNodeByPath(t2, p)[1], n[1]))
+        self.assertEqual(CHLone.cache(reset=True)['misses'], 2)
+        self.assertEqual(CHLone.cache(size=0)['files'], [])
+        CHLone.load(self.HDF01)
+        c = CHLone.cache(size=8)
+        self.assertEqual((c['hits'], c['misses'], c['files']), (0, 1, []))
+        CHLone.cache(size=0)
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[922].*",
+                                CHLone.cache, '8')
+
+    def test_026_Load_Paths(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        b = CGU.getNodeByPath(self.T, '/{Base}')
+        for n in range(4):
+            CGL.newZone(b, 'Zone%d' % n,
+                        numpy.array([[5, 4, 0]] * 3, dtype='i', order='F'))
+        self.unlink(self.HDF01)
+        CHLone.save(self.HDF01, self.T)
+        p = '/{Base}/{Zone}/GridCoordinates/CoordinateX'
+        (t, l, x) = CHLone.load(self.HDF01,
+                                paths=['/{Base}/Zone1', '/{Base}/Zone3/', p])
+        r = CGU.getAllPaths(t)
+        for path in ['/{Base}/Zone1/ZoneType', '/{Base}/Zone3', p]:
+            self.assertTrue(path in r)
+        for path in ['/{Base}/Zone0', '/{Base}/Zone2',
+                     '/{Base}/{Zone}/GridCoordinates/CoordinateY']:
+            self.assertFalse(path in r)
+        self.assertTrue(numpy.array_equal(CGU.getNodeByPath(t, p)[1],
+                                          CGU.getNodeByPath(self.T, p)[1]))
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[923].*",
+                                CHLone.load, self.HDF01, paths='/{Base}')
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[923].*",
+                                CHLone.load, self.HDF01, paths=[])
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[909].*",
+                                CHLone.load, self.HDF01, paths=[p], path=p)
+
+    def test_027_Dumps_Loads(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        p = '/{Base}/{Zone}/GridCoordinates/CoordinateX'
+        image = CHLone.dumps(self.T)
+        self.assertTrue(isinstance(image, bytes))
+        (t, l, x) = CHLone.loads(image)
+        self.assertEqual(CGU.getAllPaths(t), CGU.getAllPaths(self.T))
+        self.assertTrue(numpy.array_equal(CGU.getNodeByPath(t, p)[1],
+                                          CGU.getNodeByPath(self.T, p)[1]))
+        self.unlink(self.HDF01)
+        with open(self.HDF01, 'wb') as f:
+            f.write(image)
+        (t, l, x) = CHLone.load(self.HDF01)
+        self.assertEqual(CGU.getAllPaths(t), CGU.getAllPaths(self.T))
+        self.unlink(self.HDF02)
+        CHLone.save(self.HDF02, self.T)
+        T = CGL.newCGNSTree()
+        CGL.newBase(T, '{Base}', 3, 3)
+        lk = [[os.getcwd(), self.HDF02, '/{Base}/{Zone}', '/{Base}/{Zone}']]
+        (t, l, x) = CHLone.loads(CHLone.dumps(T, links=lk),
+                                 flags=CHLone.FDEFAULT | CHLone.FFOLLOWLINKS,
+                                 lksearch=[os.getcwd()])
+        self.assertEqual(l, [[os.getcwd(), self.HDF02, '/{Base}/{Zone}',
+                              '/{Base}/{Zone}', CHLone.LKOK]])
+        self.assertTrue(numpy.array_equal(CGU.getNodeByPath(t, p)[1],
+                                          CGU.getNodeByPath(self.T, p)[1]))
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[924].*",
+                                CHLone.loads, '/{Base}')
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[910].*",
+                                CHLone.loads, image, lazy=True)
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[907].*",
+                                CHLone.dumps, self.T, flags=CHLone.FUPDATE)
+
+    def test_028_Load_Dtypes(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        p = '/{Base}/{Zone}/GridCoordinates/CoordinateX'
+        z = CGU.getNodeByPath(self.T, '/{Base}/{Zone}')
+        CGL.newDataArray(z, 'I8', numpy.arange(6, dtype='int64'))
+        CGL.newDataArray(z, 'Big', numpy.array([1, 1 << 40], dtype='int64'))
+        CGL.newDataArray(z, 'Huge', numpy.array([1e300]))
+        # nodes parsed after the failed conversions
+        CGL.newDataArray(z, 'Tail', numpy.arange(3, dtype='int64'))
+        self.unlink(self.HDF01)
+        CHLone.save(self.HDF01, self.T)
+        (t, l, x) = CHLone.load(self.HDF01,
+                                skip=['/{Base}/{Zone}/Big', '/{Base}/{Zone}/Huge'],
+                                dtypes={'R8': numpy.float32, 'I8': 'int32'})
+        a = CGU.getNodeByPath(t, p)[1]
+        self.assertEqual(a.dtype, numpy.float32)
+        self.assertEqual(a.shape, (5, 7))
+        self.assertTrue(numpy.array_equal(a, CGU.getNodeByPath(self.T, p)[1]))
+        a = CGU.getNodeByPath(t, '/{Base}/{Zone}/I8')[1]
+        self.assertEqual(a.dtype, numpy.int32)
+        self.assertTrue(numpy.array_equal(a, numpy.arange(6)))
+        self.assertEqual(CGU.getNodeByPath(t, '/{Base}/{Zone}/Tail')[1].dtype,
+                         numpy.int32)
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[106].*Big",
+                                CHLone.load, self.HDF01, dtypes={'I8': 'int32'})
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[106].*Huge",
+                                CHLone.load, self.HDF01, dtypes={'R8': 'float32'})
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[925].*",
+                                CHLone.load, self.HDF01, dtypes={'C1': 'I4'})
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[909].*",
+                                CHLone.load, self.HDF01, dtypes={'R8': 'R4'},
+                                lazy=True)
+
+    def test_029_Profile(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        p = '/{Base}/{Zone}/GridCoordinates/CoordinateX'
+        self.unlink(self.HDF01)
+        r = CHLone.save(self.HDF01, self.T, profile=True)
+        self.assertEqual(r['files'], 1)
+        self.assertEqual(r['bytes'], CHLone.save(self.HDF02, self.T,
+                                                 profile=1)['bytes'])
+        (t, l, x, r) = CHLone.load(self.HDF01, profile=2)
+        self.assertTrue(CGU.checkSameTree(t, self.T))
+        self.assertEqual(sorted(r['time']), ['close', 'data', 'links', 'meta',
+                                             'open', 'python', 'total'])
+        self.assertTrue(r['time']['total'] >= r['time']['data'])
+        self.assertEqual(r['nodes'], len(list(CGU.getAllPaths(t))))
+        self.assertTrue(r['objects']['attributes'] >= 3 * r['nodes'])
+        self.assertEqual(len(r['slowest']), 2)
+        self.assertTrue(r['slowest'][0][1] >= r['slowest'][1][1])
+        self.assertTrue(r['slowest'][0][0] in CGU.getAllPaths(t))
+        (t, l, x, r) = CHLone.load(self.HDF01, profile=True,
+                                   flags=CHLone.FDEFAULT | CHLone.FNODATA,
+                                   maxdata=10)
+        self.assertTrue(r['bytes'] < CGU.getNodeByPath(self.T, p)[1].nbytes)
+        self.assertEqual(len(CHLone.load(self.HDF01, profile=False)), 3)
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[926].*",
+                                CHLone.load, self.HDF01, profile='yes')
+
+    def test_030_Links_Many(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        T = CGL.newCGNSTree()
+        b = CGL.newBase(T, '{Base}', 3, 3)
+        zs = numpy.array([[3, 2, 0]] * 3, dtype=numpy.int32, order='F')
+        zones = ['/{Base}/Z%04d' % n for n in range(600)]
+        for p in zones:
+            z = CGL.newZone(b, p.split('/')[-1], zs)
+            CGL.newDataArray(CGL.newFlowSolution(z, '{Sol}'), 'D',
+                             numpy.ones((2, 2, 2), order='F'))
+        self.unlink(self.HDF01)
+        self.unlink(self.HDF02)
+        CHLone.save(self.HDF02, T)
+        lk = [[os.getcwd(), self.HDF02, p + '/{Sol}', p + '/{Sol}']
+              for p in zones]
+        CHLone.save(self.HDF01, T, links=lk + lk[:1])
+        (t, l, x) = CHLone.load(self.HDF01,
+                                flags=CHLone.FDEFAULT | CHLone.FFOLLOWLINKS,
+                                lksearch=[os.getcwd()], skip=zones[1:])
+        self.assertEqual(len(l), 1)
+        self.assertEqual(l[0][2], zones[0] + '/{Sol}')
+        self.assertIsNotNone(CGU.getNodeByPath(t, zones[0] + '/{Sol}/D'))
+        self.assertIsNone(CGU.getNodeByPath(t, zones[-1]))
+        (t, l, x) = CHLone.load(self.HDF01,
+                                flags=CHLone.FDEFAULT | CHLone.FFOLLOWLINKS,
+                                lksearch=[os.getcwd()])
+        self.assertEqual(sorted(lke[2] for lke in l),
+                         [p + '/{Sol}' for p in zones])
+        self.assertTrue(CGU.checkSameTree(t, T))
+
+    def test_031_Load_Children(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        g = CGU.getNodeByPath(self.T, '/{Base}/{Zone}/GridCoordinates')
+        names = ['D%02d' % n for n in range(40, 0, -3)]
+        for n in names:
+            CGL.newDataArray(g, n, numpy.ones((3,), order='F'))
+        self.unlink(self.HDF01)
+        CHLone.save(self.HDF01, self.T)
+        (t, l, x, r) = CHLone.load(self.HDF01, profile=True,
+                                   flags=CHLone.FDEFAULT | CHLone.FNODATA,
+                                   maxdata=1)
+        c = CGU.getNodeByPath(t, '/{Base}/{Zone}/GridCoordinates')[2]
+        self.assertEqual([n[0] for n in c][3:], names)
+        self.assertEqual(CGU.getAllPaths(t), CGU.getAllPaths(self.T))
+        self.assertTrue(r['objects']['attributes'] < 8 * r['nodes'])
+        self.assertTrue(r['objects']['datasets'] < 1.5 * r['nodes'])
+
+    def test_032_Access(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        self.assertEqual(CHLone.access(reset=True),
+                         dict.fromkeys(CHLone.ACCESS_KEYS, 0))
+        try:
+            r = CHLone.access(pagesize=4096, metadatacache=1 << 23)
+            self.assertEqual(r['pagesize'], 4096)
+            r = CHLone.access(chunkcache=1 << 22, sieve=1 << 16)
+            self.assertEqual(r['metadatacache'], 1 << 23)
+            self.unlink(self.HDF01)
+            CHLone.save(self.HDF01, self.T)
+            self.unlink(self.HDF02)
+            CHLone.dumps(self.T)
+            CHLone.access(pagesize=0)
+            CHLone.save(self.HDF02, self.T)
+            for f in [self.HDF01, self.HDF02]:
+                (t, l, x) = CHLone.load(f)
+                self.assertTrue(CGU.checkSameTree(t, self.T))
+                CHLone.release(f)
+        finally:
+            CHLone.access(reset=True)
+        (t, l, x) = CHLone.load(self.HDF01)
+        self.assertTrue(CGU.checkSameTree(t, self.T))
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[941].*",
+                                CHLone.access, pages=1)
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[941].*",
+                                CHLone.access, pagesize=64)
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[941].*",
+                                CHLone.access, metadatacache=1 << 30)
+        # a paged file is loaded without page buffer, which is rejected
+        try:
+            CHLone.access(pagesize=4096)
+            g = CGU.getNodeByPath(self.T, '/{Base}/{Zone}')
+            for n in range(50):
+                CGL.newDataArray(g, 'A%d' % n, numpy.arange(n * 100.0))
+            self.unlink(self.HDF01)
+            CHLone.save(self.HDF01, self.T)
+            self.assertRaisesRegexp(CHLone.CHLoneException, "[947].*",
+                                    CHLone.access, pagebuffer=1 << 20)
+            self.assertEqual(CHLone.access(pagebuffer=0)['pagebuffer'], 0)
+            (t, l, x) = CHLone.load(self.HDF01)
+            self.assertTrue(CGU.checkSameTree(t, self.T))
+        finally:
+            CHLone.access(reset=True)
+
+    def test_033_Save_Partial(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        p = '/{Base}/{Zone}/GridCoordinates/CoordinateX'
+        flags = CHLone.FDEFAULT | CHLone.FUPDATE
+        self.unlink(self.HDF01)
+        CHLone.save(self.HDF01, self.T)
+        # two workers write their own columns of the (5,7) array, the
+        # hyperslabs are in the HDF5 dimensions order, here (7,5)
+        for (j, n) in [(0, 3), (3, 4)]:
+            a = numpy.ones((5, n), dtype='d', order='F') * (j + 2)
+            slab = [[0, 0], [1, 1], [n, 5], [1, 1],
+                    [j, 0], [1, 1], [n, 5], [1, 1]]
+            CHLone.save(self.HDF01, self.T, flags=flags,
+                        update={p: ['CoordinateX', a, [], 'DataArray_t']},
+                        filter={p: (CHLone.SPARTIAL, slab)})
+        # a 1D array is written in a row
+        slab = [[0], [1], [7], [1], [0, 2], [1, 1], [7, 1], [1, 1]]
+        filter = {p: (CHLone.SPARTIAL, slab)}
+        CHLone.save(self.HDF01, self.T, flags=flags, filter=filter,
+                    update={p: ['CoordinateX', numpy.arange(7.0), [],
+                                'DataArray_t']})
+        self.assertIn(p, filter)
+        (t, l, x) = CHLone.load(self.HDF01)
+        v = CGU.getNodeByPath(t, p)[1]
+        r = numpy.ones((5, 7), dtype='d', order='F')
+        r[:, :3] = 2.0
+        r[:, 3:] = 5.0
+        r[2, :] = numpy.arange(7.0)
+        self.assertEqual(v.shape, (5, 7))
+        self.assertTrue(numpy.array_equal(v, r))
+        node = ['CoordinateX', numpy.arange(6.0), [], 'DataArray_t']
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[935].*",
+                                CHLone.save, self.HDF01, self.T,
+                                update={p: node}, filter=filter)
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[203].*",
+                                CHLone.save, self.HDF01, self.T, flags=flags,
+                                update={p: node}, filter=filter)
+        q = '/{Base}/{Zone}/GridCoordinates/CoordinateW'
+        node = ['CoordinateW', numpy.arange(7.0), [], 'DataArray_t']
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[203].*",
+                                CHLone.save, self.HDF01, self.T, flags=flags,
+                                update={q: node},
+                                filter={q: (CHLone.SPARTIAL, slab)})
+        (t, l, x) = CHLone.load(self.HDF01)
+        self.assertTrue(numpy.array_equal(CGU.getNodeByPath(t, p)[1], r))
+
+    def test_034_Writer(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        b = '/{Base}'
+        z = '/{Base}/{Zone}'
+
+        def pointers(k):
+            a = numpy.array([list(('FS#%d' % k).ljust(32))], dtype='S1')
+            return numpy.asfortranarray(a.T)
+
+        i = CGL.newBaseIterativeData(CGU.getNodeByPath(self.T, b),
+                                     'BaseIterativeData', 1,
+                                     itype=CGK.TimeValues_s)
+        i[2][0][1] = numpy.array([0.0])
+        CGU.newNode('IterationValues', numpy.array([0], dtype=numpy.int32),
+                    [], CGK.DataArray_ts, i)
+        zi = CGL.newZoneIterativeData(CGU.getNodeByPath(self.T, z),
+                                      'ZoneIterativeData')
+        CGU.newNode('FlowSolutionPointers', pointers(0), [],
+                    CGK.DataArray_ts, zi)
+        self.unlink(self.HDF01)
+        # TimeValues is created resizable, the others are rewritten once
+        storage = {'paths': {b + '/BaseIterativeData/TimeValues':
+                             {'extend': True}}}
+        with CHLone.Writer(self.HDF01, self.T, storage=storage) as w:
+            for k in range(1, 4):
+                f = CGL.newFlowSolution(None, 'FS#%d' % k)
+                CGL.newDataArray(f, 'Density', numpy.ones((4, 6)) * k)
+                w.append(z, f)
+                w.extend(b + '/BaseIterativeData/TimeValues',
+                         numpy.array([0.1 * k]))
+                w.extend(b + '/BaseIterativeData/IterationValues',
+                         numpy.array([10 * k], dtype=numpy.int32))
+                w.extend(z + '/ZoneIterativeData/FlowSolutionPointers',
+                         pointers(k))
+                w.append(b, ['BaseIterativeData',
+                             numpy.array([k + 1], dtype=numpy.int32),
+                             [], CGK.BaseIterativeData_ts])
+                w.flush()
+            self.assertRaisesRegexp(CHLone.CHLoneException, "[203].*",
+                                    w.extend, z + '/ZoneIterativeData/'
+                                    'FlowSolutionPointers', numpy.ones(3))
+            self.assertRaisesRegexp(CHLone.CHLoneException, "[203].*",
+                                    w.extend, z + '/Unknown', numpy.ones(3))
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[942].*",
+                                w.flush)
+        (t, l, x) = CHLone.load(self.HDF01)
+        self.assertTrue(numpy.allclose(
+            CGU.getNodeByPath(t, b + '/BaseIterativeData/TimeValues')[1],
+            [0.0, 0.1, 0.2, 0.3]))
+        self.assertEqual(list(CGU.getNodeByPath(
+            t, b + '/BaseIterativeData/IterationValues')[1]), [0, 10, 20, 30])
+        self.assertEqual(CGU.getNodeByPath(t, b + '/BaseIterativeData')[1][0],
+                         4)
+        v = CGU.getNodeByPath(t, z + '/ZoneIterativeData/FlowSolutionPointers')
+        self.assertEqual(v[1].shape, (32, 4))
+        self.assertEqual(CGU.getValueAsString(
+            ['', v[1][:, 3], [], '']).strip(), 'FS#3')
+        for k in range(1, 4):
+            v = CGU.getNodeByPath(t, z + '/FS#%d/Density' % k)[1]
+            self.assertTrue(numpy.array_equal(v, numpy.ones((4, 6)) * k))
+        self.assertIsNotNone(CGU.getNodeByPath(t, z + '/GridCoordinates'))
+
+    def test_035_SWMR(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        b = '/{Base}'
+        t = b + '/BaseIterativeData/TimeValues'
+        n = b + '/BaseIterativeData/IterationValues'
+        i = CGL.newBaseIterativeData(CGU.getNodeByPath(self.T, b),
+                                     'BaseIterativeData', 1,
+                                     itype=CGK.TimeValues_s)
+        i[2][0][1] = numpy.array([0.0])
+        CGU.newNode('IterationValues', numpy.array([0], dtype=numpy.int32),
+                    [], CGK.DataArray_ts, i)
+        self.unlink(self.HDF01)
+        # all data is created resizable but IterationValues
+        storage = {'paths': {n: {'extend': False}}}
+        flags = CHLone.FDEFAULT | CHLone.FSWMR
+        with CHLone.Writer(self.HDF01, self.T, flags=flags,
+                           storage=storage) as w:
+            with CHLone.Reader(self.HDF01) as r:
+                self.assertTrue(numpy.allclose(r.read(t), [0.0]))
+                for k in range(1, 4):
+                    w.extend(t, numpy.array([0.1 * k]))
+                    w.flush()
+                    self.assertTrue(numpy.allclose(
+                        r.read(t), [0.1 * j for j in range(k + 1)]))
+                self.assertIsNone(r.read(b + '/{Zone}/GridCoordinates'))
+                self.assertRaisesRegexp(CHLone.CHLoneException, "[106].*",
+                                        r.read, b + '/Unknown')
+            self.assertRaisesRegexp(CHLone.CHLoneException, "[943].*",
+                                    r.read, t)
+            self.assertRaisesRegexp(CHLone.CHLoneException, "[201].*",
+                                    w.append, b,
+                                    CGL.newFlowSolution(None, 'FS#1'))
+            self.assertRaisesRegexp(CHLone.CHLoneException, "[203].*",
+                                    w.extend, n,
+                                    numpy.array([10], dtype=numpy.int32))
+        (x, l, p) = CHLone.load(self.HDF01, flags=flags)
+        self.assertTrue(numpy.allclose(CGU.getNodeByPath(x, t)[1],
+                                       [0.0, 0.1, 0.2, 0.3]))
+        self.assertEqual(list(CGU.getNodeByPath(x, n)[1]), [0])
+
+    def test_036_Digests(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        z = '/{Base}/{Zone}'
+        g = z + '/GridCoordinates'
+        self.unlink(self.HDF01)
+        CHLone.save(self.HDF01, self.T)
+        d0 = CHLone.digests(self.T)
+        self.assertEqual(d0, CHLone.digests(self.HDF01))
+        self.assertIn('/', d0)
+        self.assertIn(g + '/CoordinateX', d0)
+        x = CGU.getNodeByPath(self.T, g + '/CoordinateX')
+        x[1] = x[1] * 2.0
+        d1 = CHLone.digests(self.T)
+        changed = sorted(p for p in d0 if d0[p] != d1[p])
+        self.assertEqual(changed, ['/', '/{Base}', z, g, g + '/CoordinateX'])
+        c = CGU.getNodeByPath(self.T, g)[2]
+        c.reverse()
+        self.assertEqual(d1, CHLone.digests(self.T))
+        self.unlink(self.HDF01)
+        self.unlink(self.HDF02)
+        CHLone.save(self.HDF02, self.T)
+        lk = [[os.getcwd(), self.HDF02, g, g]]
+        CHLone.save(self.HDF01, self.T, links=lk)
+        self.assertEqual(d1, CHLone.digests(self.HDF01,
+                                            lksearch=[os.getcwd()]))
+
+    def test_037_SharedTree(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        x = '/{Base}/{Zone}/GridCoordinates/CoordinateX'
+        self.unlink(self.HDF01)
+        CHLone.save(self.HDF01, self.T)
+        with CHLone.SharedTree(self.HDF01) as s:
+            self.assertTrue(CGU.checkSameTree(s.tree, self.T))
+            self.assertTrue(CGU.getNodeByPath(s.tree, x)[1].flags.f_contiguous)
+            image = pickle.dumps(s)
+            self.assertLess(len(image), s.nbytes)
+            w = pickle.loads(image)
+            self.assertTrue(CGU.checkSameTree(w.tree, self.T))
+            CGU.getNodeByPath(w.tree, x)[1][0, 0] = -1.0
+            self.assertEqual(CGU.getNodeByPath(s.tree, x)[1][0, 0], -1.0)
+            w.close()
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[944].*",
+                                pickle.dumps, s)
+        s = CHLone.SharedTree(self.T)
+        v = CGU.getNodeByPath(s.tree, x)[1]
+        self.assertRaisesRegexp(CHLone.CHLoneException, "[945].*", s.close)
+        self.assertTrue(numpy.array_equal(v, CGU.getNodeByPath(self.T, x)[1]))
+
+    def test_038_Load_Threads_Filters(self):
+        from CGNS.MAP import EmbeddedCHLone as CHLone
+        p = '/{Base}/{Zone}/GridCoordinates'
+        g = CGU.getNodeByPath(self.T, p)
+        for n in range(3):
+            CGL.newDataArray(g, 'Big%d' % n,
+                             numpy.random.rand(100000).astype('f'))
+        self.unlink(self.HDF01)
+        CHLone.save(self.HDF01, self.T)
+        (t, l, q) = CHLone.load(self.HDF01, threads=4, skip=[p + '/Big1'])
+        self.assertIsNone(CGU.getNodeByPath(t, p + '/Big1'))
+        for n in (0, 2):
+            self.assertTrue(numpy.array_equal(
+                CGU.getNodeByPath(t, '%s/Big%d' % (p, n))[1],
+                CGU.getNodeByPath(self.T, '%s/Big%d' % (p, n))[1]))
+        (t, l, q) = CHLone.load(self.HDF01, threads=4, paths=[p + '/Big2'])
+        self.assertIsNone(CGU.getNodeByPath(t, p + '/Big0'))
+        self.assertIsNone(CGU.getNodeByPath(t, p + '/Big1'))
+        self.assertTrue(numpy.array_equal(
+            CGU.getNodeByPath(t, p + '/Big2')[1],
+            CGU.getNodeByPath(self.T, p + '/Big2')[1]))
+
 
 # ---
 print('-' * 70 + '\nCGNS.MAP test suite')
@@ -7,10 +7,13 @@ from __future__ import unicode_literals
 from __future__ import print_function
 from functools import cmp_to_key
 from builtins import (bytes, str, range, dict)
+import collections
+import concurrent.futures
 import hashlib
 import os.path as op
 import re
 import string
+import weakref
 
 import numpy
 
@@ -27,6 +30,9 @@ __I8 = numpy.dtype(numpy.int64)
 __R4 = numpy.dtype(numpy.float32)
 __R8 = numpy.dtype(numpy.float64)
 
+# live TreeIndex objects, updated by the mutators of this module
+_indexes = weakref.WeakSet()
+
 
 # -----------------------------------------------------------------------------
 # undocumented functions are private (or obsolete)
@@ -101,20 +107,36 @@ def nodeCopy(node, newname=None, share=False):
         for potential duplicated name
       - The node value is a copy too, numpy.ndarray is duplicated
       - Default is to deep copy including numpy.ndarray
+      - A read-only array is copied once, the copy is read-only and used
+        by all the nodes of the sub-tree sharing the array
+        (see :py:func:`deduplicate`)
     """
     if newname is None:
         newname = node[0]
     return copyNode(node, newname, share)
 
 
-def copyNode(n, newname, share=False):
+def copyNode(n, newname, share=False, memo=None):
     if not share:
-        newn = [newname, copyArray(n[1]), deepcopyNodeList(n[2], share=share), n[3]]
+        if memo is None:
+            memo = {}
+        newn = [newname, _copyValue(n[1], memo), deepcopyNodeList(n[2], share, memo), n[3]]
     else:
         newn = [newname, n[1], deepcopyNodeList(n[2], share=share), n[3]]
     return newn
 
 
+def _copyValue(a, memo):
+    # the read-only arrays shared by nodes are shared by the copies
+    if (not isinstance(a, numpy.ndarray)) or a.flags.writeable:
+        return copyArray(a)
+    if id(a) not in memo:
+        b = copyArray(a)
+        b.flags.writeable = False
+        memo[id(a)] = (a, b)
+    return memo[id(a)][1]
+
+
 # --------------------------------------------------
 def nodeDelete(tree, node, legacy=False):
     """
@@ -161,15 +183,117 @@ def nodeDelete(tree, node, legacy=False):
 
 
 # --------------------------------------------------
-def deepcopyNodeList(la, share=False):
-    if not la:
-        return la
+def deepcopyNodeList(la, share=False, memo=None):
     ra = []
+    if not la:
+        return ra
+    if not share and memo is None:
+        memo = {}
     for a in la:
-        ra.append(copyNode(a, a[0], share))
+        ra.append(copyNode(a, a[0], share, memo))
     return ra
 
 
+# --------------------------------------------------
+def _arrayKey(a, maxsize):
+    # equal keys for arrays with the same data type, shape, order and data
+    if (not isinstance(a, numpy.ndarray)) or (a.dtype.kind == 'O'):
+        return None
+    if (maxsize is not None) and (a.nbytes > maxsize):
+        return None
+    if a.flags.c_contiguous:
+        data = a
+    elif a.flags.f_contiguous:
+        data = a.T
+    else:
+        data = numpy.ascontiguousarray(a)
+    fortran = a.flags.f_contiguous and not a.flags.c_contiguous
+    return (a.dtype.str, a.shape, fortran, hashlib.sha1(data).hexdigest())
+
+
+# --------------------------------------------------
+def deduplicate(tree, readonly=True, maxsize=None):
+    """
+    Shares the storage of the equal values of a tree: the nodes with equal
+    arrays (same data type, shape, memory order and contents) have the same
+    ``numpy.ndarray`` object as value after the call::
+
+      (subtrees, arrays, saved) = deduplicate(T)
+      print('%d bytes saved' % saved)
+
+    The nodes are hashed bottom-up, a node hash depends on its name, type,
+    value and on the hashes of its children. The sub-trees are not shared,
+    each node is still a list of its own (a node object used twice is saved
+    once by CGNS.MAP), only the values and the name and type strings are
+    shared. With ``readonly``, the shared arrays are set read-only,
+    a value change should set a new array (copy on write) and not change
+    the shared array in place::
+
+      node[1] = node[1].copy()
+      node[1][0] = 3.0
+
+    A :py:func:`nodeCopy` with ``share=True`` keeps the shared arrays, a copy
+    without ``share`` copies each read-only shared array once.
+
+    :arg CGNS/Python tree: the tree to change
+    :arg bool readonly: set the shared arrays read-only (default: True)
+    :arg int maxsize: larger arrays are ignored, in bytes (default: None)
+    :return: a tuple (subtrees, arrays, saved)
+      - count of sub-trees equal to a previous sub-tree of the parse
+      - count of node values replaced by a shared array
+      - size in bytes of the replaced arrays, the data of an array which is
+        a view of another array is not counted
+    """
+    arrays = {}
+    strings = {}
+    hashes = {}
+    seen = set()
+    dups = set()
+    shared = {}
+    count = 0
+    saved = 0
+    stack = [(tree, False)]
+    while stack:
+        (node, done) = stack.pop()
+        if not done:
+            stack.append((node, True))
+            stack += [(c, False) for c in node[2]]
+            continue
+        node[0] = strings.setdefault(node[0], node[0])
+        node[3] = strings.setdefault(node[3], node[3])
+        v = node[1]
+        k = _arrayKey(v, maxsize)
+        if k is not None:
+            a = arrays.setdefault(k, v)
+            if a is not v:
+                if v.base is None:
+                    saved += v.nbytes
+                count += 1
+                node[1] = a
+                shared[id(a)] = a
+            vh = k[3]
+        elif v is None:
+            vh = 'None'
+        else:
+            vh = 'id:%d' % id(v)
+        h = hashlib.sha1(('%s\0%s\0%s' % (node[0], node[3], vh)).encode('utf-8'))
+        for c in node[2]:
+            h.update(hashes[id(c)].encode('ascii'))
+        h = h.hexdigest()
+        hashes[id(node)] = h
+        if h in seen:
+            dups.add(id(node))
+        seen.add(h)
+    if readonly:
+        for a in shared.values():
+            a.flags.writeable = False
+    subtrees = 0
+    for (p, n) in walkWithPaths(tree, prune=lambda p, n: id(n) in dups):
+        if id(n) in dups:
+            subtrees += 1
+    return (subtrees, count, saved)
+
+
 # -----------------------------------------------------------------------------
 # support functions
 # -----------------------------------------------------------------------------
@@ -327,6 +451,8 @@ def setAsChild(parent, node):
 def setChild(parent, node):
     checkNodeCompliant(node, parent)
     parent[2].append(node)
+    if _indexes:
+        _indexAdd(parent, node)
     return parent
 
 
@@ -1659,6 +1785,143 @@ def getTypeByPath(tree, path):
     return None
 
 
+# --------------------------------------------------
+class PathFilter(object):
+    """
+    Compiled path pattern, matched against the node names or the node
+    CGNS/SIDS types during a single parse of a tree. The pattern has one
+    token per level, separated by `/`, a token is:
+
+    * ``*`` any node at this level
+    * ``**`` zero or more levels of any nodes
+    * a `regular expression <http://docs.python.org/library/re.html>`_
+      to match at this level (as for `re.match`, the end is not anchored)
+
+    For example::
+
+      # all the BCs, at any depth, with a name starting with Wall
+      f=PathFilter('/**/Wall.*')
+      for path in f.paths(T):
+          print(path)
+
+      # all the GridConnectivity_t and GridConnectivity1to1_t of all zones
+      f=PathFilter('/*/Zone_t/*/GridConnectivity.*',types=True)
+
+    The parse stops on a node when no path below it can match the pattern,
+    the pattern can be used for many trees.
+
+    :arg str pattern: the path pattern, or the list of its tokens
+    :arg bool types: True matches the node types, False the names (default)
+    :Remarks:
+      - Always skips `CGNSTree_t`, the paths are the :py:func:`getAllPaths` ones
+      - See also :py:func:`getPathsByNameFilter`, :py:func:`getPathsByTypeFilter`
+    """
+    ANY = '*'
+    ANYLEVELS = '**'
+
+    def __init__(self, pattern, types=False):
+        if isinstance(pattern, str):
+            pattern = pattern.split('/')[1:]
+        self.pattern = list(pattern)
+        self.types = types
+        self._levels = []
+        for token in self.pattern:
+            if token == PathFilter.ANY:
+                self._levels.append(PathFilter.ANY)
+            elif token == PathFilter.ANYLEVELS:
+                self._levels.append(PathFilter.ANYLEVELS)
+            else:
+                self._levels.append(re.compile(token))
+        self._final = len(self._levels)
+        tail = self._final
+        while (tail > 0) and (self._levels[tail - 1] is PathFilter.ANYLEVELS):
+            tail -= 1
+        # a match followed by ** levels only: all the sub-tree nodes match
+        self._matchall = tuple(range(tail, self._final + 1))
+        self._closures = {}
+        self._start = self._closure([0])
+        self._steps = {}
+
+    def _closure(self, states):
+        states = tuple(states)
+        if states in self._closures:
+            return self._closures[states]
+        r = set(states)
+        for i in states:
+            while (i < self._final) and (self._levels[i] is PathFilter.ANYLEVELS):
+                i += 1
+                r.add(i)
+        self._closures[states] = tuple(sorted(r))
+        return self._closures[states]
+
+    def _step(self, states, token):
+        if (len(self._matchall) > 1) and (states[-1] == self._final):
+            return self._matchall
+        key = (states, token)
+        if self.types and key in self._steps:
+            return self._steps[key]
+        r = []
+        for i in states:
+            if i == self._final:
+                continue
+            level = self._levels[i]
+            if level is PathFilter.ANYLEVELS:
+                r.append(i)
+            elif ((level is PathFilter.ANY) or not isinstance(token, str)
+                  or (level.match(token) is not None)):
+                r.append(i + 1)
+        r = self._closure(r)
+        if self.types:
+            # the count of CGNS/SIDS types is small, unlike the names one
+            self._steps[key] = r
+        return r
+
+    def match(self, path):
+        """
+        Checks if a path matches the pattern::
+
+          f=PathFilter('/Base/*/ZoneBC')
+          f.match('/Base/Zone#001/ZoneBC')
+          # True
+
+        :arg path: a path (str) or a list of tokens, the types if `types` is True
+        :return: True if the path matches
+        """
+        if isinstance(path, str):
+            path = getPathToList(path, True)
+        states = self._start
+        for token in path:
+            states = self._step(states, token)
+            if not states:
+                return False
+        return self._final in states
+
+    def paths(self, tree):
+        """
+        Returns the sorted list of the paths of the tree nodes matching the
+        pattern.
+
+        :arg CGNS/Python tree: target tree to parse
+        :return: a list of paths (str), can be empty
+        """
+        result = []
+        stack = [(tree, '', self._start)]
+        while stack:
+            (node, path, states) = stack.pop()
+            for c in node[2]:
+                if (len(c) < 4) or not isinstance(c[0], str):
+                    continue
+                cstates = self._step(states, c[3] if self.types else c[0])
+                if not cstates:
+                    continue
+                cpath = path + '/' + c[0]
+                if cstates[-1] == self._final:
+                    result.append(cpath)
+                stack.append((c, cpath, cstates))
+        result.sort()
+        return result
+
+
 # --------------------------------------------------
 def getPathByNameFilter(tree, filter):
     return getPathsByNameFilter(tree, filter)
@@ -1685,15 +1948,7 @@ def getPathsByTokenFilter(tree, filter):
       - You cannot use the regex to match for a path
       - Always skips `CGNSTree_t`
     """
-    lpth = getAllPaths(tree)
-    reg = re.compile(filter)
-    rpth = []
-    for p in lpth:
-        pl = getPathToList(p, True)
-        for tk in pl:
-            if reg.match(tk) is not None:
-                rpth.append(p)
-    return rpth
+    return PathFilter([PathFilter.ANYLEVELS, filter, PathFilter.ANYLEVELS]).paths(tree)
 
 
 # --------------------------------------------------
@@ -1715,27 +1970,11 @@ def getPathsByNameFilter(tree, filter):
       - Returns empty list if no match
     :Remarks:
       - The '/' is the separator for the path tokens, so you cannot use it
-        in the regular expression for any other purpose. Then you cannot match
-        any number of tokens in the filter, you must have the exact count of
-        '/' chars.
+        in the regular expression for any other purpose. Use the ``**``
+        token to match any number of tokens, see :py:class:`PathFilter`.
       - Always skips `CGNSTree_t`
     """
-    recmplist = []
-    restrlist = filter.split('/')[1:]
-    for restr in restrlist:
-        recmplist.append(re.compile(restr))
-    lpth = getAllPaths(tree)
-    rpth = []
-    for p in lpth:
-        pl = getPathToList(p, True)
-        if len(pl) != len(recmplist):
-            continue
-        for n, pattern in enumerate(recmplist):
-            if pattern.match(pl[n]) is None:
-                break
-        else:
-            rpth.append(p)
-    return rpth
+    return PathFilter(filter).paths(tree)
 
 
 # --------------------------------------------------
@@ -1810,24 +2049,10 @@ def getPathsByTypeFilter(tree, filter):
     :Remarks:
       - The '/' is the separator for the path tokens, so you cannot use it
        in the regular expression for any other purpose
+      - The ``*`` and ``**`` tokens can be used, see :py:class:`PathFilter`
       - Always skips `CGNSTree_t`
     """
-    recmplist = []
-    restrlist = filter.split('/')[1:]
-    for restr in restrlist:
-        recmplist.append(re.compile(restr))
-    lpth = getAllPaths(tree)
-    rpth = []
-    for p in lpth:
-        pl = getPathAsTypes(tree, p)[1:]
-        if len(pl) != len(recmplist):
-            continue
-        for n, pattern in enumerate(recmplist):
-            if isinstance(pl[n], str) and (pattern.match(pl[n]) is None):
-                break
-        else:
-            rpth.append(p)
-    return rpth
+    return PathFilter(filter, types=True).paths(tree)
 
 
 # --------------------------------------------------
@@ -1858,6 +2083,8 @@ def removeChildByName(parent, name):
         return None
     for n, node in enumerate(parent[2]):
         if node[0] == name:
+            if _indexes:
+                _indexRemove(parent, node)
             del parent[2][n]
             return None
     return None
@@ -1868,39 +2095,58 @@ def removeNodeFromPath(path, node):
     target = getNodeFromPath(path, node)
     if len(path) > 1:
         father = getNodeFromPath(path[:-1], node)
+        if _indexes:
+            _indexRemove(father, target)
         father[2].remove(target)
     else:
         # Root node child
         for c in node[2]:
             if c[0] == path[0]:
+                if _indexes:
+                    _indexRemove(node, target)
                 node[2].remove(target)
 
 
 # --------------------------------------------------
 def getNodeFromPath(path, node):
     # Beware: this parse starts with children, not current node...
-    for c in node[2]:
-        if c[0] == path[0]:
-            if len(path) == 1:
-                return c
-            return getNodeFromPath(path[1:], c)
-    return None
+    if not path:
+        return None
+    for name in path:
+        for c in node[2]:
+            if c[0] == name:
+                node = c
+                break
+        else:
+            return None
+    return node
 
 
 # --------------------------------------------------
-def getParentFromNode(tree, node):
+def getParentFromNode(tree, node, index=None):
     """
     Returns the parent node of a node. If the node is root node, itself is
     returned::
 
       parent=getParentFromNode(T,node)
 
+    The tree is parsed to find the node, with a :py:class:`TreeIndex` of the
+    tree there is no parse::
+
+      ix=TreeIndex(T)
+      for path in ix.getPathsByTypeSet([CGK.BC_ts]):
+          parent=getParentFromNode(T,ix.getNodeByPath(path),index=ix)
+
     :arg CGNS/Python tree: target tree to parse
     :arg CGNS/Python node: child node
+    :arg TreeIndex index: index of the tree, ignored if it is not the index
+      of ``tree`` (default: None)
     :return:
       - the parent node
       - arg ``node`` itself if node is root
     """
+    if (index is not None) and (index.tree is tree):
+        return index.getParentFromNode(node)
     pn = getPathFromNode(tree, node)
     pp = getPathAncestor(pn)
     np = getNodeByPath(tree, pp)
@@ -1908,7 +2154,7 @@ def getParentFromNode(tree, node):
 
 
 # --------------------------------------------------
-def getAncestorByType(tree, node, ptype):
+def getAncestorByType(tree, node, ptype, index=None):
     """
     Returns the parent node of a node which has the CGNS/SIDS type. If the node is root node, itself is
     returned::
@@ -1919,11 +2165,15 @@ def getAncestorByType(tree, node, ptype):
     :arg CGNS/Python tree: target tree to parse
     :arg CGNS/Python node: child node
     :arg CGNS/SIDS ptype: required type of the parent
+    :arg TreeIndex index: index of the tree, ignored if it is not the index
+      of ``tree`` (default: None)
     :return:
       - the parent node with CGNS/SIDS type
       - arg ``node`` itself if node is root
       - None if CGNS/SIDS type not in parents node
     """
+    if (index is not None) and (index.tree is tree):
+        return index.getAncestorByType(node, ptype)
     pn = getPathFromNode(tree, node)
     pln = getPathToList(pn)
     ptn = getPathAsTypes(tree, pn, legacy=False)
@@ -1962,7 +2212,7 @@ def getPathFromRoot(tree, node):
 
 
 # --------------------------------------------------
-def getPathFromNode(tree, node, path=''):
+def getPathFromNode(tree, node, path='', index=None):
     """
     Returns the path from a node in a tree. The argument tree is parsed and
     a path is built-up until the node is found. Then the **start node** name
@@ -1999,6 +2249,9 @@ def getPathFromNode(tree, node, path=''):
     :arg CGNS/Python tree: target tree to parse
     :arg CGNS/Python node: target node to find
     :arg string path: name of the root node to add if desired
+    :arg TreeIndex index: index of the tree, no parse if given, ignored if it
+      is not the index of ``tree``: the index paths start at the index tree
+      (default: None)
     :return:
       - path as string
       - None if not found
@@ -2007,13 +2260,216 @@ def getPathFromNode(tree, node, path=''):
     """
     if id(node) == id(tree):
         return path
-    for c in tree[2]:
-        p = getPathFromNode(c, node, path + '/' + c[0])
-        if p:
+    if (index is not None) and (index.tree is tree):
+        p = index.getPathFromNode(node)
+        if p is None:
+            return None
+        return path + p
+    for (p, c) in walkWithPaths(tree, path):
+        if c is node:
             return p
     return None
 
 
+# --------------------------------------------------
+class TreeIndex(object):
+    """
+    Index of a CGNS/Python tree, built with a single parse. The index maps
+    the paths to the nodes, the nodes to their parent and path, and the
+    CGNS/SIDS types and the names to the paths. The lookups do not parse
+    the tree::
+
+      ix=TreeIndex(T)
+      for path in ix.getPathsByTypeSet([CGK.BC_ts]):
+          bc=ix.getNodeByPath(path)
+          zone=ix.getAncestorByType(bc,CGK.Zone_ts)
+
+    The paths are the :py:func:`getPathFromNode` paths, the root is ``/``.
+    The index is updated by the functions of this module which add, remove
+    or rename nodes (:py:func:`setChild`, :py:func:`newNode`,
+    :py:func:`nodeDelete`, :py:func:`removeChildByName`,
+    :py:func:`setChildName`...), a direct change of a children list is not
+    seen: use :py:meth:`update` on the changed node.
+
+    The index functions of this module take the index as ``index``
+    argument, for example :py:func:`getParentFromNode`.
+
+    :arg CGNS/Python tree: the tree to index
+    :Remarks:
+      - A node object found twice in the tree has its first path
+      - With duplicated child names, the path is the first child one
+    """
+
+    def __init__(self, tree):
+        self.tree = tree
+        self._nodes = {}
+        self._parents = {}
+        self._types = {}
+        self._names = {}
+        self._insert(tree, tree, '/')
+        _indexes.add(self)
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, path):
+        return path in self._nodes
+
+    def _insert(self, parent, node, path):
+        stack = [(parent, node, path)]
+        while stack:
+            (parent, node, path) = stack.pop()
+            if id(node) in self._parents:
+                continue
+            self._parents[id(node)] = (parent, path)
+            if path not in self._nodes:
+                self._nodes[path] = node
+                self._types.setdefault(node[3], {})[path] = None
+                self._names.setdefault(node[0], {})[path] = None
+            prefix = '' if path == '/' else path
+            for child in reversed(node[2]):
+                stack.append((node, child, prefix + '/' + child[0]))
+
+    def _delete(self, node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            entry = self._parents.pop(id(node), None)
+            if entry is None:
+                continue
+            path = entry[1]
+            if self._nodes.get(path) is node:
+                del self._nodes[path]
+                del self._types[node[3]][path]
+                del self._names[node[0]][path]
+            stack.extend(node[2])
+
+    def _add(self, parent, node):
+        if id(parent) not in self._parents:
+            return
+        path = self._parents[id(parent)][1]
+        self._insert(parent, node, ('' if path == '/' else path) + '/' + node[0])
+
+    def _remove(self, parent, node):
+        if id(parent) in self._parents:
+            self._delete(node)
+
+    def update(self, node=None):
+        """
+        Indexes again the sub-tree of `node`, the whole tree by default.
+        Use it after a change of a children list which was not done with
+        the functions of this module::
+
+          zone[2].append(newFlowSolution)
+          ix.update(zone)
+
+        :arg CGNS/Python node: an indexed node (default: the tree)
+        """
+        if node is None or node is self.tree:
+            self.__init__(self.tree)
+            return
+        if id(node) not in self._parents:
+            return
+        (parent, path) = self._parents[id(node)]
+        self._delete(node)
+        self._insert(parent, node, path)
+
+    def getNodeByPath(self, path):
+        """
+        Same as :py:func:`getNodeByPath` for the index tree.
+
+        :arg str path: the node path
+        :return: the node or None if not found
+        """
+        node = self._nodes.get(path)
+        if node is None and path:
+            path = getPathNormalize(path) or '/'
+            root = '/' + str(self.tree[0])
+            if (self.tree[3] == CK.CGNSTree_ts) and (path + '/').startswith(root + '/'):
+                path = path[len(root):] or '/'
+            node = self._nodes.get(path)
+        return node
+
+    def getPathFromNode(self, node):
+        """
+        Same as :py:func:`getPathFromNode` for the index tree.
+
+        :arg CGNS/Python node: the node to find
+        :return: the node path, ``/`` for the tree, None if not found
+        """
+        entry = self._parents.get(id(node))
+        if entry is None:
+            return None
+        return entry[1]
+
+    def getParentFromNode(self, node):
+        """
+        Same as :py:func:`getParentFromNode` for the index tree.
+
+        :arg CGNS/Python node: the child node
+        :return: the parent node, the tree itself for the tree, None if not found
+        """
+        entry = self._parents.get(id(node))
+        if entry is None:
+            return None
+        return entry[0]
+
+    def getAncestorByType(self, node, ptype):
+        """
+        Same as :py:func:`getAncestorByType` for the index tree, the
+        returned node is the ancestor (or the node itself) closest to the
+        tree with this CGNS/SIDS type.
+
+        :arg CGNS/Python node: the child node
+        :arg str ptype: the CGNS/SIDS type of the ancestor
+        :return: the ancestor node or None if not found
+        """
+        found = None
+        while id(node) in self._parents:
+            if node[3] == ptype:
+                found = node
+            if node is self.tree:
+                break
+            node = self._parents[id(node)][0]
+        return found
+
+    def getPathsByTypeSet(self, typeset):
+        """
+        Same as :py:func:`getPathsByTypeSet` for the index tree, the paths
+        are grouped by type.
+
+        :arg list typeset: the list of CGNS/SIDS types as strings
+        :return: a list of paths
+        """
+        r = []
+        for ntype in typeset:
+            r += list(self._types.get(ntype, ()))
+        return r
+
+    def getPathsByNameSet(self, nameset):
+        """
+        Same as :py:func:`getPathsByNameSet` for the index tree, the paths
+        are grouped by name.
+
+        :arg list nameset: the list of names
+        :return: a list of paths
+        """
+        r = []
+        for name in nameset:
+            r += list(self._names.get(name, ()))
+        return r
+
+
+def _indexAdd(parent, node):
+    for index in list(_indexes):
+        index._add(parent, node)
+
+
+def _indexRemove(parent, node):
+    for index in list(_indexes):
+        index._remove(parent, node)
+
+
 # --------------------------------------------------
 def zipTypeOrNameList(tlist, nlist):
     """
@@ -2145,14 +2601,11 @@ def getAuthParentTypePaths(nodetype):
 def getAllNodesFromTypeOrNameList(tnlist, node, path, result):
     if not tnlist:
         return result
-    for c in node:
-        if (c[0] == tnlist[0]) or (c[3] == tnlist[0]):
-            if len(tnlist) == 1:
-                result.append("%s/%s" % (path, c[0]))
-            else:
-                getAllNodesFromTypeOrNameList(tnlist[1:],
-                                              c[2], "%s/%s" % (path, c[0]), result)
-    return result
+
+    def match(t, c):
+        return (c[0] == t) or (c[3] == t)
+
+    return _getAllNodesFromList(tnlist, match, node, path, result)
 
 
 # --------------------------------------------------
@@ -2195,12 +2648,26 @@ def getPathsByTypeList(tree, typelist):
 
 # --------------------------------------------------
 def getAllNodesFromTypeList(typelist, node, path, result):
-    for c in node:
-        if c[3] == typelist[0]:
-            if len(typelist) == 1:
-                result.append("%s/%s" % (path, c[0]))
-            else:
-                getAllNodesFromTypeList(typelist[1:], c[2], "%s/%s" % (path, c[0]), result)
+    def match(t, c):
+        return c[3] == t
+
+    return _getAllNodesFromList(typelist, match, node, path, result)
+
+
+def _getAllNodesFromList(tlist, match, node, path, result):
+    # the level of a node is the count of tokens added to the start path,
+    # the walk only goes down through nodes matching the list at their level
+    depth = path.count('/') + 1
+    last = len(tlist) - 1
+
+    def prune(p, c):
+        level = p.count('/') - depth
+        return (level == last) or not match(tlist[level], c)
+
+    for (p, c) in walkWithPaths([None, None, node, None], path, prune):
+        level = p.count('/') - depth
+        if (level == last) and match(tlist[level], c):
+            result.append(p)
     return result
 
 
@@ -2228,12 +2695,114 @@ def stackPathItem(path, *items):
     return getPathNormalize(pth)
 
 
+# --------------------------------------------------
+def walk(tree, prune=None):
+    """**Iterator** on all the nodes of the sub-tree, depth-first, in the
+    children order. The argument node itself is not returned::
+
+      for node in walk(T):
+          print(node[0])
+
+    The parse uses no recursion, there is no limit on the tree depth.
+    The children list of a node is read after the node is returned, you can
+    change it during the parse (remove or add children of the current node).
+
+    :arg CGNS/Python tree: the start node of the parse
+    :arg function prune: called with the node, returns True if the children
+       of this node should not be parsed (default: None)
+    :return:
+      - This is an iterator, it returns the CGNS/Python nodes
+    :Remarks:
+      - see also :py:func:`walkWithPaths`, :py:func:`walkBreadthFirst`
+    """
+    stack = [iter(tree[2])]
+    while stack:
+        for c in stack[-1]:
+            if (len(c) > 1) and isinstance(c[0], str):
+                yield c
+                if c[2] and ((prune is None) or not prune(c)):
+                    stack.append(iter(c[2]))
+                    break
+        else:
+            stack.pop()
+
+
+# --------------------------------------------------
+def walkWithPaths(tree, path='', prune=None):
+    """**Iterator** on all the nodes of the sub-tree, depth-first, in the
+    children order. Returns a tuple (path, node), the argument node itself
+    is not returned and its name is not in the paths::
+
+      # skip all the flow solutions data
+      def prune(path, node):
+          return node[3] == CGK.FlowSolution_ts
+
+      for path, node in walkWithPaths(T, prune=prune):
+          print(path)
+
+    The parse uses no recursion, there is no limit on the tree depth.
+    The children list of a node is read after the node is returned, you can
+    change it during the parse (remove or add children of the current node).
+
+    :arg CGNS/Python tree: the start node of the parse
+    :arg str path: the path prefix of the start node (default: '')
+    :arg function prune: called with the path and the node, returns True if
+       the children of this node should not be parsed (default: None)
+    :return:
+      - This is an iterator, it returns a tuple (path, CGNS/Python node)
+    :Remarks:
+      - paths order is the parse order, see :py:func:`getAllPaths` for
+        a sorted list
+    """
+    stack = [(path, iter(tree[2]))]
+    while stack:
+        (path, children) = stack[-1]
+        for c in children:
+            if (len(c) > 1) and isinstance(c[0], str):
+                cpath = path + '/' + c[0]
+                yield (cpath, c)
+                if c[2] and ((prune is None) or not prune(cpath, c)):
+                    stack.append((cpath, iter(c[2])))
+                    break
+        else:
+            stack.pop()
+
+
+# --------------------------------------------------
+def walkBreadthFirst(tree, path='', prune=None):
+    """**Iterator** on all the nodes of the sub-tree, breadth-first: all the
+    nodes of a level are returned before the nodes of the next level.
+    Arguments and returned tuples are the same as :py:func:`walkWithPaths`::
+
+      # the bases and the zones, the zones children are not parsed
+      def prune(path, node):
+          return node[3] == CGK.Zone_ts
+
+      for path, node in walkBreadthFirst(T, prune=prune):
+          print(path)
+
+    :arg CGNS/Python tree: the start node of the parse
+    :arg str path: the path prefix of the start node (default: '')
+    :arg function prune: called with the path and the node, returns True if
+       the children of this node should not be parsed (default: None)
+    :return:
+      - This is an iterator, it returns a tuple (path, CGNS/Python node)
+    """
+    queue = collections.deque([(path, tree)])
+    while queue:
+        (path, node) = queue.popleft()
+        path += '/'
+        for c in node[2]:
+            if (len(c) > 1) and isinstance(c[0], str):
+                item = (path + c[0], c)
+                yield item
+                if c[2] and ((prune is None) or not prune(*item)):
+                    queue.append(item)
+
+
 # --------------------------------------------------
 def getPaths(tree, path, plist):
-    for c in tree[2]:
-        if (len(c) > 1) and isinstance(c[0], str):
-            plist.append(path + '/' + c[0])
-            getPaths(c, path + '/' + c[0], plist)
+    plist.extend(p for (p, c) in walkWithPaths(tree, path))
 
 
 # --------------------------------------------------
@@ -2720,19 +3289,15 @@ def getAllNodesAsWidthFirstIndex(tree, fileindex=1):
 
 # --------------------------------------------------
 def getAllNodesFromNameSet(namelist, node, path, result):
-    for c in node:
-        if c[0] in namelist:
-            result.append("%s/%s" % (path, c[0]))
-        getAllNodesFromNameSet(namelist, c[2], "%s/%s" % (path, c[0]), result)
+    result.extend(p for (p, c) in walkWithPaths([None, None, node, None], path)
+                  if c[0] in namelist)
     return result
 
 
 # --------------------------------------------------
 def getAllNodesFromTypeSet(typelist, node, path, result):
-    for c in node:
-        if c[3] in typelist:
-            result.append("%s/%s" % (path, c[0]))
-        getAllNodesFromTypeSet(typelist, c[2], "%s/%s" % (path, c[0]), result)
+    result.extend(p for (p, c) in walkWithPaths([None, None, node, None], path)
+                  if c[3] in typelist)
     return result
 
 
@@ -2863,25 +3428,31 @@ def getZoneSubRegionFromFamily(tree, families, additional=True):
 
 
 # --------------------------------------------------
-def getFamiliesFromZone(tree, zonepath):
+def getFamiliesFromZone(tree, zonepath, index=None):
     """Return all the Zone's FamilyName_t or AdditionalFamilyName_t.
 
     :arg CGNS/Python tree: target tree to parse
     :arg str zonepath: target zone
+    :arg TreeIndex index: index of the tree (default: None)
     :return: list of family names
     """
-    return getFamiliesFromBC(tree, zonepath)
+    return getFamiliesFromBC(tree, zonepath, index)
 
 
 # --------------------------------------------------
-def getFamiliesFromBC(tree, path):
+def getFamiliesFromBC(tree, path, index=None):
     """Return all the BC's FamilyName_t or AdditionalFamilyName_t.
 
     :arg CGNS/Python tree: target tree to parse
     :arg str path: target path
+    :arg TreeIndex index: index of the tree, ignored if it is not the index
+      of ``tree`` (default: None)
     :return: list of family names
     """
-    node = getNodeByPath(tree, path)
+    if (index is not None) and (index.tree is tree):
+        node = index.getNodeByPath(path)
+    else:
+        node = getNodeByPath(tree, path)
     l1 = hasChildType(node, CK.FamilyName_ts)
     l2 = hasChildType(node, CK.AdditionalFamilyName_ts)
     if l1 is None:
@@ -2895,14 +3466,15 @@ def getFamiliesFromBC(tree, path):
 
 
 # --------------------------------------------------
-def getFamiliesFromZoneSubRegion(tree, zonepath):
+def getFamiliesFromZoneSubRegion(tree, zonepath, index=None):
     """Return all the ZoneSubRegion's FamilyName_t or AdditionalFamilyName_t.
 
     :arg CGNS/Python tree: target tree to parse
     :arg str zonepath: target zone
+    :arg TreeIndex index: index of the tree (default: None)
     :return: list of family names
     """
-    return getFamiliesFromBC(tree, zonepath)
+    return getFamiliesFromBC(tree, zonepath, index)
 
 
 # -----------------------------------------------------------------------------
@@ -3005,7 +3577,11 @@ def setChildName(parent, oldname, newname, dienow=False):
     n1 = hasChildName(parent, oldname)
     n2 = hasChildName(parent, newname)
     if n1 and not n2:
+        if _indexes:
+            _indexRemove(parent, n1)
         n1[0] = newname
+        if _indexes:
+            _indexAdd(parent, n1)
     return parent
 
 
@@ -3152,13 +3728,103 @@ def getChildren(t):
     return s, cl
 
 
+# --------------------------------------------------
+# default absolute tolerance and count of items per chunk of a comparison
+DIFFATOL = 1e-12
+DIFFCHUNK = 1 << 20
+
+
+# --------------------------------------------------
+def compareArrays(va, vb, atol=DIFFATOL, rtol=0.0, ulp=0, chunk=DIFFCHUNK):
+    """
+    Compares two numpy arrays, returns a diagnostic code and the max absolute
+    difference of the values::
+
+      (code, err) = compareArrays(a, b, rtol=1e-6)
+      if code == 6:
+          print('max error is %g' % err)
+
+    The arrays are compared by chunks of ``chunk`` items, an identical chunk
+    is skipped, there is no temporary array with the size of the arguments:
+    the arrays stored in a different order, or not contiguous, are copied
+    chunk by chunk.
+    Two values are the same if their difference is less or equal than
+    ``atol + rtol * abs(b) + ulp * spacing(max(abs(a), abs(b)))``, where
+    the ``spacing`` is the distance to the next floating point value in the
+    data type of the arrays. Two NaN are the same. The difference of integer
+    values is exact, only the returned error is a float.
+
+    :arg numpy.ndarray va: first array
+    :arg numpy.ndarray vb: second array
+    :arg float atol: absolute tolerance (default: DIFFATOL)
+    :arg float rtol: relative tolerance, relative to ``vb`` (default: 0)
+    :arg int ulp: tolerance in units in the last place (default: 0)
+    :arg int chunk: count of items compared at once (default: DIFFCHUNK)
+    :return: a tuple (code, error)
+      - code 0 if arrays are the same, 3 if data types differ, 4 if sizes
+        differ, 5 if shapes differ, 6 if numeric values differ, 7 if other
+        values (strings) differ
+      - error is the max absolute difference, None if not numeric values
+    """
+    if va.dtype.char != vb.dtype.char:
+        return (3, None)
+    if va.size != vb.size:
+        return (4, None)
+    if va.shape != vb.shape:
+        return (5, None)
+    # same items order, views if both arrays are contiguous the same way,
+    # else a slice of the flat iterators copies its chunk only
+    if va.flags.f_contiguous and vb.flags.f_contiguous:
+        (fa, fb) = (va.ravel(order='F'), vb.ravel(order='F'))
+    elif va.flags.c_contiguous and vb.flags.c_contiguous:
+        (fa, fb) = (va.ravel(order='C'), vb.ravel(order='C'))
+    else:
+        (fa, fb) = (va.flat, vb.flat)
+    kind = va.dtype.kind
+    if kind not in 'iufc':
+        for n in range(0, va.size, chunk):
+            if not numpy.array_equal(fa[n:n + chunk], fb[n:n + chunk]):
+                return (7, None)
+        return (0, None)
+    err = 0.0
+    code = 0
+    for n in range(0, va.size, chunk):
+        a = fa[n:n + chunk]
+        b = fb[n:n + chunk]
+        if numpy.array_equal(a, b):
+            continue
+        if kind in 'iu':
+            # exact difference, less than 2**64 then no loss with a wrap around
+            d = (numpy.maximum(a, b).astype(numpy.uint64) -
+                 numpy.minimum(a, b).astype(numpy.uint64))
+            tol = atol
+            if rtol:
+                tol = tol + rtol * numpy.abs(b.astype(numpy.float64))
+            if numpy.any(d > tol):
+                code = 6
+            err = max(err, float(d.max()))
+            continue
+        d = numpy.abs(a - b)
+        same = (a == b) | (numpy.isnan(a) & numpy.isnan(b))
+        d[same] = 0.0
+        d[numpy.isnan(d)] = numpy.inf
+        tol = atol
+        if rtol:
+            tol = tol + rtol * numpy.abs(b)
+        if ulp:
+            tol = tol + ulp * numpy.spacing(numpy.maximum(numpy.abs(a), numpy.abs(b)))
+        if numpy.any(d > tol):
+            code = 6
+        err = max(err, float(d.max()))
+    return (code, err)
+
+
 # --------------------------------------------------
 # should merge with checkSameValue that returns True/False
 #
-def compareValues(na, nb):
+def compareValues(na, nb, atol=DIFFATOL, rtol=0.0, ulp=0, chunk=DIFFCHUNK):
     va = na[1]
     vb = nb[1]
-    eps = 1e-12
     if va is None and vb is not None:
         return 1
     if va is not None and vb is None:
@@ -3168,61 +3834,148 @@ def compareValues(na, nb):
     if (not isinstance(va, numpy.ndarray) or
             not isinstance(vb, numpy.ndarray)):
         return 0
-    if va.dtype.char != vb.dtype.char:
-        return 3
-    if va.size != vb.size:
-        return 4
-    if va.shape != vb.shape:
-        return 5
-    if va.dtype.char not in ['c', 'S']:
-        vd = numpy.array(numpy.abs(va - vb))
-        if numpy.any(vd > eps):
-            return 6
-    elif va.ravel().tostring() != vb.ravel().tostring():
-        return 7
-    return 0
+    return compareArrays(va, vb, atol, rtol, ulp, chunk)[0]
 
 
 # --------------------------------------------------
-def diff(ta, tb, path='', tag='A', diag=None, trace=False):
+def _diffValue(v):
+    # a value proxy (CGNS.MAP lazy load) is read for the comparison only
+    if (v is None) or isinstance(v, numpy.ndarray) or not hasattr(v, '__array__'):
+        return v
+    loaded = getattr(v, 'loaded', True)
+    a = numpy.asarray(v)
+    if not loaded:
+        v.release()
+    return a
+
+
+# --------------------------------------------------
+def _diffValues(va, vb, atol, rtol, ulp, chunk):
+    if va is None and vb is not None:
+        return (1, None)
+    if va is not None and vb is None:
+        return (2, None)
+    if (not isinstance(va, numpy.ndarray) or
+            not isinstance(vb, numpy.ndarray)):
+        return (0, None)
+    return compareArrays(va, vb, atol, rtol, ulp, chunk)
+
+
+# --------------------------------------------------
+def diff(ta, tb, path='', tag='A', diag=None, trace=False,
+         atol=DIFFATOL, rtol=0.0, ulp=0, chunk=DIFFCHUNK, digests=None, threads=0):
+    """
+    Compares two CGNS/Python trees, returns a dict with the path of each
+    node with differences as key and the list of its diagnostics as value::
+
+      diag = diff(TA, TB, rtol=1e-6, threads=4)
+      print(diffAnalysis(diag))
+
+    A diagnostic is a tuple, the first item is the code: ``'NA'`` or
+    ``'ND'`` with the path of the child node only in B or only in A,
+    ``'CT'`` if the types differ, ``'C2'`` to ``'C7'`` if the values differ
+    (see :py:func:`compareArrays`), the ``'C6'`` tuple has the max absolute
+    difference as second item. The values are not compared if the value
+    of A is MT. The diagnostics of a node are in this order: ``'CT'``, the
+    value one, then the children ones.
+
+    The ``digests`` of both trees, such as these returned by
+    ``CGNS.MAP.digests``, are used to skip the sub-trees with the same
+    digest, the values of these nodes are not read. The values of a lazy
+    load are read for the comparison and released. With ``threads``, the
+    values are compared by a pool of threads, the parse goes on during
+    the comparisons.
+
+    :arg CGNS/Python ta: tree A
+    :arg CGNS/Python tb: tree B
+    :arg str path: path of the start nodes (default: '')
+    :arg str tag: tag of the trace lines (default: 'A')
+    :arg dict diag: the dict to update (default: None)
+    :arg bool trace: print the diagnostics during the parse (default: False)
+    :arg float atol: absolute tolerance (default: DIFFATOL)
+    :arg float rtol: relative tolerance, relative to B (default: 0)
+    :arg int ulp: tolerance in units in the last place (default: 0)
+    :arg int chunk: count of items compared at once (default: DIFFCHUNK)
+    :arg tuple digests: a pair of dicts path:digest for A and B (default: None)
+    :arg int threads: count of comparison threads (default: 0)
+    :return: the diagnostics dict
+    """
     if diag is None:
         diag = {}
-    diag[path] = []
-    if ta[3] != tb[3]:
-        diag[path].append(('CT',))
+    if digests is not None:
+        (dga, dgb) = digests
+    pool = None
+    if threads:
+        pool = concurrent.futures.ThreadPoolExecutor(threads)
+    pending = collections.deque()
+
+    def done(path, dnum, err):
+        if not dnum:
+            return
+        if dnum == 6:
+            d = ('C6', err)
+        else:
+            d = ('C%d' % dnum,)
+        # same order as a sequential parse: CT, then the value, then NA/ND
+        dl = diag.setdefault(path, [])
+        dl.insert(1 if (dl and dl[0] == ('CT',)) else 0, d)
         if trace:
-            print('CT %s %s' % (tag, path))
-    dta = getValueDataType(ta)
-    dtb = getValueDataType(tb)
-    # dta = CGNS.PAT.cgnsutils.getValueDataType(ta)
-    # dtb = CGNS.PAT.cgnsutils.getValueDataType(tb)
-    #
-    if dta is not CGNS.PAT.cgnskeywords.MT:
-        dnum = compareValues(ta, tb)
-        if dnum:
-            diag[path].append(('C%d' % dnum,))
-            if trace:
-                print('C%d %s %s' % (dnum, tag, path))
-    (sa, da) = getChildren(ta)
-    (sb, db) = getChildren(tb)
-    a2b = sa.difference(sb)
-    sn = sa.union(sb)
-    for cn in sn:
-        np = path + '/' + cn
-        a = cn in sa
-        b = cn in sb
-        if not a and b:
-            diag[path].append(('NA', np))
-            if trace:
-                print('NA %s %s' % (tag, np))
-        if a and not b:
-            diag[path].append(('ND', np))
-            if trace:
-                print('ND %s %s' % (tag, np))
-        if a and b:
-            diff(da[cn], db[cn], np, tag, diag, trace)
-    if not diag[path]:
-        del diag[path]
+            print('C%d %s %s' % (dnum, tag, path))
+
+    stack = [(ta, tb, path)]
+    try:
+        while stack:
+            (ta, tb, path) = stack.pop()
+            if digests is not None:
+                dp = path or '/'
+                if (dp in dga) and (dga[dp] == dgb.get(dp)):
+                    diag.pop(path, None)
+                    continue
+            d = []
+            if ta[3] != tb[3]:
+                d.append(('CT',))
+                if trace:
+                    print('CT %s %s' % (tag, path))
+            (sa, da) = getChildren(ta)
+            (sb, db) = getChildren(tb)
+            for cn in sa.union(sb):
+                np = path + '/' + cn
+                a = cn in sa
+                b = cn in sb
+                if not a and b:
+                    d.append(('NA', np))
+                    if trace:
+                        print('NA %s %s' % (tag, np))
+                if a and not b:
+                    d.append(('ND', np))
+                    if trace:
+                        print('ND %s %s' % (tag, np))
+                if a and b:
+                    stack.append((da[cn], db[cn], np))
+            if d:
+                diag[path] = d
+            else:
+                diag.pop(path, None)
+            # no value comparison if A is MT (a proxy is not read for that)
+            if (ta[1] is None) or (isinstance(ta[1], list) and not ta[1]):
+                continue
+            va = _diffValue(ta[1])
+            vb = _diffValue(tb[1])
+            if pool is None:
+                done(path, *_diffValues(va, vb, atol, rtol, ulp, chunk))
+                continue
+            pending.append((path, pool.submit(_diffValues, va, vb,
+                                              atol, rtol, ulp, chunk)))
+            # the arrays of the pending comparisons are kept in memory
+            while len(pending) > 2 * threads:
+                (p, future) = pending.popleft()
+                done(p, *future.result())
+        while pending:
+            (p, future) = pending.popleft()
+            done(p, *future.result())
+    finally:
+        if pool is not None:
+            pool.shutdown()
     return diag
 
 
@@ -3235,7 +3988,7 @@ def diffAnalysis(diag):
     s += '## >x A and B node values differ (not same data type)\n'
     s += '## >n A and B node values differ (not same total size)\n'
     s += '## >d A and B node values differ (not same shape)\n'
-    s += '## >c A and B node values differ (not same contents)\n'
+    s += '## >c A and B node values differ (not same contents, max error)\n'
     s += '## >s A and B node values differ (string values)\n'
     paths = list(diag)
     paths.sort()
@@ -3260,8 +4013,10 @@ def diffAnalysis(diag):
                 ldiag = '>n'
             if d[0] in ['C5']:
                 ldiag = '>d'
-            if len(d) > 1:
+            if d[0] in ['NA', 'ND']:
                 s += '%s %s\n' % (ldiag, d[1])
+            elif d[0] == 'C6':
+                s += '%s %s %g\n' % (ldiag, k, d[1])
             else:
                 s += '%s %s\n' % (ldiag, k)
     return s
@@ -3283,17 +4038,53 @@ def toStringValue(v):
 # --------------------------------------------------
 def toStringChildren(l, readable=False, shift=0, keywords=False, pycgns=False):
     """ASCII pretty print of one children node list."""
-    s = "["
-    for c in l:
-        s += toString(c, readable, shift, keywords)
-        s += ','
-    if l:
-        s = s[:-1]
+    out = []
+    _toStringParts(out, _toStringChildrenParts(l, readable, shift), readable, keywords)
+    return ''.join(out)
+
+
+def _toStringChildrenParts(l, readable, shift):
+    # parts of a children list, in reverse order, these are popped
     if readable and l:
-        s += '],\n' + (shift - 1) * ' '
+        parts = ['],\n' + (shift - 1) * ' ']
     else:
-        s += '],'
-    return s
+        parts = ['],']
+    for c in reversed(l):
+        parts += [(c, shift), ',']
+    if l:
+        parts.pop()
+    parts.append('[')
+    return parts
+
+
+def _toStringParts(out, stack, readable, keywords):
+    # string parts are added to the output, nodes are replaced by their parts
+    while stack:
+        n = stack.pop()
+        if not isinstance(n, tuple):
+            out.append(n)
+            continue
+        (n, shift) = n
+        if n is None:
+            out.append('None')
+            continue
+        if keywords and n[0] in CK.cgnsnames:
+            name = 'CGK.%s_s' % n[0]
+        else:
+            name = "'%s'" % n[0]
+        if keywords:
+            ntype = 'CGK.%ss ]' % n[3]
+        else:
+            ntype = "'%s' ]" % n[3]
+        prefix = ''
+        if readable and shift:
+            prefix = '\n' + shift * ' '
+        if not n[2]:
+            out.append("%s[%s,%s,[],%s" % (prefix, name, toStringValue(n[1]), ntype))
+            continue
+        out.append("%s[%s,%s," % (prefix, name, toStringValue(n[1])))
+        stack.append(ntype)
+        stack += _toStringChildrenParts(n[2], readable, shift + 2)
 
 
 # --------------------------------------------------
@@ -3303,24 +4094,25 @@ def prettyPrint(tree, path='', depth=0, sort=False, links=None, paths=None):
         links = []
     if paths is None:
         paths = []
-    print(depth * ' ',)
-    path = path + '/' + tree[0]
-    pnr = getPathNoRoot(path)
-    nt = getNodeType(tree)
-    ns = getShape(tree)
-    if paths:
-        d = {p[0]: p[2:] for p in paths}
+    d = {p[0]: p[2:] for p in paths}
+    stack = [(tree, path, depth)]
+    while stack:
+        (tree, path, depth) = stack.pop()
+        print(depth * ' ',)
+        path = path + '/' + tree[0]
+        pnr = getPathNoRoot(path)
+        nt = getNodeType(tree)
+        ns = getShape(tree)
         if pnr in d:
             nt = d[pnr][0]
             ns = d[pnr][1]
-    n = "%s(%s) %s:%s" % (tree[0], tree[3], nt, ns),
-    print("%-32s" % n)
-    if not sort:
-        for c in tree[2]:
-            prettyPrint(c, path, depth=depth + 2, links=links, paths=paths)
-    else:
-        for c in getNextChildSortByType(tree, criteria=CK.sortedtypelist):
-            prettyPrint(c, path, depth=depth + 2, sort=True, links=links, paths=paths)
+        n = "%s(%s) %s:%s" % (tree[0], tree[3], nt, ns),
+        print("%-32s" % n)
+        if not sort:
+            children = tree[2]
+        else:
+            children = list(getNextChildSortByType(tree, criteria=CK.sortedtypelist))
+        stack += [(c, path, depth + 2) for c in reversed(children)]
 
 
 # --------------------------------------------------
@@ -3340,33 +4132,18 @@ def toString(tree, readable=False, shift=0, keywords=False, pycgns=False):
     """
     if pycgns:
         keywords = True
-    n = tree
-    prefix = ''
+    if tree is None:
+        return 'None'
+    out = []
     if pycgns and (shift == 0):
-        prefix += """# ---
+        out.append("""# ---
 import numpy
 import CGNS.PAT.cgnskeywords as CGK
 import CGNS.PAT.cgnsutils as CGU
 
-tree=\\\n"""
-    if readable and shift:
-        prefix = '\n' + shift * ' '
-    if n is None:
-        return 'None'
-    name = n[0]
-    if keywords and name in CK.cgnsnames:
-        name = 'CGK.%s_s' % n[0]
-    else:
-        name = "'%s'" % n[0]
-    s = "%s[%s,%s,%s" % (prefix,
-                         name,
-                         toStringValue(n[1]),
-                         toStringChildren(n[2], readable, shift + 2, keywords, pycgns))
-    if keywords:
-        s += 'CGK.%ss ]' % n[3]
-    else:
-        s += "'%s' ]" % n[3]
-    return s
+tree=\\\n""")
+    _toStringParts(out, [(tree, shift)], readable, keywords)
+    return ''.join(out)
 
 
 # --------------------------------------------------
@@ -3411,20 +4188,14 @@ def getNodesFromTypeSet(tree, typeset):
       - this iterator must be used carefully to scan a CGNS/Python tree
         or do inplace modification. Modification of tree structure while
         using this iterator is hazardous.
+      - see also :py:func:`walkWithPaths`
     """
-
-    def genNodesFromTypeSet(typelist, cnode, cpath):
-        for c in cnode:
-            if c[3] in typelist:
-                yield ("%s/%s" % (cpath, c[0]), c)
-            for curpath, curnode in genNodesFromTypeSet(typelist, c[2], "%s/%s" % (cpath, c[0])):
-                yield (curpath, curnode)
-
     if tree[3] == CK.CGNSTree_ts:
         start = ""
     else:
         start = "%s" % tree[0]
-    for path, node in genNodesFromTypeSet(typeset, tree[2], start):
-        yield (path, node)
+    for path, node in walkWithPaths(tree, start):
+        if node[3] in typeset:
+            yield (path, node)
 
 # ----
@@ -276,6 +276,225 @@ class PATTestCase(unittest.TestCase):
         CGU.removeChildByName(r, 'Data')
         self.assertIsNone(CGU.hasChildName(r, 'Data'))
 
+    def test_10TreeIndex(self):
+        import CGNS.PAT.cgnsutils as CGU
+        import CGNS.PAT.cgnslib as CGL
+        import CGNS.PAT.cgnskeywords as CGK
+        import numpy
+        self.genTree()
+        self.T = CGU.nodeCopy(self.T)
+        ix = CGU.TreeIndex(self.T)
+        paths = CGU.getAllPaths(self.T)
+        self.assertEqual(len(ix), len(paths) + 1)
+        for p in paths:
+            n = CGU.getNodeByPath(self.T, p)
+            self.assertIs(ix.getNodeByPath(p), n)
+            self.assertEqual(ix.getPathFromNode(n), p)
+            self.assertIs(CGU.getParentFromNode(self.T, n, index=ix),
+                          CGU.getParentFromNode(self.T, n))
+        self.assertIs(ix.getNodeByPath('/CGNSTree/{Base#1}/{Zone-B}'),
+                      CGU.getNodeByPath(self.T, '/{Base#1}/{Zone-B}'))
+        self.assertIs(ix.getParentFromNode(self.T), self.T)
+        n3 = ix.getNodeByPath('/{Base#1}/{Zone-A}/ZoneBC')
+        for t in [CGK.CGNSBase_ts, CGK.Zone_ts, CGK.BC_ts]:
+            self.assertIs(CGU.getAncestorByType(self.T, n3, t, index=ix),
+                          CGU.getAncestorByType(self.T, n3, t))
+        self.assertEqual(sorted(ix.getPathsByTypeSet([CGK.BC_ts])),
+                         sorted(CGU.getPathsByTypeSet(self.T, [CGK.BC_ts])))
+        self.assertEqual(ix.getPathsByNameSet(['ZoneBC']),
+                         CGU.getPathsByNameSet(self.T, ['ZoneBC']))
+        z = ix.getNodeByPath('/{Base#1}/{Zone-A}')
+        f = CGL.newFlowSolution(z, 'FS')
+        d = CGL.newDataArray(f, 'Density', numpy.ones((3,)))
+        self.assertIs(ix.getParentFromNode(d), f)
+        self.assertIn('/{Base#1}/{Zone-A}/FS/Density', ix.getPathsByNameSet(['Density']))
+        CGU.setChildName(z, 'FS', 'FS#2')
+        self.assertEqual(ix.getPathFromNode(d), '/{Base#1}/{Zone-A}/FS#2/Density')
+        self.assertNotIn('/{Base#1}/{Zone-A}/FS', ix)
+        CGU.nodeDelete(self.T, f)
+        self.assertIsNone(ix.getPathFromNode(d))
+        self.assertEqual(sorted(ix.getPathsByTypeSet([CGK.FlowSolution_ts])),
+                         sorted(CGU.getPathsByTypeSet(self.T, [CGK.FlowSolution_ts])))
+        z[2].append(f)
+        self.assertIsNone(ix.getPathFromNode(d))
+        ix.update(z)
+        self.assertEqual(ix.getPathFromNode(d), '/{Base#1}/{Zone-A}/FS#2/Density')
+        self.assertEqual(len(ix), len(CGU.getAllPaths(self.T)) + 1)
+        # the index of another tree is ignored, the paths start at the tree
+        self.assertEqual(CGU.getPathFromNode(z, d, index=ix), '/FS#2/Density')
+        self.assertIs(CGU.getParentFromNode(z, d, index=ix), f)
+
+    def test_11PathFilter(self):
+        import CGNS.PAT.cgnsutils as CGU
+        import CGNS.PAT.cgnskeywords as CGK
+        import re
+        self.genTree()
+        paths = CGU.getAllPaths(self.T)
+        p = [x for x in paths if re.match('/.*/.*/Zone', x) and x.count('/') == 3]
+        self.assertEqual(CGU.getPathsByNameFilter(self.T, '/.*/.*/Zone.*'), p)
+        t = [x for x in paths
+             if CGU.getPathAsTypes(self.T, x)[1:] == [CGK.CGNSBase_ts, CGK.Zone_ts, CGK.ZoneBC_ts]]
+        self.assertEqual(CGU.getPathsByTypeFilter(self.T, '/CGNSBase_t/Zone_t/ZoneBC_t'), t)
+        b = [x for x in paths if [k for k in x.split('/') if re.match('ZoneBC', k)]]
+        self.assertEqual(CGU.getPathsByTokenFilter(self.T, 'ZoneBC'), b)
+        f = CGU.PathFilter('/**/ZoneBC/*')
+        self.assertEqual(f.paths(self.T),
+                         [x for x in paths if x.split('/')[-2:-1] == ['ZoneBC']])
+        self.assertTrue(f.match('/{Base#1}/{Zone-A}/ZoneBC/{BC-1}'))
+        self.assertFalse(f.match('/{Base#1}/{Zone-A}/ZoneBC'))
+        f = CGU.PathFilter('/*/Zone_t/**/BC_t', types=True)
+        self.assertEqual(f.paths(self.T), CGU.getPathsByTypeFilter(self.T, '/.*/.*/.*/BC_t$'))
+        self.assertTrue(f.match([CGK.CGNSBase_ts, CGK.Zone_ts, CGK.ZoneBC_ts, CGK.BC_ts]))
+        self.assertEqual(CGU.PathFilter('/*/{Zone-Z}/**').paths(self.T), [])
+
+    def test_12Walk(self):
+        import CGNS.PAT.cgnsutils as CGU
+        import CGNS.PAT.cgnskeywords as CGK
+        self.genTree()
+        paths = CGU.getAllPaths(self.T)
+        w = list(CGU.walkWithPaths(self.T))
+        self.assertEqual(sorted(p for (p, n) in w), paths)
+        self.assertEqual([n for (p, n) in w], list(CGU.walk(self.T)))
+        for (p, n) in w:
+            self.assertTrue(CGU.getNodeByPath(self.T, p) is n)
+        b = [p for (p, n) in CGU.walkBreadthFirst(self.T)]
+        self.assertEqual(sorted(b), paths)
+        self.assertEqual([p.count('/') for p in b], sorted(p.count('/') for p in b))
+        zones = CGU.getPathsByTypeSet(self.T, [CGK.Zone_ts])
+        r = [p for (p, n) in w if not [x for x in zones if p.startswith(x + '/')]]
+        z = [p for (p, n) in CGU.walkWithPaths(self.T, prune=lambda p, n: n[3] == CGK.Zone_ts)]
+        self.assertEqual(z, r)
+        z = [p for (p, n) in CGU.walkBreadthFirst(self.T, prune=lambda p, n: n[3] == CGK.Zone_ts)]
+        self.assertEqual(sorted(z), sorted(r))
+        self.assertEqual(len(list(CGU.walk(self.T, prune=lambda n: True))), len(self.T[2]))
+        # no recursion limit on tree depth
+        T = CGU.nodeCopy(self.T)
+        n = CGU.getNodeByPath(T, '/{Base#1}')
+        for i in range(5000):
+            n = CGU.nodeCreate('U', None, [], CGK.UserDefinedData_ts, parent=n)
+        d = CGU.getPathsByNameSet(T, ['U'])
+        self.assertEqual(len(d), 5000)
+        self.assertEqual(CGU.getPathFromNode(T, n), d[-1])
+        self.assertTrue(CGU.getNodeByPath(T, d[-1]) is n)
+        self.assertEqual(CGU.diff(T, T), {})
+        self.assertEqual(CGU.toString(T).count("'U'"), 5000)
+
+    def test_13Diff(self):
+        import numpy
+        import CGNS.PAT.cgnsutils as CGU
+        import CGNS.PAT.cgnskeywords as CGK
+        a = numpy.linspace(1.0, 2.0, 1000).reshape((10, 100), order='F')
+        b = a.copy(order='F')
+        self.assertEqual(CGU.compareArrays(a, b), (0, 0.0))
+        b[3, 7] += 1e-9
+        (code, err) = CGU.compareArrays(a, b, chunk=64)
+        self.assertEqual(code, 6)
+        self.assertAlmostEqual(err, 1e-9, 12)
+        self.assertEqual(CGU.compareArrays(a, b, atol=1e-8)[0], 0)
+        self.assertEqual(CGU.compareArrays(a, b, atol=0.0, rtol=1e-8)[0], 0)
+        self.assertEqual(CGU.compareArrays(a, numpy.nextafter(a, 3.0), atol=0.0)[0], 6)
+        self.assertEqual(CGU.compareArrays(a, numpy.nextafter(a, 3.0), atol=0.0, ulp=1)[0], 0)
+        self.assertEqual(CGU.compareArrays(a, numpy.ascontiguousarray(a)), (0, 0.0))
+        c = numpy.ascontiguousarray(b)
+        self.assertEqual(CGU.compareArrays(a, c, chunk=64), (code, err))
+        w = numpy.zeros((10, 200))
+        w[:, ::2] = c
+        self.assertEqual(CGU.compareArrays(a, w[:, ::2], chunk=64), (code, err))
+        self.assertEqual(CGU.compareArrays(w[:, ::2], c, chunk=7), (0, 0.0))
+        self.assertEqual(CGU.compareArrays(a, a.astype(numpy.float32))[0], 3)
+        self.assertEqual(CGU.compareArrays(a, a.ravel())[0], 5)
+        n = numpy.array([1.0, numpy.nan, 3.0])
+        self.assertEqual(CGU.compareArrays(n, n.copy()), (0, 0.0))
+        self.assertEqual(CGU.compareArrays(n, numpy.array([1.0, 2.0, 3.0])), (6, numpy.inf))
+        i = numpy.array([2 ** 31 - 1, -2 ** 31], dtype=numpy.int32)
+        self.assertEqual(CGU.compareArrays(i, i[::-1].copy()), (6, 2.0 ** 32 - 1))
+        i = numpy.array([2 ** 60, -2 ** 62], dtype=numpy.int64)
+        j = numpy.array([2 ** 60 + 1, -2 ** 62], dtype=numpy.int64)
+        self.assertEqual(CGU.compareArrays(i, j), (6, 1.0))
+        self.assertEqual(CGU.compareArrays(i, i.copy()), (0, 0.0))
+        s = CGU.setStringAsArray('Structured')
+        self.assertEqual(CGU.compareArrays(s, CGU.setStringAsArray('Structuree'), chunk=3), (7, None))
+        self.genTree()
+        T = CGU.nodeCopy(self.T)
+        self.assertEqual(CGU.diff(self.T, T), {})
+        p = [x for x in CGU.getPathsByTypeSet(T, [CGK.DataArray_ts])
+             if CGU.getValueDataType(CGU.getNodeByPath(T, x)) == CGK.R8][0]
+        n = CGU.getNodeByPath(T, p)
+        n[1] = n[1] + 0.5
+        CGU.nodeCreate('Extra', None, [], CGK.UserDefinedData_ts, parent=T[2][-1])
+        d = CGU.diff(self.T, T)
+        self.assertEqual(d[p], [('C6', 0.5)])
+        self.assertEqual(d['/' + T[2][-1][0]], [('NA', '/%s/Extra' % T[2][-1][0])])
+        self.assertEqual(CGU.diff(self.T, T, threads=2), d)
+        self.assertEqual(CGU.diff(self.T, T, atol=1.0), {'/' + T[2][-1][0]: d['/' + T[2][-1][0]]})
+        self.assertTrue('>c %s 0.5\n' % p in CGU.diffAnalysis(d))
+        # same digests at a path, the sub-tree is skipped
+        self.assertEqual(CGU.diff(self.T, T, digests=({'/': 'x'}, {'/': 'x'})), {})
+        r = CGU.diff(self.T, T, digests=({p: 'x', '/': 'x'}, {p: 'x', '/': 'y'}))
+        self.assertEqual(list(r), ['/' + T[2][-1][0]])
+        self.assertEqual(CGU.diff(self.T, T, digests=({p: 'x'}, {p: 'y'})), d)
+        # CT, then the value, then the children, with or without threads
+        n[3] = CGK.UserDefinedData_ts
+        CGU.nodeCreate('Extra', None, [], CGK.UserDefinedData_ts, parent=n)
+        r = [('CT',), ('C6', 0.5), ('NA', p + '/Extra')]
+        self.assertEqual(CGU.diff(self.T, T)[p], r)
+        self.assertEqual(CGU.diff(self.T, T, threads=2)[p], r)
+        # no value comparison if the value of A is MT
+        q = [x for x in CGU.getAllPaths(self.T)
+             if CGU.getNodeByPath(self.T, x)[1] is None][-1]
+        CGU.getNodeByPath(T, q)[1] = numpy.ones((3,))
+        self.assertFalse(q in CGU.diff(self.T, T))
+        self.assertEqual(CGU.diff(T, self.T)[q], [('C2',)])
+
+    def test_14Deduplicate(self):
+        import numpy
+        import CGNS.PAT.cgnsutils as CGU
+        import CGNS.PAT.cgnskeywords as CGK
+        T = CGU.nodeCreate(CGK.CGNSTree_s, None, [], CGK.CGNSTree_ts)
+        b = CGU.nodeCreate('Base', numpy.array([3, 3], dtype='i'), [], CGK.CGNSBase_ts, parent=T)
+        for z in range(10):
+            n = CGU.nodeCreate('Zone%d' % z, numpy.array([[5, 4, 0]], dtype='i'), [], CGK.Zone_ts, parent=b)
+            r = CGU.nodeCreate('ReferenceState', None, [], CGK.ReferenceState_ts, parent=n)
+            CGU.nodeCreate('Mach', numpy.array([0.8] * 100), [], CGK.DataArray_ts, parent=r)
+            CGU.nodeCreate('Reynolds', numpy.array([1e6]), [], CGK.DataArray_ts, parent=r)
+            CGU.nodeCreate('Data', numpy.array([float(z)]), [], CGK.DataArray_ts, parent=n)
+        R = CGU.nodeCopy(T)
+        (subtrees, arrays, saved) = CGU.deduplicate(T)
+        self.assertEqual(subtrees, 9)
+        self.assertEqual(arrays, 27)
+        size = [CGU.getNodeByPath(T, p)[1].nbytes
+                for p in ['/Base/Zone0', '/Base/Zone0/ReferenceState/Mach', '/Base/Zone0/ReferenceState/Reynolds']]
+        self.assertEqual(saved, 9 * sum(size))
+        self.assertEqual(CGU.diff(R, T), {})
+        m = [CGU.getNodeByPath(T, '/Base/Zone%d/ReferenceState/Mach' % z)[1] for z in range(10)]
+        self.assertTrue(all(x is m[0] for x in m))
+        self.assertFalse(m[0].flags.writeable)
+        self.assertRaises(ValueError, m[0].__setitem__, 0, 0.5)
+        self.assertTrue(CGU.getNodeByPath(T, '/Base/Zone3/Data')[1].flags.writeable)
+        self.assertEqual(CGU.deduplicate(T), (9, 0, 0))
+        C = CGU.nodeCopy(T, share=True)
+        self.assertTrue(CGU.getNodeByPath(C, '/Base/Zone1/ReferenceState/Mach')[1] is m[0])
+        C = CGU.nodeCopy(T)
+        c = [CGU.getNodeByPath(C, '/Base/Zone%d/ReferenceState/Mach' % z)[1] for z in range(10)]
+        self.assertTrue(all(x is c[0] for x in c) and (c[0] is not m[0]))
+        self.assertFalse(c[0].flags.writeable)
+        self.assertEqual(CGU.diff(R, C), {})
+        n = CGU.nodeCopy(CGU.getNodeByPath(T, '/Base/Zone0/ReferenceState/Mach'))
+        self.assertFalse(n[1].flags.writeable or (n[1] is m[0]))
+        C[2][0][2].append(['New', None, [], CGK.UserDefinedData_ts])
+        self.assertEqual(len(T[2][0][2]), 10)
+        self.assertEqual(CGU.getNodeByPath(C, '/Base/Zone0/ReferenceState')[2][0][2], [])
+        self.assertFalse(CGU.getNodeByPath(C, '/Base/Zone0/Data')[2] is
+                         CGU.getNodeByPath(T, '/Base/Zone0/Data')[2])
+        T = CGU.nodeCopy(R)
+        self.assertEqual(CGU.deduplicate(T, readonly=False, maxsize=64), (9, 18, 9 * (size[0] + size[2])))
+        self.assertTrue(CGU.getNodeByPath(T, '/Base/Zone1/ReferenceState/Reynolds')[1].flags.writeable)
+        # a view does not own the data it shares
+        T = CGU.nodeCopy(R)
+        a = numpy.array([0.8] * 200)
+        CGU.getNodeByPath(T, '/Base/Zone1/ReferenceState/Mach')[1] = a[:100]
+        self.assertEqual(CGU.deduplicate(T)[2], 8 * size[1] + 9 * (size[0] + size[2]))
+
 # ---
 print('-' * 70 + '\nCGNS.PAT test suite')
 suite = unittest.TestLoader().loadTestsFromTestCase(PATTestCase)
@@ -126,7 +126,7 @@ class CGNS_VAL_USER_Checks(CGNS.VAL.parse.generic.GenericParser):
                                                       CGK.ElementRange_s])
         for erpath in erpathlist: # loop on element range paths
           er  = CGU.getNodeByPath(node,erpath) # element range node
-          erp = CGU.getParentFromNode(tree,er) # element_t node
+          erp = CGU.getParentFromNode(tree,er,index=self.index) # element_t node
           et  = erp[1][0]                      # element type (integer)
           shp = (id,2)
           if ((CGU.getShape(er) == shp)
@@ -81,6 +81,7 @@ class GenericParser(object):
             self.log = CGM.DiagnosticLog()
         self.log.addMessages(genericmessages)
         self.context = GenericContext()
+        self.index = None
         self._trace = False
 
     # --------------------------------------------------------------------
@@ -139,7 +140,7 @@ class GenericParser(object):
 
     # --------------------------------------------------------------------
     def checkLeaf(self, T, path, node):
-        parent = CGU.getParentFromNode(T, node)
+        parent = CGU.getParentFromNode(T, node, index=self.index)
         status1 = self.checkSingleNode(T, path, node, parent)
         status2 = status1
         ntype = CGU.getTypeAsGrammarToken(node[3])
@@ -203,26 +204,32 @@ class GenericParser(object):
         if (status1 != CGM.CHECK_GOOD):
             return status1
         paths = CGU.getPathFullTree(T, width=True)
-        sz = len(paths) + 1
-        ct = 1
-        if (not hasattr(self, 'methods')):
-            self.methods = []
-            for m in inspect.getmembers(self):
-                if ((m[0][-2:] == '_t') or (m[0][-2:] == '_n') or (m[0][-3:] == '_ts')):
-                    self.methods += [m[0]]
-        for path in ['/'] + paths:
-            if (self._trace):
-                print('### Check node [%.6d/%.6d]\r' % (ct, sz), )
-            node = CGU.getNodeByPath(T, path)
-            status2 = CGM.CHECK_GOOD
-            if (node is None):
-                status2 = self.log.push(path, 'g0000.0005', path)
-                if (self._stop):
-                    raise CGE.cgnsException(-1)
-            if (status2 == CGM.CHECK_GOOD):
-                status2 = self.checkLeaf(T, path, node)
-            status1 = status2
-            ct += 1
+        self.index = CGU.TreeIndex(T)
+        # the index is only valid during the check, it keeps the tree alive
+        # and each index is updated by the CGNS.PAT tree changes
+        try:
+            sz = len(paths) + 1
+            ct = 1
+            if (not hasattr(self, 'methods')):
+                self.methods = []
+                for m in inspect.getmembers(self):
+                    if ((m[0][-2:] == '_t') or (m[0][-2:] == '_n') or (m[0][-3:] == '_ts')):
+                        self.methods += [m[0]]
+            for path in ['/'] + paths:
+                if (self._trace):
+                    print('### Check node [%.6d/%.6d]\r' % (ct, sz), )
+                node = self.index.getNodeByPath(path)
+                status2 = CGM.CHECK_GOOD
+                if (node is None):
+                    status2 = self.log.push(path, 'g0000.0005', path)
+                    if (self._stop):
+                        raise CGE.cgnsException(-1)
+                if (status2 == CGM.CHECK_GOOD):
+                    status2 = self.checkLeaf(T, path, node)
+                status1 = status2
+                ct += 1
+        finally:
+            self.index = None
         if self._trace:
             print("")
         return status1
@@ -206,11 +206,14 @@ if MAP:
     include_dirs = ['.'] + hdfpinc + CONFIG.INCLUDE_DIRS + OTHER_INCLUDES_PATHS
     library_dirs = hdfplib
     optional_libs = hdflib
+    if not PLATFORM_WINDOWS:
+        optional_libs = hdflib + ['z']
     extra_compile_args = CONFIG.HDF5_EXTRA_ARGS
     extra_define_macro = EXTRA_DEFINE_MACROS
 
     conf = {'CHLONE_HAS_PTHREAD': 1,
             'CHLONE_HAS_REGEXP': 1,
+            'CHLONE_HAS_ZLIB': int(not PLATFORM_WINDOWS),
             'CHLONE_PRINTF_TRACE': 0,
             'CHLONE_ON_WINDOWS': PLATFORM_WINDOWS,
             'CHLONE_H5CONF_STD': CONFIG.HDF5_HST,